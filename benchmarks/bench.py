@@ -0,0 +1,236 @@
+"""Throughput of the Python API, next to the standard library.
+
+    python benchmarks/bench.py [--max-size 64M] [--output results.json]
+    python benchmarks/bench.py --cpp build/bench_codecs --output results.json
+    python benchmarks/bench.py --compare baseline.json --tolerance 0.15
+
+Each codec is timed through its module function, the instance methods
+(encode, decode_to_bytes from bytes and from str, encode_into/decode_into),
+the batch API, the multi-threaded instance and the stdlib ``base64`` and
+``binascii`` functions for the same format. Payloads go from 16 bytes to
+``--max-size`` in steps of 4x; 1G needs about 5 GB of memory. MB/s counts
+the binary payload in both directions.
+
+With ``--cpp`` the C++ benchmark (built with -DBUILD_BENCHMARKS=ON) runs
+first and its results go into the same JSON file. ``--compare`` exits with
+status 1 if any measurement also present in the baseline file got slower by
+more than ``--tolerance``.
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import bin2text
+from bin2text import Base64, Base32, Base16, Base128
+
+CODECS = {
+    'base64': Base64,
+    'base32': Base32,
+    'base16': Base16,
+    'base128': Base128,
+}
+
+# Standard library equivalents: (name, encode, decode)
+STDLIB = {
+    'base64': [
+        ('base64.b64encode', base64.b64encode, base64.b64decode),
+        ('binascii.b2a_base64', lambda b: binascii.b2a_base64(b, newline=False), binascii.a2b_base64),
+    ],
+    'base32': [
+        ('base64.b32encode', base64.b32encode, base64.b32decode),
+    ],
+    'base16': [
+        ('base64.b16encode', base64.b16encode, base64.b16decode),
+        ('binascii.hexlify', binascii.hexlify, binascii.unhexlify),
+    ],
+    'base128': [],
+}
+
+# Payloads batched per encode_many/decode_many call, for sizes up to BATCH_MAX
+BATCH = 64
+BATCH_MAX = 64 * 1024
+
+# Below this the multi-threaded instance runs on the calling thread anyway
+PARALLEL_MIN = 1 << 20
+
+
+def parse_size(text):
+    units = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+    text = text.strip().lower().rstrip('b')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def payload(size):
+    """Deterministic bytes that are not trivially compressible."""
+    seed = bytes((i * 131 + (i >> 8)) & 0xFF for i in range(4096))
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def time_per_call(func, arg, min_time, repeat):
+    """Best time per call over ``repeat`` rounds of at least ``min_time`` seconds each."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= min(10, max(2, int(min_time / elapsed))) if elapsed > 0 else 10
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def cases(name, size, data):
+    """Yield (impl, api, func, arg, nbytes) for every path timed at ``size``."""
+    codec = CODECS[name]()
+    text = codec.encode(data)
+    encoded = text.encode('ascii')
+
+    yield 'bin2text', 'encode', getattr(bin2text, name + '_encode'), data, size
+    yield 'bin2text', 'Codec.encode', codec.encode, data, size
+    yield 'bin2text', 'Codec.decode_to_bytes', codec.decode_to_bytes, encoded, size
+    yield 'bin2text', 'Codec.decode_to_bytes(str)', codec.decode_to_bytes, text, size
+
+    out = bytearray(codec.encoded_length(size))
+    yield 'bin2text', 'Codec.encode_into', lambda d: codec.encode_into(d, out), data, size
+    buf = bytearray(codec.max_decoded_length(len(encoded)))
+    yield 'bin2text', 'Codec.decode_into', lambda e: codec.decode_into(e, buf), encoded, size
+
+    if size <= BATCH_MAX:
+        items = [data] * BATCH
+        encoded_items = [encoded] * BATCH
+        yield 'bin2text', 'encode_many', codec.encode_many, items, size * BATCH
+        yield 'bin2text', 'decode_many', codec.decode_many, encoded_items, size * BATCH
+
+    if size >= PARALLEL_MIN:
+        threaded = CODECS[name](parallel=True)
+        yield 'bin2text', 'parallel encode', threaded.encode, data, size
+        yield 'bin2text', 'parallel decode_to_bytes', threaded.decode_to_bytes, encoded, size
+
+    for impl, encode, decode in STDLIB[name]:
+        yield impl, 'encode', encode, data, size
+        yield impl, 'decode', decode, encode(data), size
+
+
+def run_python(args):
+    results = []
+    size = 16
+    while size <= args.max_size:
+        data = payload(size)
+        for name in args.codecs:
+            for impl, api, func, arg, nbytes in cases(name, size, data):
+                seconds = time_per_call(func, arg, args.min_time, args.repeat)
+                results.append({
+                    'codec': name, 'impl': impl, 'api': api, 'size': size,
+                    'seconds_per_call': seconds,
+                    'calls_per_s': 1 / seconds,
+                    'mb_per_s': nbytes / seconds / 1e6,
+                })
+        print(f"{size:>11} bytes done", file=sys.stderr)
+        size *= 4
+    return results
+
+
+def run_cpp(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cpp.json')
+        subprocess.run([args.cpp, '--max-size', str(args.max_size), '--min-time', str(args.min_time),
+                        '--repeat', str(args.repeat), '--output', path], check=True)
+        with open(path) as f:
+            return json.load(f)
+
+
+def _key(result):
+    return result.get('suite', 'python'), result['codec'], result['impl'], result['api'], result['size']
+
+
+def compare(report, baseline, tolerance):
+    """Print and return the measurements that got slower than ``baseline`` by more than ``tolerance``."""
+    before = {_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        ratio = result['mb_per_s'] / old['mb_per_s']
+        if ratio < 1 - tolerance:
+            regressions.append(result)
+            suite, codec, impl, api, size = _key(result)
+            print(f"slower: {suite} {impl} {codec} {api} at {size} bytes: "
+                  f"{old['mb_per_s']:.1f} -> {result['mb_per_s']:.1f} MB/s ({ratio:.0%})")
+    return regressions
+
+
+def summary(results):
+    """One line per measurement, for the terminal."""
+    for r in results:
+        print(f"{r.get('suite', 'python'):6} {r['codec']:8} {r['impl']:20} {r['api']:28} "
+              f"{r['size']:>11} B {r['mb_per_s']:10.1f} MB/s {r['calls_per_s']:14.0f} calls/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark bin2text against the standard library')
+    parser.add_argument('--max-size', type=parse_size, default=64 << 20,
+                        help='largest payload, e.g. 64M or 1G (default: 64M)')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='seconds each timing round runs for at least (default: 0.05)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing rounds, the best is kept (default: 3)')
+    parser.add_argument('--codecs', nargs='+', choices=list(CODECS), default=list(CODECS))
+    parser.add_argument('--cpp', metavar='BENCH_CODECS', help='also run this C++ benchmark binary')
+    parser.add_argument('--output', '-o', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='slowdown allowed by --compare, as a fraction (default: 0.10)')
+    args = parser.parse_args(argv)
+    args.max_size = min(args.max_size, 1 << 30)
+
+    results = run_python(args)
+    for r in results:
+        r['suite'] = 'python'
+    report = {
+        'bin2text': bin2text.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'kernels': {name: getattr(getattr(bin2text, name), 'KERNEL', 'scalar') for name in CODECS},
+        'results': results,
+    }
+    if args.cpp:
+        cpp = run_cpp(args)
+        report['simd'] = cpp['simd']
+        report['threads'] = cpp['threads']
+        for r in cpp['results']:
+            if r['codec'] in args.codecs:
+                r['suite'] = 'cpp'
+                report['results'].append(r)
+
+    summary(report['results'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+// Throughput of the header-only codecs, without Python in the way.
+//
+//   bench_codecs [--max-size BYTES] [--min-time SECONDS] [--repeat N] [--output FILE]
+//
+// Every codec is timed through encode_into, decode_into, the validating
+// decode_into and the parallel drivers, for payloads from 16 bytes up to
+// --max-size (64 MiB by default, 1 GiB at most). Results are written as
+// JSON; benchmarks/bench.py reads them with --cpp. MB/s always counts the
+// binary payload, in both directions, so encode and decode are comparable.
+
+#include <algorithm>
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "base64.h"
+#include "base32.h"
+#include "base16.h"
+#include "base128.h"
+#include "parallel.h"
+
+using namespace b2t;
+
+namespace {
+
+    struct codec {
+       const char* name;
+       const char* kernel;
+       size_t groupIn;      // bytes per encoded group
+       size_t groupOut;     // characters per encoded group
+       bool stopAtPadding;
+       size_t (*encoded_length)(size_t);
+       size_t (*max_decoded_length)(size_t);
+       encode_into_fn encode;
+       decode_into_fn decode;
+       checked_decode_into_fn checked;
+    };
+
+    struct options {
+       size_t max_size = size_t(64) << 20;
+       double min_time = 0.05;
+       int repeat = 3;
+       const char* output = NULL;
+    };
+
+    struct result {
+       const char* codec;
+       const char* kernel;
+       std::string op;
+       size_t size;
+       double seconds;
+    };
+
+    typedef std::chrono::steady_clock clock_type;
+
+    // Best time per call over opts.repeat rounds, each long enough to be
+    // above opts.min_time
+    template <class Call>
+    double time_per_call(const options& opts, Call call) {
+       size_t number = 1;
+       double elapsed = 0;
+       for (;;) {
+          const clock_type::time_point start = clock_type::now();
+          for (size_t i = 0; i < number; ++i)
+             call();
+          elapsed = std::chrono::duration<double>(clock_type::now() - start).count();
+          if (elapsed >= opts.min_time)
+             break;
+          number *= elapsed > 0 ? std::min<size_t>(10, std::max<size_t>(2, size_t(opts.min_time / elapsed))) : 10;
+       }
+       double best = elapsed / number;
+       for (int round = 1; round < opts.repeat; ++round) {
+          const clock_type::time_point start = clock_type::now();
+          for (size_t i = 0; i < number; ++i)
+             call();
+          best = std::min(best, std::chrono::duration<double>(clock_type::now() - start).count() / number);
+       }
+       return best;
+    }
+
+    size_t parse_size(const char* text) {
+       char* end = NULL;
+       double value = std::strtod(text, &end);
+       switch (*end) {
+          case 'k': case 'K': value *= 1 << 10; break;
+          case 'm': case 'M': value *= 1 << 20; break;
+          case 'g': case 'G': value *= 1 << 30; break;
+       }
+       return static_cast<size_t>(value);
+    }
+
+    // Sink the compiler cannot see through, so timed calls are not dropped
+    volatile size_t sink;
+
+    void bench_codec(const codec& c, const std::vector<uint8_t>& payload, const options& opts,
+                     std::vector<result>& results) {
+       const unsigned workers = std::max(1u, std::thread::hardware_concurrency());
+       std::string encoded;
+       std::vector<uint8_t> decoded;
+
+       for (size_t size = 16; size <= opts.max_size; size *= 4) {
+          encoded.resize(c.encoded_length(size));
+          decoded.resize(c.max_decoded_length(encoded.size()));
+          const uint8_t* in = payload.data();
+          char* text = &encoded[0];
+          uint8_t* out = decoded.data();
+
+          // Decoding below reads what this wrote; check the round trip once
+          sink = c.encode(NULL, text, in, size);
+          size_t invalid = 0;
+          if (c.checked(NULL, out, text, encoded.size(), &invalid) != size || invalid != encoded.size()
+              || std::memcmp(out, in, size) != 0) {
+             std::fprintf(stderr, "%s: round trip of %zu bytes failed\n", c.name, size);
+             std::exit(1);
+          }
+
+          const size_t len = encoded.size();
+          result r = { c.name, c.kernel, "", size, 0 };
+          r.op = "encode_into";
+          r.seconds = time_per_call(opts, [&] { sink = c.encode(NULL, text, in, size); });
+          results.push_back(r);
+          r.op = "decode_into";
+          r.seconds = time_per_call(opts, [&] { sink = c.decode(NULL, out, text, len); });
+          results.push_back(r);
+          r.op = "decode_into_strict";
+          r.seconds = time_per_call(opts, [&] { sink = c.checked(NULL, out, text, len, &invalid); });
+          results.push_back(r);
+
+          // The drivers run inline below parallel_min_chunk, which the plain
+          // kernels already cover
+          if (workers > 1 && size >= 4 * parallel_min_chunk) {
+             r.op = "parallel_encode_into";
+             r.seconds = time_per_call(opts, [&] {
+                sink = parallel_encode_into(c.encode, NULL, c.groupIn, c.groupOut, text, in, size, workers);
+             });
+             results.push_back(r);
+             r.op = "parallel_decode_into";
+             r.seconds = time_per_call(opts, [&] {
+                sink = parallel_decode_into(c.decode, NULL, c.groupIn, c.groupOut, c.stopAtPadding,
+                                            out, text, len, workers);
+             });
+             results.push_back(r);
+          }
+          std::fprintf(stderr, "%-8s %11zu bytes done\n", c.name, size);
+       }
+    }
+
+    void write_json(std::FILE* f, const std::vector<result>& results) {
+       std::fprintf(f, "{\n  \"suite\": \"cpp\",\n  \"simd\": \"%s\",\n  \"threads\": %u,\n  \"results\": [\n",
+                    simd_level_name(cpu_simd_level()), std::max(1u, std::thread::hardware_concurrency()));
+       for (size_t i = 0; i < results.size(); ++i) {
+          const result& r = results[i];
+          std::fprintf(f, "    {\"codec\": \"%s\", \"impl\": \"bin2text\", \"api\": \"%s\", \"kernel\": \"%s\", "
+                          "\"size\": %zu, \"seconds_per_call\": %.9g, \"calls_per_s\": %.6g, \"mb_per_s\": %.6g}%s\n",
+                       r.codec, r.op.c_str(), r.kernel, r.size, r.seconds, 1 / r.seconds,
+                       r.size / r.seconds / 1e6, i + 1 < results.size() ? "," : "");
+       }
+       std::fprintf(f, "  ]\n}\n");
+    }
+
+} // namespace
+
+int main(int argc, char** argv) {
+    options opts;
+    for (int i = 1; i < argc; ++i) {
+       const std::string arg = argv[i];
+       if (i + 1 < argc && arg == "--max-size")
+          opts.max_size = std::min(parse_size(argv[++i]), size_t(1) << 30);
+       else if (i + 1 < argc && arg == "--min-time")
+          opts.min_time = std::atof(argv[++i]);
+       else if (i + 1 < argc && arg == "--repeat")
+          opts.repeat = std::max(1, std::atoi(argv[++i]));
+       else if (i + 1 < argc && arg == "--output")
+          opts.output = argv[++i];
+       else {
+          std::fprintf(stderr, "usage: %s [--max-size BYTES] [--min-time SECONDS] [--repeat N] [--output FILE]\n",
+                       argv[0]);
+          return 2;
+       }
+    }
+
+    const codec codecs[] = {
+       { "base64", base64_kernel_name(), 3, 4, true, base64_encoded_length, base64_max_decoded_length,
+         encode_kernel<base64_encode_into>, decode_kernel<base64_decode_into>, checked_kernel<base64_decode_into> },
+       { "base32", "scalar", 5, 8, true, base32_encoded_length, base32_max_decoded_length,
+         encode_kernel<base32_encode_into>, decode_kernel<base32_decode_into>, checked_kernel<base32_decode_into> },
+       { "base16", base16_kernel_name(), 1, 2, false, base16_encoded_length, base16_max_decoded_length,
+         encode_kernel<base16_encode_into>, decode_kernel<base16_decode_into>, checked_kernel<base16_decode_into> },
+       { "base128", base128_kernel_name(), 7, 8, false, base128_encoded_length, base128_max_decoded_length,
+         encode_kernel<base128_encode_into>, decode_kernel<base128_decode_into>, checked_kernel<base128_decode_into> },
+    };
+
+    // Pseudo-random, so table lookups and branches see realistic input
+    std::vector<uint8_t> payload(opts.max_size);
+    uint32_t state = 2463534242u;
+    for (size_t i = 0; i < payload.size(); ++i) {
+       state ^= state << 13; state ^= state >> 17; state ^= state << 5;
+       payload[i] = static_cast<uint8_t>(state);
+    }
+
+    std::vector<result> results;
+    for (const codec& c : codecs)
+       bench_codec(c, payload, opts, results);
+
+    std::FILE* f = opts.output ? std::fopen(opts.output, "w") : stdout;
+    if (!f) {
+       std::perror(opts.output);
+       return 1;
+    }
+    write_json(f, results);
+    if (f != stdout)
+       std::fclose(f);
+    return 0;
+}
@@ -0,0 +1,111 @@
+"""Cold-start cost of bin2text, as paid by short-lived processes.
+
+    python benchmarks/bench_import.py [--runs 30] [--output startup.json]
+    python benchmarks/bench_import.py --compare startup.json --tolerance 0.25
+
+Each scenario runs in a fresh interpreter ``--runs`` times; the median wall
+time is reported next to a bare ``python -c pass`` and minus it, along with
+the modules the scenario left loaded. ``--compare`` exits with status 1 if
+any scenario's time over the bare interpreter grew by more than
+``--tolerance`` (and at least 1 ms) since the baseline file.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+SCENARIOS = {
+    'python -c pass': 'pass',
+    'import bin2text': 'import bin2text',
+    'first base64_encode': 'import bin2text; bin2text.base64_encode(b"x")',
+    'first encode(format=base16)': 'import bin2text; bin2text.encode(b"x", format="base16")',
+    'all codecs': 'import bin2text; bin2text.Base64, bin2text.Base32, bin2text.Base16, bin2text.Base128',
+    'import bin2text.aio': 'import bin2text.aio',
+    'CLI --encode TEXT': 'from bin2text.__main__ import main; main(["--encode", "x"])',
+}
+
+# Printed by each scenario so the loaded modules can be reported
+_MODULES = '; import sys; print(",".join(sorted(sys.modules)), file=sys.stderr)'
+
+
+def run_once(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code + _MODULES], check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - start, result.stderr.strip().split(',')
+
+
+def run(runs):
+    results = []
+    baseline_modules = set()
+    baseline = None
+    for name, code in SCENARIOS.items():
+        times = []
+        for _ in range(runs):
+            seconds, modules = run_once(code)
+            times.append(seconds)
+        median = statistics.median(times)
+        if baseline is None:
+            baseline, baseline_modules = median, set(modules)
+        loaded = sorted(set(modules) - baseline_modules)
+        results.append({
+            'scenario': name,
+            'ms': median * 1e3,
+            'extra_ms': (median - baseline) * 1e3,
+            'modules': len(loaded),
+            'extensions': [m for m in loaded if m.startswith('bin2text.')],
+            'heavy': [m for m in ('asyncio', 'numpy', 'concurrent.futures') if m in loaded],
+        })
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Print and return the scenarios whose extra time grew by more than ``tolerance``."""
+    before = {r['scenario']: r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = before.get(result['scenario'])
+        if old is None:
+            continue
+        growth = result['extra_ms'] - old['extra_ms']
+        if growth > max(1.0, tolerance * old['extra_ms']):
+            regressions.append(result)
+            print(f"slower: {result['scenario']}: +{old['extra_ms']:.1f} -> +{result['extra_ms']:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the start-up cost of bin2text')
+    parser.add_argument('--runs', type=int, default=30, help='interpreters started per scenario (default: 30)')
+    parser.add_argument('--output', '-o', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='growth allowed by --compare, as a fraction (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': args.runs,
+        'results': run(args.runs),
+    }
+    for r in report['results']:
+        print(f"{r['scenario']:30} {r['ms']:8.1f} ms {r['extra_ms']:+8.1f} ms "
+              f"{r['modules']:4} modules  {' '.join(r['extensions'] + r['heavy'])}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
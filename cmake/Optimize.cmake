@@ -8,7 +8,9 @@
 #   project_set_default_optimizations()
 #   project_enable_optimizations(<target>)
 
-option(PROJECT_ARCH_NATIVE "Enable -march=native (tune to local CPU)" ON)
+# Off by default: binaries built with -march=native crash on older CPUs, and the
+# codec kernels already pick SSSE3/AVX2/NEON code paths at run time (simd.h).
+option(PROJECT_ARCH_NATIVE "Enable -march=native (tune to local CPU)" OFF)
 option(PROJECT_FAST_MATH  "Enable fast-math (unsafe for strict IEEE compliance)" ON)
 
 # --- Helper: enable IPO/LTO if available ---
@@ -5,6 +5,9 @@
 #include <string>
 #include <vector>
 #include <cstdint>
+#include <cstring>
+
+#include "simd.h"
 
 namespace b2t {
 
@@ -15,25 +18,23 @@ namespace b2t {
     void base128_encode(std::string & out, const std::vector<uint8_t>& buf);
     void base128_encode(std::string & out, const uint8_t* buf, size_t bufLen);
     void base128_encode(std::string & out, std::string const& buf);
+    size_t base128_encode_into(char* out, const uint8_t* buf, size_t bufLen);
 
     void base128_decode(std::vector<uint8_t> & out, std::string const& encoded_string);
+    void base128_decode(std::vector<uint8_t> & out, const char* in, size_t inLen);
     void base128_decode(std::string & out, std::string const& encoded_string);
+    void base128_decode(std::string & out, const char* in, size_t inLen);
+    size_t base128_decode_into(uint8_t* out, const char* in, size_t inLen);
+    size_t base128_decode_into(uint8_t* out, const char* in, size_t inLen, size_t* invalid_at);
+
+    // Output sizes: exact for encoding, an upper bound for decoding
+    size_t base128_encoded_length(size_t bufLen);
+    size_t base128_max_decoded_length(size_t inLen);
+
+    // Name of the kernel picked for this CPU ("avx2", "ssse3", "neon" or "scalar")
+    const char* base128_kernel_name();
 
     // Implementation
-    namespace {
-        // Use printable ASCII characters from 33 to 126 (excluding space and DEL)
-        static const char to_base128[128] = 
-            "!\"#$%&'()*+,-./0123456789:;<=>?@"
-            "ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_"
-            "`abcdefghijklmnopqrstuvwxyz{|}~";
-        
-        inline uint8_t base128_char_to_value(char c) {
-            if (c >= 33 && c <= 126) {
-                return static_cast<uint8_t>(c - 33);
-            }
-            return 0; // Invalid character
-        }
-    }
 
     inline void base128_encode(std::string & out, std::string const& buf) {
        if (buf.empty())
@@ -50,79 +51,427 @@ namespace b2t {
           base128_encode(out, &buf[0], buf.size());
     }
 
-    inline void base128_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
-       if (!buf) {
-          ret.clear();
-          return;
+    inline size_t base128_encoded_length(size_t bufLen) {
+       // Each 7 bytes of input becomes 8 bytes of output (7*8=56 bits, 8*7=56 bits)
+       return (bufLen * 8 + 6) / 7;
+    }
+
+    inline size_t base128_max_decoded_length(size_t inLen) {
+       // The final character holds fewer than 8 bits of padding, so this is exact
+       // for any output of base128_encode
+       return (inLen * 7) / 8;
+    }
+
+    namespace detail {
+
+       // 7 bits need all 128 ASCII code points. Values 0..93 use the printable
+       // characters 33..126 ('!' to '~'), 94 is DEL and 95..127 wrap around to
+       // the control characters and space (0..32), i.e. (v + 33) & 0x7F.
+       //
+       // Blocks of 7 bytes are one little-endian 56 bit word, written as 8
+       // characters of 7 bits each, least significant first. All of it is
+       // done on whole 64 bit words: each byte lane holds one character, and
+       // the vector kernels run the same steps on 2 or 4 words at a time.
+
+       inline uint64_t base128_load_le(const uint8_t* p, size_t len) {
+#if defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__
+          uint64_t v = 0;
+          std::memcpy(&v, p, len);
+          return v;
+#else
+          uint64_t v = 0;
+          for (size_t k = 0; k < len; ++k)
+             v |= uint64_t(p[k]) << (8 * k);
+          return v;
+#endif
        }
 
-       ret.clear();
-       // Each 7 bytes of input becomes 8 bytes of output (7*8=56 bits, 8*7=56 bits)
-       ret.reserve((bufLen * 8 + 6) / 7); // Calculate required space
-
-       size_t bit_idx = 0;
-       size_t byte_idx = 0;
-       uint64_t buffer = 0;
-
-       while (byte_idx < bufLen) {
-          // Add 8 bits from input to buffer
-          buffer |= (static_cast<uint64_t>(buf[byte_idx]) << bit_idx);
-          bit_idx += 8;
-          byte_idx++;
-
-          // When we have at least 7 bits, output a character
-          while (bit_idx >= 7) {
-             ret.push_back(to_base128[buffer & 0x7F]); // Take lowest 7 bits
-             buffer >>= 7; // Remove the 7 bits we just used
-             bit_idx -= 7;
+       inline void base128_store_le(uint8_t* p, uint64_t v, size_t len) {
+#if defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__
+          std::memcpy(p, &v, len);
+#else
+          for (size_t k = 0; k < len; ++k)
+             p[k] = static_cast<uint8_t>(v >> (8 * k));
+#endif
+       }
+
+       // 56 bit word -> 8 characters, one per byte lane
+       inline uint64_t base128_encode_word(uint64_t w) {
+          // Spread 7 bit fields into byte lanes: 2 x 28 bits, 4 x 14, 8 x 7
+          w = (w & 0x000000000FFFFFFFull) | ((w & 0x00FFFFFFF0000000ull) << 4);
+          w = (w & 0x00003FFF00003FFFull) | ((w & 0x0FFFC0000FFFC000ull) << 2);
+          w = (w & 0x007F007F007F007Full) | ((w & 0x3F803F803F803F80ull) << 1);
+          // Every lane is below 128, so adding 33 cannot carry into the next
+          return (w + 0x2121212121212121ull) & 0x7F7F7F7F7F7F7F7Full;
+       }
+
+       // 8 characters, one per byte lane -> 56 bit word. Characters outside
+       // ASCII are invalid and read as 0.
+       inline uint64_t base128_decode_word(uint64_t c) {
+          const uint64_t invalid = ((c & 0x8080808080808080ull) >> 7) * 0xFF;
+          // Setting the top bit of every lane keeps the subtraction from borrowing
+          uint64_t w = ((c | 0x8080808080808080ull) - 0x2121212121212121ull) & 0x7F7F7F7F7F7F7F7Full & ~invalid;
+          // Pack the byte lanes back together: 4 x 14 bits, 2 x 28, 1 x 56
+          w = (w & 0x007F007F007F007Full) | ((w & 0x7F007F007F007F00ull) >> 1);
+          w = (w & 0x00003FFF00003FFFull) | ((w & 0x3FFF00003FFF0000ull) >> 2);
+          return (w & 0x000000000FFFFFFFull) | ((w & 0x0FFFFFFF00000000ull) >> 4);
+       }
+
+       // Block kernels handle as many whole 7 byte / 8 character blocks as
+       // they can from the start of the input and return the number of input
+       // bytes consumed; the portable code finishes the rest. Decoders set
+       // bit 0x80 of *error if they saw a character outside ASCII.
+       typedef size_t (*base128_encode_blocks_fn)(char* out, const uint8_t* buf, size_t bufLen);
+       typedef size_t (*base128_decode_blocks_fn)(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error);
+
+       inline size_t base128_encode_blocks_scalar(char* out, const uint8_t* buf, size_t bufLen) {
+          uint8_t* o = reinterpret_cast<uint8_t*>(out);
+          size_t i = 0;
+          // Read a whole word and drop the top byte while one is available;
+          // odd-sized loads go through memory and stall the loop
+          for (; i + 8 <= bufLen; i += 7, o += 8)
+             base128_store_le(o, base128_encode_word(base128_load_le(buf + i, 8) & 0x00FFFFFFFFFFFFFFull), 8);
+          return i;
+       }
+
+       inline size_t base128_decode_blocks_scalar(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          uint64_t err = 0;
+          size_t i = 0;
+          for (; i + 8 <= inLen; i += 8, out += 7) {
+             const uint64_t c = base128_load_le(in + i, 8);
+             err |= c;
+             base128_store_le(out, base128_decode_word(c), 7);
           }
+          if (err & 0x8080808080808080ull)
+             *error |= 0x80;
+          return i;
        }
 
-       // Output remaining bits if any
-       if (buffer > 0 || bit_idx > 0) {
-          ret.push_back(to_base128[buffer & 0x7F]);
+#if defined(B2T_X86)
+       // Moves bytes 0-6 and 7-13 of a 16 byte load into the low 7 bytes of
+       // each 64 bit lane
+       B2T_TARGET("ssse3")
+       inline __m128i base128_spread_shuffle() {
+          return _mm_setr_epi8(0, 1, 2, 3, 4, 5, 6, -1, 7, 8, 9, 10, 11, 12, 13, -1);
        }
-    }
 
+       // And back: the low 7 bytes of each lane to bytes 0-13
+       B2T_TARGET("ssse3")
+       inline __m128i base128_pack_shuffle() {
+          return _mm_setr_epi8(0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11, 12, 13, 14, -1, -1);
+       }
 
-    template <class Out>
-    inline void base128_decode_any( Out & ret, std::string const& in) {
-        typedef typename Out::value_type T;
+       B2T_TARGET("ssse3")
+       inline __m128i base128_encode_words_ssse3(__m128i w) {
+          w = _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x000000000FFFFFFFll)),
+                           _mm_slli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x00FFFFFFF0000000ll)), 4));
+          w = _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x00003FFF00003FFFll)),
+                           _mm_slli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x0FFFC0000FFFC000ll)), 2));
+          w = _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x007F007F007F007Fll)),
+                           _mm_slli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x3F803F803F803F80ll)), 1));
+          return _mm_and_si128(_mm_add_epi8(w, _mm_set1_epi8(33)), _mm_set1_epi8(0x7F));
+       }
+
+       B2T_TARGET("ssse3")
+       inline __m128i base128_decode_words_ssse3(__m128i c) {
+          const __m128i invalid = _mm_cmplt_epi8(c, _mm_setzero_si128());
+          __m128i w = _mm_andnot_si128(invalid, _mm_and_si128(_mm_sub_epi8(c, _mm_set1_epi8(33)), _mm_set1_epi8(0x7F)));
+          w = _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x007F007F007F007Fll)),
+                           _mm_srli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x7F007F007F007F00ll)), 1));
+          w = _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x00003FFF00003FFFll)),
+                           _mm_srli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x3FFF00003FFF0000ll)), 2));
+          return _mm_or_si128(_mm_and_si128(w, _mm_set1_epi64x(0x000000000FFFFFFFll)),
+                              _mm_srli_epi64(_mm_and_si128(w, _mm_set1_epi64x(0x0FFFFFFF00000000ll)), 4));
+       }
+
+       // 14 bytes -> 16 characters per step; loads 16 bytes
+       B2T_TARGET("ssse3")
+       inline size_t base128_encode_blocks_ssse3(char* out, const uint8_t* buf, size_t bufLen) {
+          const __m128i spread = base128_spread_shuffle();
+          size_t i = 0;
+          for (; i + 16 <= bufLen; i += 14, out += 16) {
+             const __m128i v = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out),
+                              base128_encode_words_ssse3(_mm_shuffle_epi8(v, spread)));
+          }
+          return i;
+       }
+
+       // 16 characters -> 14 bytes per step; stores 16 bytes, so it stops
+       // while the output still has room for the spare two
+       B2T_TARGET("ssse3")
+       inline size_t base128_decode_blocks_ssse3(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          const __m128i pack = base128_pack_shuffle();
+          __m128i err = _mm_setzero_si128();
+          size_t i = 0;
+          for (; i + 24 <= inLen; i += 16, out += 14) {
+             const __m128i c = _mm_loadu_si128(reinterpret_cast<const __m128i*>(in + i));
+             err = _mm_or_si128(err, c);
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out),
+                              _mm_shuffle_epi8(base128_decode_words_ssse3(c), pack));
+          }
+          if (_mm_movemask_epi8(err))
+             *error |= 0x80;
+          return i;
+       }
+
+       B2T_TARGET("avx2")
+       inline __m256i base128_encode_words_avx2(__m256i w) {
+          w = _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x000000000FFFFFFFll)),
+                              _mm256_slli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x00FFFFFFF0000000ll)), 4));
+          w = _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x00003FFF00003FFFll)),
+                              _mm256_slli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x0FFFC0000FFFC000ll)), 2));
+          w = _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x007F007F007F007Fll)),
+                              _mm256_slli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x3F803F803F803F80ll)), 1));
+          return _mm256_and_si256(_mm256_add_epi8(w, _mm256_set1_epi8(33)), _mm256_set1_epi8(0x7F));
+       }
+
+       B2T_TARGET("avx2")
+       inline __m256i base128_decode_words_avx2(__m256i c) {
+          const __m256i invalid = _mm256_cmpgt_epi8(_mm256_setzero_si256(), c);
+          __m256i w = _mm256_andnot_si256(invalid, _mm256_and_si256(_mm256_sub_epi8(c, _mm256_set1_epi8(33)), _mm256_set1_epi8(0x7F)));
+          w = _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x007F007F007F007Fll)),
+                              _mm256_srli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x7F007F007F007F00ll)), 1));
+          w = _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x00003FFF00003FFFll)),
+                              _mm256_srli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x3FFF00003FFF0000ll)), 2));
+          return _mm256_or_si256(_mm256_and_si256(w, _mm256_set1_epi64x(0x000000000FFFFFFFll)),
+                                 _mm256_srli_epi64(_mm256_and_si256(w, _mm256_set1_epi64x(0x0FFFFFFF00000000ll)), 4));
+       }
+
+       // 28 bytes -> 32 characters per step: each 128 bit half loads the
+       // 14 bytes it encodes (plus 2 it ignores)
+       B2T_TARGET("avx2")
+       inline size_t base128_encode_blocks_avx2(char* out, const uint8_t* buf, size_t bufLen) {
+          const __m256i spread = _mm256_broadcastsi128_si256(base128_spread_shuffle());
+          size_t i = 0;
+          for (; i + 30 <= bufLen; i += 28, out += 32) {
+             const __m128i lo = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i));
+             const __m128i hi = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i + 14));
+             const __m256i v = _mm256_inserti128_si256(_mm256_castsi128_si256(lo), hi, 1);
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out),
+                                 base128_encode_words_avx2(_mm256_shuffle_epi8(v, spread)));
+          }
+          return i;
+       }
 
-       ret.clear();
-       // Each 8 characters of input produces 7 bytes of output (approximately)
-       ret.reserve((in.size() * 7 + 7) / 8);
+       // 32 characters -> 28 bytes per step, as two overlapping 16 byte stores
+       B2T_TARGET("avx2")
+       inline size_t base128_decode_blocks_avx2(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          const __m256i pack = _mm256_broadcastsi128_si256(base128_pack_shuffle());
+          __m256i err = _mm256_setzero_si256();
+          size_t i = 0;
+          for (; i + 40 <= inLen; i += 32, out += 28) {
+             const __m256i c = _mm256_loadu_si256(reinterpret_cast<const __m256i*>(in + i));
+             err = _mm256_or_si256(err, c);
+             const __m256i w = _mm256_shuffle_epi8(base128_decode_words_avx2(c), pack);
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), _mm256_castsi256_si128(w));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out + 14), _mm256_extracti128_si256(w, 1));
+          }
+          if (_mm256_movemask_epi8(err))
+             *error |= 0x80;
+          return i;
+       }
+#endif // B2T_X86
+
+#if defined(B2T_NEON)
+       inline uint64x2_t base128_fold_neon(uint64x2_t w, uint64_t keep, uint64_t move, int shift) {
+          const uint64x2_t moved = vandq_u64(w, vdupq_n_u64(move));
+          return vorrq_u64(vandq_u64(w, vdupq_n_u64(keep)),
+                           vshlq_u64(moved, vdupq_n_s64(shift)));
+       }
+
+       // 14 bytes -> 16 characters per step; loads 16 bytes
+       inline size_t base128_encode_blocks_neon(char* out, const uint8_t* buf, size_t bufLen) {
+          static const uint8_t spread_idx[16] = { 0, 1, 2, 3, 4, 5, 6, 0xFF, 7, 8, 9, 10, 11, 12, 13, 0xFF };
+          const uint8x16_t spread = vld1q_u8(spread_idx);
+          size_t i = 0;
+          for (; i + 16 <= bufLen; i += 14, out += 16) {
+             uint64x2_t w = vreinterpretq_u64_u8(vqtbl1q_u8(vld1q_u8(buf + i), spread));
+             w = base128_fold_neon(w, 0x000000000FFFFFFFull, 0x00FFFFFFF0000000ull, 4);
+             w = base128_fold_neon(w, 0x00003FFF00003FFFull, 0x0FFFC0000FFFC000ull, 2);
+             w = base128_fold_neon(w, 0x007F007F007F007Full, 0x3F803F803F803F80ull, 1);
+             const uint8x16_t c = vandq_u8(vaddq_u8(vreinterpretq_u8_u64(w), vdupq_n_u8(33)), vdupq_n_u8(0x7F));
+             vst1q_u8(reinterpret_cast<uint8_t*>(out), c);
+          }
+          return i;
+       }
+
+       // 16 characters -> 14 bytes per step; stores 16 bytes
+       inline size_t base128_decode_blocks_neon(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          static const uint8_t pack_idx[16] = { 0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11, 12, 13, 14, 0xFF, 0xFF };
+          const uint8x16_t pack = vld1q_u8(pack_idx);
+          uint8x16_t err = vdupq_n_u8(0);
+          size_t i = 0;
+          for (; i + 24 <= inLen; i += 16, out += 14) {
+             const uint8x16_t c = vld1q_u8(in + i);
+             err = vorrq_u8(err, c);
+             // Characters outside ASCII are invalid and read as 0
+             const uint8x16_t valid = vcltq_u8(c, vdupq_n_u8(0x80));
+             const uint8x16_t v = vandq_u8(valid, vandq_u8(vsubq_u8(c, vdupq_n_u8(33)), vdupq_n_u8(0x7F)));
+             uint64x2_t w = vreinterpretq_u64_u8(v);
+             w = base128_fold_neon(w, 0x007F007F007F007Full, 0x7F007F007F007F00ull, -1);
+             w = base128_fold_neon(w, 0x00003FFF00003FFFull, 0x3FFF00003FFF0000ull, -2);
+             w = base128_fold_neon(w, 0x000000000FFFFFFFull, 0x0FFFFFFF00000000ull, -4);
+             vst1q_u8(out, vqtbl1q_u8(vreinterpretq_u8_u64(w), pack));
+          }
+          if (vmaxvq_u8(err) & 0x80)
+             *error |= 0x80;
+          return i;
+       }
+#endif // B2T_NEON
+
+       struct base128_kernel {
+          simd_level level;
+          base128_encode_blocks_fn encode_blocks;
+          base128_decode_blocks_fn decode_blocks;
+       };
 
-       size_t bit_idx = 0;
-       uint64_t buffer = 0;
+       // Kernel for a given instruction set; levels this build or CPU cannot
+       // run fall back to the portable code
+       inline base128_kernel base128_kernel_for(simd_level level) {
+          base128_kernel k = { simd_scalar, base128_encode_blocks_scalar, base128_decode_blocks_scalar };
+#if defined(B2T_X86)
+          if (level >= simd_avx2 && cpu_simd_level() >= simd_avx2) {
+             k.level = simd_avx2;
+             k.encode_blocks = base128_encode_blocks_avx2;
+             k.decode_blocks = base128_decode_blocks_avx2;
+          } else if (level >= simd_ssse3 && cpu_simd_level() >= simd_ssse3) {
+             k.level = simd_ssse3;
+             k.encode_blocks = base128_encode_blocks_ssse3;
+             k.decode_blocks = base128_decode_blocks_ssse3;
+          }
+#elif defined(B2T_NEON)
+          if (level >= simd_neon) {
+             k.level = simd_neon;
+             k.encode_blocks = base128_encode_blocks_neon;
+             k.decode_blocks = base128_decode_blocks_neon;
+          }
+#else
+          (void)level;
+#endif
+          return k;
+       }
 
-       for (size_t i = 0; i < in.size(); ++i) {
-          uint8_t val = base128_char_to_value(in[i]);
-          buffer |= (static_cast<uint64_t>(val) << bit_idx);
-          bit_idx += 7;
+       // Picked once per process from the CPU's features
+       inline const base128_kernel& base128_active_kernel() {
+          static const base128_kernel k = base128_kernel_for(cpu_simd_level());
+          return k;
+       }
 
-          // When we have at least 8 bits, output a byte
-          while (bit_idx >= 8) {
-             ret.push_back(static_cast<T>(buffer & 0xFF)); // Take lowest 8 bits
-             buffer >>= 8; // Remove the 8 bits we just used
-             bit_idx -= 8;
+       // The final block of r <= 7 bytes is zero-filled and written as its
+       // first (8r + 6) / 7 characters
+       inline size_t base128_encode_into_with(const base128_kernel& k, char* out,
+                                              uint8_t const* buf, size_t bufLen) {
+          size_t i = k.encode_blocks(out, buf, bufLen);
+          i += base128_encode_blocks_scalar(out + i / 7 * 8, buf + i, bufLen - i);
+          size_t n = i / 7 * 8;
+          if (i < bufLen) {
+             const size_t chars = ((bufLen - i) * 8 + 6) / 7;
+             base128_store_le(reinterpret_cast<uint8_t*>(out) + n,
+                              base128_encode_word(base128_load_le(buf + i, bufLen - i)), chars);
+             n += chars;
           }
+          return n;
        }
 
-       // Output remaining bytes if any (there should be at most one)
-       if (bit_idx > 0) {
-          ret.push_back(static_cast<T>(buffer & 0xFF));
+       // A final block of r < 8 characters carries r * 7 / 8 bytes; the bits
+       // left over are the encoder's padding, not data. Characters outside
+       // ASCII decode as 0 and set bit 0x80 of error.
+       inline size_t base128_decode_into_with(const base128_kernel& k, uint8_t* out,
+                                              const char* in, size_t N, uint8_t& error) {
+          const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+          size_t i = k.decode_blocks(out, u, N, &error);
+          i += base128_decode_blocks_scalar(out + i / 8 * 7, u + i, N - i, &error);
+          size_t n = i / 8 * 7;
+          if (i < N) {
+             const uint64_t c = base128_load_le(u + i, N - i);
+             if (c & 0x8080808080808080ull)
+                error |= 0x80;
+             if (N - i >= 2) { // A single character holds no whole byte
+                const size_t bytes = (N - i) * 7 / 8;
+                base128_store_le(out + n, base128_decode_word(c), bytes);
+                n += bytes;
+             }
+          }
+          return n;
        }
+
+    } // namespace detail
+
+    inline const char* base128_kernel_name() {
+       return simd_level_name(detail::base128_active_kernel().level);
+    }
+
+    // Writes exactly base128_encoded_length(bufLen) characters to out
+    inline size_t base128_encode_into(char* out, uint8_t const* buf, size_t bufLen) {
+       return detail::base128_encode_into_with(detail::base128_active_kernel(), out, buf, bufLen);
+    }
+
+    inline void base128_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
+       ret.resize(base128_encoded_length(bufLen));
+       if (!ret.empty())
+          base128_encode_into(&ret[0], buf, bufLen);
+    }
+
+
+    inline size_t base128_find_invalid(const char* in, size_t N) {
+       const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+       size_t i = 0;
+       while (i < N && u[i] < 0x80)
+          ++i;
+       return i;
+    }
+
+    // Writes exactly base128_max_decoded_length(inLen) bytes to out
+    inline size_t base128_decode_into(uint8_t* out, const char* in, size_t N) {
+       uint8_t error = 0;
+       return detail::base128_decode_into_with(detail::base128_active_kernel(), out, in, N, error);
+    }
+
+    // Same as above, and stores in *invalid_at the offset of the first
+    // character outside ASCII, or inLen if there is none. The offset is only
+    // searched for when the kernel saw an invalid character. A last group
+    // of a single character is invalid as well: its 7 bits make no byte,
+    // and no encoder writes one.
+    inline size_t base128_decode_into(uint8_t* out, const char* in, size_t N, size_t* invalid_at) {
+       uint8_t error = 0;
+       const size_t n = detail::base128_decode_into_with(detail::base128_active_kernel(), out, in, N, error);
+       *invalid_at = (error & 0x80) ? base128_find_invalid(in, N) : N;
+       if (*invalid_at == N && N % 8 == 1)
+          *invalid_at = N - 1;
+       return n;
+    }
+
+
+    template <class Out>
+    inline void base128_decode_any( Out & ret, const char* in, size_t N) {
+       ret.resize(base128_max_decoded_length(N));
+       if (ret.empty())
+          return;
+       ret.resize(base128_decode_into(reinterpret_cast<uint8_t*>(&ret[0]), in, N));
+    }
+
+    template <class Out>
+    inline void base128_decode_any( Out & ret, std::string const& in) {
+       base128_decode_any(ret, in.data(), in.size());
     }
 
     inline void base128_decode(std::vector<uint8_t> & out, std::string const& encoded_string) {
        base128_decode_any(out, encoded_string);
     }
 
+    inline void base128_decode(std::vector<uint8_t> & out, const char* in, size_t inLen) {
+       base128_decode_any(out, in, inLen);
+    }
+
     inline void base128_decode(std::string & out, std::string const& encoded_string) {
        base128_decode_any(out, encoded_string);
     }
 
+    inline void base128_decode(std::string & out, const char* in, size_t inLen) {
+       base128_decode_any(out, in, inLen);
+    }
+
 } // namespace b2t
 
 
@@ -5,6 +5,9 @@
 #include <string>
 #include <vector>
 #include <cstdint>
+#include <cstring>
+
+#include "simd.h"
 
 namespace b2t {
 
@@ -13,20 +16,277 @@ namespace b2t {
     void base16_encode(std::string & out, const std::vector<uint8_t>& buf);
     void base16_encode(std::string & out, const uint8_t* buf, size_t bufLen);
     void base16_encode(std::string & out, std::string const& buf);
+    size_t base16_encode_into(char* out, const uint8_t* buf, size_t bufLen);
 
     void base16_decode(std::vector<uint8_t> & out, std::string const& encoded_string);
+    void base16_decode(std::vector<uint8_t> & out, const char* in, size_t inLen);
     void base16_decode(std::string & out, std::string const& encoded_string);
+    void base16_decode(std::string & out, const char* in, size_t inLen);
+    size_t base16_decode_into(uint8_t* out, const char* in, size_t inLen);
+    size_t base16_decode_into(uint8_t* out, const char* in, size_t inLen, size_t* invalid_at);
+
+    // Offset of the first character that is not a hex digit, or inLen
+    size_t base16_find_invalid(const char* in, size_t inLen);
+
+    // Output sizes: exact for encoding, an upper bound for decoding
+    size_t base16_encoded_length(size_t bufLen);
+    size_t base16_max_decoded_length(size_t inLen);
+
+    // Name of the kernel picked for this CPU ("avx2", "ssse3", "neon" or "scalar")
+    const char* base16_kernel_name();
 
     // Implementation
     namespace {
         static const char to_base16[17] = "0123456789ABCDEF";
-        
-        inline uint8_t hex_char_to_value(char c) {
-            if (c >= '0' && c <= '9') return c - '0';
-            if (c >= 'A' && c <= 'F') return c - 'A' + 10;
-            if (c >= 'a' && c <= 'f') return c - 'a' + 10;
-            return 0; // Invalid hex character
-        }
+
+        // Both hex digits of every byte value, so encoding is one 2-byte copy per byte
+        static const char base16_pairs[513] =
+            "000102030405060708090A0B0C0D0E0F"
+            "101112131415161718191A1B1C1D1E1F"
+            "202122232425262728292A2B2C2D2E2F"
+            "303132333435363738393A3B3C3D3E3F"
+            "404142434445464748494A4B4C4D4E4F"
+            "505152535455565758595A5B5C5D5E5F"
+            "606162636465666768696A6B6C6D6E6F"
+            "707172737475767778797A7B7C7D7E7F"
+            "808182838485868788898A8B8C8D8E8F"
+            "909192939495969798999A9B9C9D9E9F"
+            "A0A1A2A3A4A5A6A7A8A9AAABACADAEAF"
+            "B0B1B2B3B4B5B6B7B8B9BABBBCBDBEBF"
+            "C0C1C2C3C4C5C6C7C8C9CACBCCCDCECF"
+            "D0D1D2D3D4D5D6D7D8D9DADBDCDDDEDF"
+            "E0E1E2E3E4E5E6E7E8E9EAEBECEDEEEF"
+            "F0F1F2F3F4F5F6F7F8F9FAFBFCFDFEFF";
+
+        // Nibble value of every character; anything that is not a hex digit
+        // maps to 0x80, which reads as a zero nibble and flags the error bit
+        static const uint8_t from_base16[256] = {
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+              0,   1,   2,   3,   4,   5,   6,   7,   8,   9, 128, 128, 128, 128, 128, 128,
+            128,  10,  11,  12,  13,  14,  15, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128,  10,  11,  12,  13,  14,  15, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128,
+            128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128
+        };
+    }
+
+    namespace detail {
+
+       // Block kernels handle as many whole blocks as they can from the start of
+       // the input and return the number of input bytes consumed; the portable
+       // code finishes the rest. Decoders never stop early: invalid characters
+       // decode as zero nibbles and set bit 0x80 of *error, so the valid path
+       // costs one OR per block.
+       typedef size_t (*base16_encode_blocks_fn)(char* out, const uint8_t* buf, size_t bufLen);
+       typedef size_t (*base16_decode_blocks_fn)(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error);
+
+       inline size_t base16_encode_blocks_scalar(char* out, const uint8_t* buf, size_t bufLen) {
+          for (size_t i = 0; i < bufLen; ++i)
+             std::memcpy(out + 2*i, &base16_pairs[2 * buf[i]], 2);
+          return bufLen;
+       }
+
+       inline size_t base16_decode_blocks_scalar(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          uint8_t err = 0;
+          size_t i = 0;
+          for (; i + 2 <= inLen; i += 2) {
+             const uint8_t high = from_base16[in[i]];
+             const uint8_t low = from_base16[in[i+1]];
+             err |= high | low;
+             *out++ = static_cast<uint8_t>(((high & 0x0f) << 4) | (low & 0x0f));
+          }
+          *error |= err & 0x80;
+          return i;
+       }
+
+#if defined(B2T_X86)
+       // 16 bytes -> 32 hex digits: split into nibbles, translate both halves
+       // with one shuffle each and interleave them
+       B2T_TARGET("ssse3")
+       inline size_t base16_encode_blocks_ssse3(char* out, const uint8_t* buf, size_t bufLen) {
+          const __m128i lut = _mm_loadu_si128(reinterpret_cast<const __m128i*>(to_base16));
+          const __m128i mask = _mm_set1_epi8(0x0f);
+          size_t i = 0;
+          for (; i + 16 <= bufLen; i += 16, out += 32) {
+             const __m128i v = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i));
+             const __m128i high = _mm_shuffle_epi8(lut, _mm_and_si128(_mm_srli_epi16(v, 4), mask));
+             const __m128i low = _mm_shuffle_epi8(lut, _mm_and_si128(v, mask));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), _mm_unpacklo_epi8(high, low));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out + 16), _mm_unpackhi_epi8(high, low));
+          }
+          return i;
+       }
+
+       // Hex digits -> nibble values; invalid characters become 0 and are
+       // flagged in error
+       B2T_TARGET("ssse3")
+       inline __m128i base16_dec_values(__m128i c, __m128i& error) {
+          const __m128i digit_value = _mm_sub_epi8(c, _mm_set1_epi8('0'));
+          const __m128i letter_value = _mm_sub_epi8(_mm_or_si128(c, _mm_set1_epi8(0x20)), _mm_set1_epi8('a'));
+          // Unsigned x <= k is min(x, k) == x
+          const __m128i digit = _mm_cmpeq_epi8(_mm_min_epu8(digit_value, _mm_set1_epi8(9)), digit_value);
+          const __m128i letter = _mm_cmpeq_epi8(_mm_min_epu8(letter_value, _mm_set1_epi8(5)), letter_value);
+          error = _mm_or_si128(error, _mm_cmpeq_epi8(_mm_or_si128(digit, letter), _mm_setzero_si128()));
+          return _mm_or_si128(_mm_and_si128(digit, digit_value),
+                              _mm_and_si128(letter, _mm_add_epi8(letter_value, _mm_set1_epi8(10))));
+       }
+
+       // 32 hex digits -> 16 bytes; maddubs computes high * 16 + low per pair
+       B2T_TARGET("ssse3")
+       inline size_t base16_decode_blocks_ssse3(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          const __m128i weights = _mm_set1_epi16(0x0110);
+          __m128i err = _mm_setzero_si128();
+          size_t i = 0;
+          for (; i + 32 <= inLen; i += 32, out += 16) {
+             const __m128i a = base16_dec_values(_mm_loadu_si128(reinterpret_cast<const __m128i*>(in + i)), err);
+             const __m128i b = base16_dec_values(_mm_loadu_si128(reinterpret_cast<const __m128i*>(in + i + 16)), err);
+             const __m128i bytes = _mm_packus_epi16(_mm_maddubs_epi16(a, weights), _mm_maddubs_epi16(b, weights));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), bytes);
+          }
+          if (_mm_movemask_epi8(err) != 0)
+             *error |= 0x80;
+          return i;
+       }
+
+       // AVX2 versions of the above; unpack and pack work per 128-bit lane,
+       // so lanes are put back in order with a permute
+       B2T_TARGET("avx2")
+       inline size_t base16_encode_blocks_avx2(char* out, const uint8_t* buf, size_t bufLen) {
+          const __m256i lut = _mm256_broadcastsi128_si256(_mm_loadu_si128(reinterpret_cast<const __m128i*>(to_base16)));
+          const __m256i mask = _mm256_set1_epi8(0x0f);
+          size_t i = 0;
+          for (; i + 32 <= bufLen; i += 32, out += 64) {
+             const __m256i v = _mm256_loadu_si256(reinterpret_cast<const __m256i*>(buf + i));
+             const __m256i high = _mm256_shuffle_epi8(lut, _mm256_and_si256(_mm256_srli_epi16(v, 4), mask));
+             const __m256i low = _mm256_shuffle_epi8(lut, _mm256_and_si256(v, mask));
+             const __m256i lo = _mm256_unpacklo_epi8(high, low);
+             const __m256i hi = _mm256_unpackhi_epi8(high, low);
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), _mm256_permute2x128_si256(lo, hi, 0x20));
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out + 32), _mm256_permute2x128_si256(lo, hi, 0x31));
+          }
+          return i;
+       }
+
+       B2T_TARGET("avx2")
+       inline __m256i base16_dec_values_avx2(__m256i c, __m256i& error) {
+          const __m256i digit_value = _mm256_sub_epi8(c, _mm256_set1_epi8('0'));
+          const __m256i letter_value = _mm256_sub_epi8(_mm256_or_si256(c, _mm256_set1_epi8(0x20)), _mm256_set1_epi8('a'));
+          const __m256i digit = _mm256_cmpeq_epi8(_mm256_min_epu8(digit_value, _mm256_set1_epi8(9)), digit_value);
+          const __m256i letter = _mm256_cmpeq_epi8(_mm256_min_epu8(letter_value, _mm256_set1_epi8(5)), letter_value);
+          error = _mm256_or_si256(error, _mm256_cmpeq_epi8(_mm256_or_si256(digit, letter), _mm256_setzero_si256()));
+          return _mm256_or_si256(_mm256_and_si256(digit, digit_value),
+                                 _mm256_and_si256(letter, _mm256_add_epi8(letter_value, _mm256_set1_epi8(10))));
+       }
+
+       B2T_TARGET("avx2")
+       inline size_t base16_decode_blocks_avx2(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          const __m256i weights = _mm256_set1_epi16(0x0110);
+          __m256i err = _mm256_setzero_si256();
+          size_t i = 0;
+          for (; i + 64 <= inLen; i += 64, out += 32) {
+             const __m256i a = base16_dec_values_avx2(_mm256_loadu_si256(reinterpret_cast<const __m256i*>(in + i)), err);
+             const __m256i b = base16_dec_values_avx2(_mm256_loadu_si256(reinterpret_cast<const __m256i*>(in + i + 32)), err);
+             const __m256i bytes = _mm256_packus_epi16(_mm256_maddubs_epi16(a, weights), _mm256_maddubs_epi16(b, weights));
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), _mm256_permute4x64_epi64(bytes, 0xd8));
+          }
+          if (_mm256_movemask_epi8(err) != 0)
+             *error |= 0x80;
+          return i;
+       }
+#endif // B2T_X86
+
+#if defined(B2T_NEON)
+       // vst2/vld2 interleave and de-interleave the high and low digits for us
+       inline size_t base16_encode_blocks_neon(char* out, const uint8_t* buf, size_t bufLen) {
+          const uint8x16_t lut = vld1q_u8(reinterpret_cast<const uint8_t*>(to_base16));
+          size_t i = 0;
+          for (; i + 16 <= bufLen; i += 16, out += 32) {
+             const uint8x16_t v = vld1q_u8(buf + i);
+             uint8x16x2_t digits;
+             digits.val[0] = vqtbl1q_u8(lut, vshrq_n_u8(v, 4));
+             digits.val[1] = vqtbl1q_u8(lut, vandq_u8(v, vdupq_n_u8(0x0f)));
+             vst2q_u8(reinterpret_cast<uint8_t*>(out), digits);
+          }
+          return i;
+       }
+
+       inline uint8x16_t base16_dec_values_neon(uint8x16_t c, uint8x16_t& error) {
+          const uint8x16_t digit_value = vsubq_u8(c, vdupq_n_u8('0'));
+          const uint8x16_t letter_value = vsubq_u8(vorrq_u8(c, vdupq_n_u8(0x20)), vdupq_n_u8('a'));
+          const uint8x16_t digit = vcleq_u8(digit_value, vdupq_n_u8(9));
+          const uint8x16_t letter = vcleq_u8(letter_value, vdupq_n_u8(5));
+          error = vorrq_u8(error, vmvnq_u8(vorrq_u8(digit, letter)));
+          return vorrq_u8(vandq_u8(digit, digit_value),
+                          vandq_u8(letter, vaddq_u8(letter_value, vdupq_n_u8(10))));
+       }
+
+       inline size_t base16_decode_blocks_neon(uint8_t* out, const uint8_t* in, size_t inLen, uint8_t* error) {
+          uint8x16_t err = vdupq_n_u8(0);
+          size_t i = 0;
+          for (; i + 32 <= inLen; i += 32, out += 16) {
+             const uint8x16x2_t chars = vld2q_u8(in + i);
+             const uint8x16_t high = base16_dec_values_neon(chars.val[0], err);
+             const uint8x16_t low = base16_dec_values_neon(chars.val[1], err);
+             vst1q_u8(out, vorrq_u8(vshlq_n_u8(high, 4), low));
+          }
+          if (vmaxvq_u8(err) != 0)
+             *error |= 0x80;
+          return i;
+       }
+#endif // B2T_NEON
+
+       struct base16_kernel {
+          simd_level level;
+          base16_encode_blocks_fn encode_blocks;
+          base16_decode_blocks_fn decode_blocks;
+       };
+
+       // Kernel for a given instruction set; levels this build or CPU cannot
+       // run fall back to the portable code
+       inline base16_kernel base16_kernel_for(simd_level level) {
+          base16_kernel k = { simd_scalar, base16_encode_blocks_scalar, base16_decode_blocks_scalar };
+#if defined(B2T_X86)
+          if (level >= simd_avx2 && cpu_simd_level() >= simd_avx2) {
+             k.level = simd_avx2;
+             k.encode_blocks = base16_encode_blocks_avx2;
+             k.decode_blocks = base16_decode_blocks_avx2;
+          } else if (level >= simd_ssse3 && cpu_simd_level() >= simd_ssse3) {
+             k.level = simd_ssse3;
+             k.encode_blocks = base16_encode_blocks_ssse3;
+             k.decode_blocks = base16_decode_blocks_ssse3;
+          }
+#elif defined(B2T_NEON)
+          if (level >= simd_neon) {
+             k.level = simd_neon;
+             k.encode_blocks = base16_encode_blocks_neon;
+             k.decode_blocks = base16_decode_blocks_neon;
+          }
+#else
+          (void)level;
+#endif
+          return k;
+       }
+
+       // Picked once per process from the CPU's features
+       inline const base16_kernel& base16_active_kernel() {
+          static const base16_kernel k = base16_kernel_for(cpu_simd_level());
+          return k;
+       }
+
+    } // namespace detail
+
+    inline const char* base16_kernel_name() {
+       return simd_level_name(detail::base16_active_kernel().level);
     }
 
     inline void base16_encode(std::string & out, std::string const& buf) {
@@ -44,50 +304,112 @@ namespace b2t {
           base16_encode(out, &buf[0], buf.size());
     }
 
-    inline void base16_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
-       if (!buf) {
-          ret.clear();
-          return;
-       }
+    inline size_t base16_encoded_length(size_t bufLen) {
+       return bufLen * 2; // Each byte becomes 2 hex characters
+    }
 
-       ret.clear();
-       ret.reserve(bufLen * 2); // Each byte becomes 2 hex characters
+    inline size_t base16_max_decoded_length(size_t inLen) {
+       return (inLen + 1) / 2; // Each 2 hex chars become 1 byte
+    }
 
-       for (size_t i = 0; i < bufLen; ++i) {
-          ret.push_back(to_base16[(buf[i] >> 4) & 0x0F]);
-          ret.push_back(to_base16[buf[i] & 0x0F]);
+    namespace detail {
+       inline size_t base16_encode_into_with(const base16_kernel& k, char* out,
+                                             uint8_t const* buf, size_t bufLen) {
+          const size_t i = k.encode_blocks(out, buf, bufLen);
+          base16_encode_blocks_scalar(out + 2*i, buf + i, bufLen - i);
+          return bufLen * 2;
        }
-    }
+    } // namespace detail
 
+    // Writes exactly base16_encoded_length(bufLen) characters to out
+    inline size_t base16_encode_into(char* out, uint8_t const* buf, size_t bufLen) {
+       return detail::base16_encode_into_with(detail::base16_active_kernel(), out, buf, bufLen);
+    }
 
-    template <class Out>
-    inline void base16_decode_any( Out & ret, std::string const& in) {
-        typedef typename Out::value_type T;
+    inline void base16_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
+       ret.resize(base16_encoded_length(bufLen));
+       if (!ret.empty())
+          base16_encode_into(&ret[0], buf, bufLen);
+    }
 
-       ret.clear();
-       ret.reserve(in.size() / 2); // Each 2 hex chars become 1 byte
 
-       for (size_t i = 0; i < in.size(); i += 2) {
-          if (i + 1 < in.size()) {
-             uint8_t high = hex_char_to_value(in[i]);
-             uint8_t low = hex_char_to_value(in[i + 1]);
-             ret.push_back(static_cast<T>((high << 4) | low));
-          } else if (i < in.size()) {
+    namespace detail {
+       // Invalid characters decode as zero nibbles; bit 0x80 of error is set
+       // if there were any
+       inline size_t base16_decode_into_with(const base16_kernel& k, uint8_t* out,
+                                             const char* in, size_t N, uint8_t& error) {
+          const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+          size_t i = k.decode_blocks(out, u, N, &error);
+          i += base16_decode_blocks_scalar(out + i / 2, u + i, N - i, &error);
+          size_t n = i / 2;
+          if (i < N) {
              // Odd number of characters - treat as if padded with 0
-             uint8_t high = hex_char_to_value(in[i]);
-             ret.push_back(static_cast<T>((high << 4)));
+             const uint8_t high = from_base16[u[i]];
+             error |= high & 0x80;
+             out[n++] = static_cast<uint8_t>((high & 0x0f) << 4);
           }
+          return n;
        }
+    } // namespace detail
+
+    inline size_t base16_find_invalid(const char* in, size_t N) {
+       const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+       size_t i = 0;
+       while (i < N && !(from_base16[u[i]] & 0x80))
+          ++i;
+       return i;
+    }
+
+    // Writes exactly base16_max_decoded_length(inLen) bytes to out
+    inline size_t base16_decode_into(uint8_t* out, const char* in, size_t N) {
+       uint8_t error = 0;
+       return detail::base16_decode_into_with(detail::base16_active_kernel(), out, in, N, error);
+    }
+
+    // Same as above, and stores in *invalid_at the offset of the first
+    // character that is not a hex digit, or inLen if there is none. The
+    // offset is only searched for when the kernel saw an invalid character.
+    // The last character of odd-length input is invalid as well: it is half
+    // a byte, which no encoder writes.
+    inline size_t base16_decode_into(uint8_t* out, const char* in, size_t N, size_t* invalid_at) {
+       uint8_t error = 0;
+       const size_t n = detail::base16_decode_into_with(detail::base16_active_kernel(), out, in, N, error);
+       *invalid_at = (error & 0x80) ? base16_find_invalid(in, N) : N;
+       if (*invalid_at == N && N % 2)
+          *invalid_at = N - 1;
+       return n;
+    }
+
+
+    template <class Out>
+    inline void base16_decode_any( Out & ret, const char* in, size_t N) {
+       ret.resize(base16_max_decoded_length(N));
+       if (ret.empty())
+          return;
+       ret.resize(base16_decode_into(reinterpret_cast<uint8_t*>(&ret[0]), in, N));
+    }
+
+    template <class Out>
+    inline void base16_decode_any( Out & ret, std::string const& in) {
+       base16_decode_any(ret, in.data(), in.size());
     }
 
     inline void base16_decode(std::vector<uint8_t> & out, std::string const& encoded_string) {
        base16_decode_any(out, encoded_string);
     }
 
+    inline void base16_decode(std::vector<uint8_t> & out, const char* in, size_t inLen) {
+       base16_decode_any(out, in, inLen);
+    }
+
     inline void base16_decode(std::string & out, std::string const& encoded_string) {
        base16_decode_any(out, encoded_string);
     }
 
+    inline void base16_decode(std::string & out, const char* in, size_t inLen) {
+       base16_decode_any(out, in, inLen);
+    }
+
 } // namespace b2t
 
 
@@ -5,6 +5,7 @@
 #include <string>
 #include <vector>
 #include <cstdint>
+#include <cstring>
 
 namespace b2t {
 
@@ -13,26 +14,39 @@ namespace b2t {
     void base32_encode(std::string & out, const std::vector<uint8_t>& buf);
     void base32_encode(std::string & out, const uint8_t* buf, size_t bufLen);
     void base32_encode(std::string & out, std::string const& buf);
+    size_t base32_encode_into(char* out, const uint8_t* buf, size_t bufLen);
 
     void base32_decode(std::vector<uint8_t> & out, std::string const& encoded_string);
+    void base32_decode(std::vector<uint8_t> & out, const char* in, size_t inLen);
     void base32_decode(std::string & out, std::string const& encoded_string);
+    void base32_decode(std::string & out, const char* in, size_t inLen);
+    size_t base32_decode_into(uint8_t* out, const char* in, size_t inLen);
+    size_t base32_decode_into(uint8_t* out, const char* in, size_t inLen, size_t* invalid_at);
+
+    // Output sizes: exact for encoding, an upper bound for decoding
+    size_t base32_encoded_length(size_t bufLen);
+    size_t base32_max_decoded_length(size_t inLen);
+
+    // Alphabet variants: the standard and "extended hex" alphabets of
+    // RFC 4648 (sections 6 and 7), Crockford's Base32, or any 32 distinct
+    // printable ASCII characters, padded with '=' (or another printable
+    // character) or, with pad '\0', not at all
+    struct base32_alphabet;
+    bool base32_make_alphabet(base32_alphabet& a, const char* chars, char pad);
+    const base32_alphabet& base32_standard_alphabet();
+    const base32_alphabet& base32_hex_alphabet();
+    const base32_alphabet& base32_crockford_alphabet();
+
+    size_t base32_encode_into(const base32_alphabet& a, char* out, const uint8_t* buf, size_t bufLen);
+    size_t base32_decode_into(const base32_alphabet& a, uint8_t* out, const char* in, size_t inLen);
+    size_t base32_decode_into(const base32_alphabet& a, uint8_t* out, const char* in, size_t inLen,
+                              size_t* invalid_at);
+    size_t base32_encoded_length(const base32_alphabet& a, size_t bufLen);
 
     // Implementation
     namespace {
-        static const uint8_t from_base32[128] = {
-            // 8 rows of 16 = 128
-            0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF,
-            0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF,
-            0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF,
-            0xFF, 0xFF, 0xFF, 0xFF, 0x1A, 0x1B, 0x1C, 0x1D, 0x1E, 0x1F, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, // 20-2F (' ' to '/')
-            0xFF, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, // 30-3F ('0' to '?')
-            0x0F, 0x10, 0x11, 0x12, 0x13, 0x14, 0x15, 0x16, 0x17, 0x18, 0x19, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, // 40-4F ('@' to 'O')
-            0xFF, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, // 50-5F ('P' to '_') - Upper case letters
-            0x0F, 0x10, 0x11, 0x12, 0x13, 0x14, 0x15, 0x16, 0x17, 0x18, 0x19, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF  // 60-6F ('`' to 'o') - Lower case letters
-        };
-
         static const char to_base32[33] =
-            "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567=";
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567";
     }
 
     inline void base32_encode(std::string & out, std::string const& buf) {
@@ -50,129 +64,299 @@ namespace b2t {
           base32_encode(out, &buf[0], buf.size());
     }
 
+    inline size_t base32_encoded_length(size_t bufLen) {
+       return 8 * ((bufLen + 4) / 5);
+    }
+
+    inline size_t base32_max_decoded_length(size_t inLen) {
+       return 5 * ((inLen + 7) / 8);
+    }
+
+    namespace detail {
+
+       // Five bytes, big-endian, as the low 40 bits of a word
+       inline uint64_t base32_load40(const uint8_t* p) {
+          return (uint64_t(p[0]) << 32) | (uint64_t(p[1]) << 24) | (uint64_t(p[2]) << 16) |
+                 (uint64_t(p[3]) << 8) | uint64_t(p[4]);
+       }
+
+       inline void base32_encode_group(char* out, const char* pairs, uint64_t bits) {
+          std::memcpy(out, pairs + 2 * ((bits >> 30) & 0x3FF), 2);
+          std::memcpy(out + 2, pairs + 2 * ((bits >> 20) & 0x3FF), 2);
+          std::memcpy(out + 4, pairs + 2 * ((bits >> 10) & 0x3FF), 2);
+          std::memcpy(out + 6, pairs + 2 * (bits & 0x3FF), 2);
+       }
+
+       inline void base32_store40(uint8_t* out, uint64_t bits) {
+          out[0] = static_cast<uint8_t>(bits >> 32);
+          out[1] = static_cast<uint8_t>(bits >> 24);
+          out[2] = static_cast<uint8_t>(bits >> 16);
+          out[3] = static_cast<uint8_t>(bits >> 8);
+          out[4] = static_cast<uint8_t>(bits);
+       }
+
+    } // namespace detail
+
+    // An alphabet with the tables its encoder and decoder need, built once
+    // from it
+    struct base32_alphabet {
+       char chars[32];
+       uint8_t values[256]; // Character -> 5 bit value; anything outside the alphabet
+                            // (padding included) is 0x80, so OR-ing a group's
+                            // values and testing the high bit validates all of it
+       char pairs[2 * 1024]; // Every 10 bit value as its two characters, so a
+                             // group of 8 characters takes four lookups
+       char pad;             // '\0' for none
+    };
+
+    // Letters of the other case decode like the letter in the alphabet,
+    // unless the alphabet has both
+    inline bool base32_make_alphabet(base32_alphabet& a, const char* chars, char pad) {
+       std::memset(a.values, 0x80, sizeof a.values);
+       for (size_t k = 0; k < 32; ++k) {
+          const uint8_t c = static_cast<uint8_t>(chars[k]);
+          if (c <= ' ' || c >= 0x7f || a.values[c] != 0x80)
+             return false;
+          a.chars[k] = chars[k];
+          a.values[c] = static_cast<uint8_t>(k);
+       }
+       for (size_t k = 0; k < 32; ++k) {
+          const uint8_t c = static_cast<uint8_t>(chars[k]);
+          const uint8_t other = (c >= 'A' && c <= 'Z') ? c + 32 : (c >= 'a' && c <= 'z') ? c - 32 : c;
+          if (a.values[other] == 0x80)
+             a.values[other] = static_cast<uint8_t>(k);
+       }
+       const uint8_t p = static_cast<uint8_t>(pad);
+       if (p && (p <= ' ' || p >= 0x7f || a.values[p] != 0x80))
+          return false;
+       a.pad = pad;
+       for (size_t v = 0; v < 1024; ++v) {
+          a.pairs[2 * v] = a.chars[v >> 5];
+          a.pairs[2 * v + 1] = a.chars[v & 0x1F];
+       }
+       return true;
+    }
+
+    namespace detail {
+       struct base32_named_alphabet : base32_alphabet {
+          base32_named_alphabet(const char* chars, char pad) {
+             base32_make_alphabet(*this, chars, pad);
+          }
+       };
+    } // namespace detail
+
+    inline const base32_alphabet& base32_standard_alphabet() {
+       static const detail::base32_named_alphabet a(to_base32, '=');
+       return a;
+    }
+
+    inline const base32_alphabet& base32_hex_alphabet() {
+       static const detail::base32_named_alphabet a("0123456789ABCDEFGHIJKLMNOPQRSTUV", '=');
+       return a;
+    }
+
+    // Unpadded, and O and I/L (either case) decode as 0 and 1
+    inline const base32_alphabet& base32_crockford_alphabet() {
+       struct crockford : detail::base32_named_alphabet {
+          crockford() : detail::base32_named_alphabet("0123456789ABCDEFGHJKMNPQRSTVWXYZ", '\0') {
+             values[static_cast<uint8_t>('O')] = values[static_cast<uint8_t>('o')] = 0;
+             values[static_cast<uint8_t>('I')] = values[static_cast<uint8_t>('i')] = 1;
+             values[static_cast<uint8_t>('L')] = values[static_cast<uint8_t>('l')] = 1;
+          }
+       };
+       static const crockford a;
+       return a;
+    }
+
+    // Unpadded output leaves out the padding of the last group
+    inline size_t base32_encoded_length(const base32_alphabet& a, size_t bufLen) {
+       return a.pad ? base32_encoded_length(bufLen) : (8 * bufLen + 4) / 5;
+    }
+
+    // Writes exactly base32_encoded_length(a, bufLen) characters to out
+    inline size_t base32_encode_into(const base32_alphabet& a, char* out, uint8_t const* buf, size_t bufLen) {
+       const char* pairs = a.pairs;
+       size_t idx = 0, n = 0;
+       for (; idx + 5 <= bufLen; idx += 5, n += 8)
+          detail::base32_encode_group(out + n, pairs, detail::base32_load40(buf + idx));
+
+       if (idx < bufLen) {
+          // Last partial group: missing bytes are 0, and 1, 2, 3 or 4 bytes
+          // need 2, 4, 5 or 7 characters, the rest is padding
+          uint8_t last[5] = { 0, 0, 0, 0, 0 };
+          char group[8];
+          const size_t c = bufLen - idx;
+          for (size_t k = 0; k < c; ++k)
+             last[k] = buf[idx + k];
+          detail::base32_encode_group(group, pairs, detail::base32_load40(last));
+          const size_t used = (c * 8 + 4) / 5;
+          std::memcpy(out + n, group, used);
+          n += used;
+          if (a.pad) {
+             for (size_t k = used; k < 8; ++k)
+                out[n++] = a.pad;
+          }
+       }
+       return n;
+    }
+
+    // Writes exactly base32_encoded_length(bufLen) characters to out
+    inline size_t base32_encode_into(char* out, uint8_t const* buf, size_t bufLen) {
+       return base32_encode_into(base32_standard_alphabet(), out, buf, bufLen);
+    }
+
     inline void base32_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
-       if (!buf) {
-          ret.clear();
-          return;
+       ret.resize(base32_encoded_length(bufLen));
+       if (!ret.empty())
+          base32_encode_into(&ret[0], buf, bufLen);
+    }
+
+
+    namespace detail {
+
+       // suspect is set to the offset of the first group that holds padding
+       // or invalid characters, or N if none does
+       inline size_t base32_decode_into_with(const base32_alphabet& a, uint8_t* out, const char* in, size_t N,
+                                             size_t& suspect) {
+          const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+          const uint8_t* values = a.values;
+          // Unpadded alphabets still stop at '=' unless it is one of their characters
+          const uint8_t stop = static_cast<uint8_t>(a.pad ? a.pad : '=');
+          size_t idx = 0, n = 0;
+          suspect = N;
+
+          for (; idx < N; idx += 8) {
+             if (idx + 8 <= N) {
+                // A whole group of alphabet characters, validated with one check
+                const uint8_t* g = u + idx;
+                const uint8_t v0 = values[g[0]], v1 = values[g[1]],
+                              v2 = values[g[2]], v3 = values[g[3]],
+                              v4 = values[g[4]], v5 = values[g[5]],
+                              v6 = values[g[6]], v7 = values[g[7]];
+                if (!((v0 | v1 | v2 | v3 | v4 | v5 | v6 | v7) & 0x80)) {
+                   base32_store40(out + n,
+                      (uint64_t(v0) << 35) | (uint64_t(v1) << 30) | (uint64_t(v2) << 25) | (uint64_t(v3) << 20) |
+                      (uint64_t(v4) << 15) | (uint64_t(v5) << 10) | (uint64_t(v6) << 5) | uint64_t(v7));
+                   n += 5;
+                   continue;
+                }
+             }
+
+             // Padding, invalid characters or the partial group at the end:
+             // collect up to 8 characters, stopping at padding or the end of input
+             if (suspect == N)
+                suspect = idx;
+             uint64_t bits = 0;
+             size_t c = 0;
+             for (; c < 8 && idx + c < N && (u[idx + c] != stop || !(values[stop] & 0x80)); ++c)
+                bits = (bits << 5) | (values[u[idx + c]] & 0x1F); // Invalid characters are zero bits
+             bits <<= 5 * (8 - c);
+
+             // 2, 4, 5, 7 or 8 characters carry 1, 2, 3, 4 or 5 whole bytes
+             const size_t bytes = c * 5 / 8;
+             for (size_t k = 0; k < bytes; ++k)
+                out[n++] = static_cast<uint8_t>(bits >> (32 - 8 * k));
+
+             if (c < 8) break;
+          }
+          return n;
        }
 
-       ret.clear();
-       ret.reserve(((bufLen + 4) / 5) * 8); // Reserve enough space
-
-       size_t idx = 0;
-       size_t c;
-       uint8_t tmp;
-       while (idx < bufLen) {
-           c = (bufLen - idx < 5) ? bufLen - idx : 5;
-
-           // Encode 5 bytes at a time
-           switch (c) {
-           case 5:
-               tmp = (buf[idx + 4] & 0x1F);
-               ret.push_back(to_base32[tmp]);
-               tmp = ((buf[idx + 3] & 0x03) << 3) | ((buf[idx + 4] & 0xE0) >> 5);
-               ret.push_back(to_base32[tmp]);
-               // fallthrough
-           case 4:
-               tmp = ((buf[idx + 2] & 0x0F) << 1) | ((buf[idx + 3] & 0x80) >> 7);
-               ret.push_back(to_base32[tmp]);
-               tmp = ((buf[idx + 3] & 0x7C) >> 2);
-               ret.push_back(to_base32[tmp]);
-               // fallthrough
-           case 3:
-               tmp = (buf[idx + 2] & 0x07) << 3 | ((buf[idx + 1] & 0xE0) >> 5);
-               ret.push_back(to_base32[tmp]);
-               tmp = ((buf[idx + 0] & 0x1F) << 1) | ((buf[idx + 1] & 0x80) >> 7);
-               ret.push_back(to_base32[tmp]);
-               // fallthrough
-           case 2:
-               tmp = ((buf[idx + 1] & 0x7C) >> 2);
-               ret.push_back(to_base32[tmp]);
-               tmp = ((buf[idx + 0] & 0x03) << 3) | ((buf[idx + 1] & 0x80) >> 5);
-               ret.push_back(to_base32[tmp]);
-               // fallthrough
-           case 1:
-               tmp = ((buf[idx + 0] & 0xF8) >> 3);
-               ret.push_back(to_base32[tmp]);
-               tmp = ((buf[idx + 0] & 0x07) << 2);
-               ret.push_back(to_base32[tmp]);
-           }
-
-           // Add padding if needed
-           switch (c) {
-           case 1:
-               ret.append(6, '=');
-               break;
-           case 2:
-               ret.append(4, '=');
-               break;
-           case 3:
-               ret.append(3, '=');
-               break;
-           case 4:
-               ret.append(1, '=');
-               break;
-           }
-
-           idx += c;
+    } // namespace detail
+
+    // Offset of the first character that makes in[0, N) invalid strict
+    // Base32 in alphabet a, or N if there is none. Letters may be either
+    // case (unless the alphabet has both); the padding character is only
+    // valid where it follows 2, 4, 5 or 7 characters of the final group and
+    // completes it. Unpadded input must end the same way: a last group of
+    // 1, 3 or 6 characters holds bits of no whole byte. The scan starts at
+    // `from`, which must be a multiple of 8 with everything before it known
+    // to be valid.
+    inline size_t base32_find_invalid(const base32_alphabet& a, const char* in, size_t N, size_t from = 0) {
+       const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+       for (size_t i = from; i < N; ++i) {
+          if (!(a.values[u[i]] & 0x80))
+             continue;
+          const size_t pos = i % 8;
+          if (!a.pad || in[i] != a.pad || !(pos == 2 || pos == 4 || pos == 5 || pos == 7))
+             return i;
+          // Padding runs to the end of its group and ends the input
+          const size_t group_end = i - pos + 8;
+          if (group_end > N)
+             return i;
+          for (size_t j = i; j < group_end; ++j)
+             if (in[j] != a.pad)
+                return j;
+          return group_end < N ? group_end : N;
        }
+       const size_t rest = N % 8;
+       return (rest == 1 || rest == 3 || rest == 6) ? N - 1 : N;
+    }
+
+    // Same for the standard alphabet
+    inline size_t base32_find_invalid(const char* in, size_t N, size_t from = 0) {
+       return base32_find_invalid(base32_standard_alphabet(), in, N, from);
     }
 
+    // Writes at most base32_max_decoded_length(inLen) bytes to out and
+    // returns the number actually written
+    inline size_t base32_decode_into(uint8_t* out, const char* in, size_t N) {
+       size_t suspect;
+       return detail::base32_decode_into_with(base32_standard_alphabet(), out, in, N, suspect);
+    }
+
+    // Same as above, and stores in *invalid_at the offset of the first
+    // character that is not valid strict Base32 (see base32_find_invalid),
+    // or inLen if there is none. Whole groups are validated while they are
+    // decoded; only the groups that failed that check are looked at again.
+    inline size_t base32_decode_into(uint8_t* out, const char* in, size_t N, size_t* invalid_at) {
+       return base32_decode_into(base32_standard_alphabet(), out, in, N, invalid_at);
+    }
+
+    // The same two for alphabet a
+    inline size_t base32_decode_into(const base32_alphabet& a, uint8_t* out, const char* in, size_t N) {
+       size_t suspect;
+       return detail::base32_decode_into_with(a, out, in, N, suspect);
+    }
+
+    inline size_t base32_decode_into(const base32_alphabet& a, uint8_t* out, const char* in, size_t N,
+                                     size_t* invalid_at) {
+       size_t suspect;
+       const size_t n = detail::base32_decode_into_with(a, out, in, N, suspect);
+       *invalid_at = base32_find_invalid(a, in, N, suspect);
+       return n;
+    }
+
+
+    template <class Out>
+    inline void base32_decode_any( Out & ret, const char* in, size_t N) {
+       ret.resize(base32_max_decoded_length(N));
+       if (ret.empty())
+          return;
+       ret.resize(base32_decode_into(reinterpret_cast<uint8_t*>(&ret[0]), in, N));
+    }
 
     template <class Out>
     inline void base32_decode_any( Out & ret, std::string const& in) {
-        typedef typename Out::value_type T;
-
-       ret.clear();
-       ret.reserve(in.size() * 5 / 8); // Reserve estimated space
-
-       size_t idx = 0;
-       size_t c;
-       uint8_t tmp;
-       while (idx < in.size()) {
-           c = (in.size() - idx < 8) ? in.size() - idx : 8;
-
-           // Skip padding characters
-           if (in[idx] == '=') break;
-
-           // Decode 8 characters at a time (or fewer for the last group)
-           uint8_t b[8];
-           for (size_t i = 0; i < c; ++i) {
-               if (idx + i >= in.size() || in[idx + i] == '=') {
-                   b[i] = 0; // Padding character
-               } else {
-                   b[i] = (in[idx + i] > 122) ? 0xFF : from_base32[static_cast<uint8_t>(in[idx + i])];
-                   if (b[i] == 0xFF) b[i] = 0; // Invalid character, treat as padding
-               }
-           }
-
-           // Process the 8 base32 characters into 5 bytes
-           ret.push_back(static_cast<T>(((b[0] & 0x1F) << 3) | ((b[1] & 0x1C) >> 2)));
-           if (c > 2 && b[2] != 0x1F) { // Check if we have at least 2 more chars and not padding
-               ret.push_back(static_cast<T>(((b[1] & 0x03) << 6) | ((b[2] & 0x1F) << 1) | ((b[3] & 0x10) >> 4)));
-           }
-           if (c > 4 && b[4] != 0x1F) {
-               ret.push_back(static_cast<T>(((b[3] & 0x0F) << 4) | ((b[4] & 0x1E) >> 1)));
-           }
-           if (c > 5 && b[5] != 0x1F) {
-               ret.push_back(static_cast<T>(((b[4] & 0x01) << 7) | ((b[5] & 0x1F) << 2) | ((b[6] & 0x18) >> 3)));
-           }
-           if (c > 7 && b[7] != 0x1F) {
-               ret.push_back(static_cast<T>(((b[6] & 0x07) << 5) | (b[7] & 0x1F)));
-           }
-
-           idx += c;
-       }
+       base32_decode_any(ret, in.data(), in.size());
     }
 
     inline void base32_decode(std::vector<uint8_t> & out, std::string const& encoded_string) {
        base32_decode_any(out, encoded_string);
     }
 
+    inline void base32_decode(std::vector<uint8_t> & out, const char* in, size_t inLen) {
+       base32_decode_any(out, in, inLen);
+    }
+
     inline void base32_decode(std::string & out, std::string const& encoded_string) {
        base32_decode_any(out, encoded_string);
     }
 
+    inline void base32_decode(std::string & out, const char* in, size_t inLen) {
+       base32_decode_any(out, in, inLen);
+    }
+
 } // namespace b2t
 
 
@@ -5,6 +5,9 @@
 #include <string>
 #include <vector>
 #include <cstdint>
+#include <cstring>
+
+#include "simd.h"
 
 namespace b2t {
 
@@ -13,22 +16,52 @@ namespace b2t {
     void base64_encode(std::string & out, const std::vector<uint8_t>& buf);
     void base64_encode(std::string & out, const uint8_t* buf, size_t bufLen);
     void base64_encode(std::string & out, std::string const& buf);
+    size_t base64_encode_into(char* out, const uint8_t* buf, size_t bufLen);
 
     void base64_decode(std::vector<uint8_t> & out, std::string const& encoded_string);
+    void base64_decode(std::vector<uint8_t> & out, const char* in, size_t inLen);
     void base64_decode(std::string & out, std::string const& encoded_string);
+    void base64_decode(std::string & out, const char* in, size_t inLen);
+    size_t base64_decode_into(uint8_t* out, const char* in, size_t inLen);
+    size_t base64_decode_into(uint8_t* out, const char* in, size_t inLen, size_t* invalid_at);
+
+    // Output sizes: exact for encoding, an upper bound for decoding
+    size_t base64_encoded_length(size_t bufLen);
+    size_t base64_max_decoded_length(size_t inLen);
+
+    // Name of the kernel picked for this CPU ("avx2", "ssse3", "neon" or "scalar")
+    const char* base64_kernel_name();
+
+    // Alphabet variants. The standard and URL-safe alphabets (RFC 4648
+    // sections 4 and 5) are padded with '='; a custom alphabet is 64
+    // distinct printable ASCII characters with any other printable padding
+    // character, or '\0' for unpadded output.
+    struct base64_alphabet;
+    bool base64_make_alphabet(base64_alphabet& a, const char* chars, char pad);
+    const base64_alphabet& base64_standard_alphabet();
+    const base64_alphabet& base64_url_alphabet();
+
+    size_t base64_encode_into(const base64_alphabet& a, char* out, const uint8_t* buf, size_t bufLen);
+    size_t base64_decode_into(const base64_alphabet& a, uint8_t* out, const char* in, size_t inLen);
+    size_t base64_decode_into(const base64_alphabet& a, uint8_t* out, const char* in, size_t inLen,
+                              size_t* invalid_at);
+    size_t base64_encoded_length(const base64_alphabet& a, size_t bufLen);
 
     // Implementation
     namespace {
         static const uint8_t from_base64[128] = {
             // 8 rows of 16 = 128
             // Note: only requires 123 entries, as we only lookup for <= z , which z=122
+            // Characters the decoder accepts but that are not standard Base64
+            // ('-' and '_' from the URL-safe alphabet, '<') have bit 0x80 set
+            // on top of their value; 255 marks everything else, '=' included.
 
             255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255,
             255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255,
-            255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255,  62, 255,  62, 255,  63,
-             52,  53,  54,  55,  56,  57,  58,  59,  60,  61, 255, 255,   0, 255, 255, 255,
+            255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255,  62, 255, 190, 255,  63,
+             52,  53,  54,  55,  56,  57,  58,  59,  60,  61, 255, 255, 128, 255, 255, 255,
             255,   0,   1,   2,   3,   4,   5,   6,   7,   8,   9,  10,  11,  12,  13,  14,
-             15,  16,  17,  18,  19,  20,  21,  22,  23,  24,  25, 255, 255, 255, 255,  63,
+             15,  16,  17,  18,  19,  20,  21,  22,  23,  24,  25, 255, 255, 255, 255, 191,
             255,  26,  27,  28,  29,  30,  31,  32,  33,  34,  35,  36,  37,  38,  39,  40,
              41,  42,  43,  44,  45,  46,  47,  48,  49,  50,  51, 255, 255, 255, 255, 255
         };
@@ -39,6 +72,510 @@ namespace b2t {
             "0123456789+/";
     }
 
+    // An alphabet with the table its decoders need, built once from it
+    struct base64_alphabet {
+       char chars[64];
+       uint8_t values[256]; // As from_base64: 0xff outside the alphabet, 0x80 set for lenient extras
+       char pad;            // '\0' for none
+       bool standard;       // The standard characters, which the arithmetic kernels decode
+    };
+
+    inline bool base64_make_alphabet(base64_alphabet& a, const char* chars, char pad) {
+       std::memset(&a, 0, sizeof a);
+       std::memset(a.values, 0xff, sizeof a.values);
+       for (size_t k = 0; k < 64; ++k) {
+          const uint8_t c = static_cast<uint8_t>(chars[k]);
+          if (c <= ' ' || c >= 0x7f || a.values[c] != 0xff)
+             return false;
+          a.chars[k] = chars[k];
+          a.values[c] = static_cast<uint8_t>(k);
+       }
+       const uint8_t p = static_cast<uint8_t>(pad);
+       if (p && (p <= ' ' || p >= 0x7f || a.values[p] != 0xff))
+          return false;
+       a.pad = pad;
+       a.standard = std::memcmp(a.chars, to_base64, 64) == 0;
+       return true;
+    }
+
+    namespace detail {
+       // The standard and URL-safe alphabets each also accept the other's
+       // two extra characters when decoding leniently
+       struct base64_named_alphabet : base64_alphabet {
+          explicit base64_named_alphabet(bool url) {
+             base64_make_alphabet(*this, url ? "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+                                             : to_base64, '=');
+             for (size_t c = 0; c < 128; ++c)
+                values[c] = from_base64[c];
+             if (url) {
+                values[static_cast<uint8_t>('-')] = 62;
+                values[static_cast<uint8_t>('_')] = 63;
+                values[static_cast<uint8_t>('+')] = 0x80 | 62;
+                values[static_cast<uint8_t>('/')] = 0x80 | 63;
+             }
+          }
+       };
+    } // namespace detail
+
+    inline const base64_alphabet& base64_standard_alphabet() {
+       static const detail::base64_named_alphabet a(false);
+       return a;
+    }
+
+    inline const base64_alphabet& base64_url_alphabet() {
+       static const detail::base64_named_alphabet a(true);
+       return a;
+    }
+
+    namespace detail {
+
+       // Block kernels handle as many whole blocks as they can from the start of
+       // the input and return the number of input bytes consumed; the portable
+       // code finishes the rest. Encoders consume multiples of 3 bytes and emit
+       // 4 characters per 3 bytes. Decoders consume multiples of 4 characters,
+       // emit 3 bytes per 4 characters and stop early at the first block that is
+       // not plain Base64 (padding, whitespace, URL-safe or invalid characters),
+       // leaving it to the lenient scalar loop.
+       // The *_table kernels do the same for any other alphabet.
+       typedef size_t (*base64_encode_blocks_fn)(char* out, const uint8_t* buf, size_t bufLen);
+       typedef size_t (*base64_decode_blocks_fn)(uint8_t* out, const uint8_t* in, size_t inLen);
+       typedef size_t (*base64_encode_table_fn)(char* out, const uint8_t* buf, size_t bufLen,
+                                                const base64_alphabet& a);
+       typedef size_t (*base64_decode_table_fn)(uint8_t* out, const uint8_t* in, size_t inLen,
+                                                const base64_alphabet& a);
+
+       // Whole groups of three bytes, one character lookup at a time
+       inline size_t base64_encode_groups(char* out, const uint8_t* buf, size_t bufLen, const char* chars) {
+          size_t i = 0;
+          for (; i + 3 <= bufLen; i += 3) {
+             const uint32_t v = (static_cast<uint32_t>(buf[i+0]) << 16)
+                              | (static_cast<uint32_t>(buf[i+1]) << 8)
+                              |  static_cast<uint32_t>(buf[i+2]);
+             *out++ = chars[(v >> 18) & 0x3f];
+             *out++ = chars[(v >> 12) & 0x3f];
+             *out++ = chars[(v >>  6) & 0x3f];
+             *out++ = chars[ v        & 0x3f];
+          }
+          return i;
+       }
+
+       inline size_t base64_encode_blocks_scalar(char* out, const uint8_t* buf, size_t bufLen) {
+          return base64_encode_groups(out, buf, bufLen, to_base64);
+       }
+
+       inline size_t base64_decode_blocks_scalar(uint8_t*, const uint8_t*, size_t) {
+          return 0;
+       }
+
+       inline size_t base64_encode_table_scalar(char*, const uint8_t*, size_t, const base64_alphabet&) {
+          return 0;
+       }
+
+       inline size_t base64_decode_table_scalar(uint8_t*, const uint8_t*, size_t, const base64_alphabet&) {
+          return 0;
+       }
+
+#if defined(B2T_X86)
+       // SSSE3/AVX2 kernels after W. Mula and D. Lemire, "Faster Base64 Encoding
+       // and Decoding using AVX2 Instructions" (2018).
+
+       // 12 input bytes (in the low 3/4 of each lane) -> 16 6-bit indices
+       B2T_TARGET("ssse3")
+       inline __m128i base64_enc_reshuffle(__m128i in) {
+          in = _mm_shuffle_epi8(in, _mm_setr_epi8(1, 0, 2, 1, 4, 3, 5, 4, 7, 6, 8, 7, 10, 9, 11, 10));
+          const __m128i t0 = _mm_and_si128(in, _mm_set1_epi32(0x0fc0fc00));
+          const __m128i t1 = _mm_mulhi_epu16(t0, _mm_set1_epi32(0x04000040));
+          const __m128i t2 = _mm_and_si128(in, _mm_set1_epi32(0x003f03f0));
+          const __m128i t3 = _mm_mullo_epi16(t2, _mm_set1_epi32(0x01000010));
+          return _mm_or_si128(t1, t3);
+       }
+
+       // 6-bit indices -> ASCII by adding a per-range offset
+       B2T_TARGET("ssse3")
+       inline __m128i base64_enc_translate(__m128i in) {
+          const __m128i lut = _mm_setr_epi8(65, 71, -4, -4, -4, -4, -4, -4, -4, -4, -4, -4, -19, -16, 0, 0);
+          __m128i indices = _mm_subs_epu8(in, _mm_set1_epi8(51));
+          const __m128i mask = _mm_cmpgt_epi8(in, _mm_set1_epi8(25));
+          indices = _mm_sub_epi8(indices, mask);
+          return _mm_add_epi8(in, _mm_shuffle_epi8(lut, indices));
+       }
+
+       B2T_TARGET("ssse3")
+       inline size_t base64_encode_blocks_ssse3(char* out, const uint8_t* buf, size_t bufLen) {
+          size_t i = 0;
+          // Each step loads 16 bytes and encodes the first 12 of them
+          for (; i + 16 <= bufLen; i += 12, out += 16) {
+             __m128i v = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i));
+             v = base64_enc_translate(base64_enc_reshuffle(v));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), v);
+          }
+          return i;
+       }
+
+       // Returns nonzero when some byte of in is not in [A-Za-z0-9+/]
+       B2T_TARGET("ssse3")
+       inline __m128i base64_dec_translate(__m128i in, int& invalid) {
+          const __m128i lut_lo = _mm_setr_epi8(0x15, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11,
+                                               0x11, 0x11, 0x13, 0x1A, 0x1B, 0x1B, 0x1B, 0x1A);
+          const __m128i lut_hi = _mm_setr_epi8(0x10, 0x10, 0x01, 0x02, 0x04, 0x08, 0x04, 0x08,
+                                               0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10);
+          const __m128i lut_roll = _mm_setr_epi8(0, 16, 19, 4, -65, -65, -71, -71,
+                                                 0, 0, 0, 0, 0, 0, 0, 0);
+          const __m128i mask_2f = _mm_set1_epi8(0x2f);
+
+          const __m128i hi_nibbles = _mm_and_si128(_mm_srli_epi32(in, 4), mask_2f);
+          const __m128i lo_nibbles = _mm_and_si128(in, mask_2f);
+          const __m128i hi = _mm_shuffle_epi8(lut_hi, hi_nibbles);
+          const __m128i lo = _mm_shuffle_epi8(lut_lo, lo_nibbles);
+          invalid = _mm_movemask_epi8(_mm_cmpgt_epi8(_mm_and_si128(lo, hi), _mm_setzero_si128()));
+
+          const __m128i eq_2f = _mm_cmpeq_epi8(in, mask_2f);
+          const __m128i roll = _mm_shuffle_epi8(lut_roll, _mm_add_epi8(eq_2f, hi_nibbles));
+          return _mm_add_epi8(in, roll);
+       }
+
+       // 16 6-bit values -> 12 bytes in the low 3/4 of the register
+       B2T_TARGET("ssse3")
+       inline __m128i base64_dec_reshuffle(__m128i in) {
+          const __m128i merged = _mm_maddubs_epi16(in, _mm_set1_epi32(0x01400140));
+          const __m128i out = _mm_madd_epi16(merged, _mm_set1_epi32(0x00011000));
+          return _mm_shuffle_epi8(out, _mm_setr_epi8(2, 1, 0, 6, 5, 4, 10, 9, 8, 14, 13, 12, -1, -1, -1, -1));
+       }
+
+       B2T_TARGET("ssse3")
+       inline size_t base64_decode_blocks_ssse3(uint8_t* out, const uint8_t* in, size_t inLen) {
+          size_t i = 0;
+          // Each step stores 16 bytes of which 12 are output; stopping 8
+          // characters early keeps the 4 scratch bytes inside the
+          // base64_max_decoded_length(inLen) output buffer.
+          for (; i + 24 <= inLen; i += 16, out += 12) {
+             int invalid;
+             __m128i v = _mm_loadu_si128(reinterpret_cast<const __m128i*>(in + i));
+             v = base64_dec_translate(v, invalid);
+             if (invalid)
+                break;
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), base64_dec_reshuffle(v));
+          }
+          return i;
+       }
+
+       // 24 input bytes (12 from each load, one per lane) -> 32 6-bit indices
+       B2T_TARGET("avx2")
+       inline __m256i base64_enc_reshuffle_avx2(const uint8_t* buf) {
+          const __m256i shuffle = _mm256_setr_epi8(1, 0, 2, 1, 4, 3, 5, 4, 7, 6, 8, 7, 10, 9, 11, 10,
+                                                   1, 0, 2, 1, 4, 3, 5, 4, 7, 6, 8, 7, 10, 9, 11, 10);
+          const __m128i lo = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf));
+          const __m128i hi = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + 12));
+          __m256i v = _mm256_inserti128_si256(_mm256_castsi128_si256(lo), hi, 1);
+
+          v = _mm256_shuffle_epi8(v, shuffle);
+          const __m256i t0 = _mm256_and_si256(v, _mm256_set1_epi32(0x0fc0fc00));
+          const __m256i t1 = _mm256_mulhi_epu16(t0, _mm256_set1_epi32(0x04000040));
+          const __m256i t2 = _mm256_and_si256(v, _mm256_set1_epi32(0x003f03f0));
+          const __m256i t3 = _mm256_mullo_epi16(t2, _mm256_set1_epi32(0x01000010));
+          return _mm256_or_si256(t1, t3);
+       }
+
+       // 32 6-bit values -> 24 bytes at the start of the register
+       B2T_TARGET("avx2")
+       inline __m256i base64_dec_reshuffle_avx2(__m256i v) {
+          const __m256i pack = _mm256_setr_epi8(2, 1, 0, 6, 5, 4, 10, 9, 8, 14, 13, 12, -1, -1, -1, -1,
+                                                2, 1, 0, 6, 5, 4, 10, 9, 8, 14, 13, 12, -1, -1, -1, -1);
+          v = _mm256_maddubs_epi16(v, _mm256_set1_epi32(0x01400140));
+          v = _mm256_madd_epi16(v, _mm256_set1_epi32(0x00011000));
+          v = _mm256_shuffle_epi8(v, pack);
+          return _mm256_permutevar8x32_epi32(v, _mm256_setr_epi32(0, 1, 2, 4, 5, 6, 7, 7));
+       }
+
+       B2T_TARGET("avx2")
+       inline size_t base64_encode_blocks_avx2(char* out, const uint8_t* buf, size_t bufLen) {
+          const __m256i lut = _mm256_setr_epi8(65, 71, -4, -4, -4, -4, -4, -4, -4, -4, -4, -4, -19, -16, 0, 0,
+                                               65, 71, -4, -4, -4, -4, -4, -4, -4, -4, -4, -4, -19, -16, 0, 0);
+          size_t i = 0;
+          // Each step encodes 24 bytes, 12 per lane, from two loads of 16
+          for (; i + 28 <= bufLen; i += 24, out += 32) {
+             __m256i v = base64_enc_reshuffle_avx2(buf + i);
+
+             __m256i indices = _mm256_subs_epu8(v, _mm256_set1_epi8(51));
+             indices = _mm256_sub_epi8(indices, _mm256_cmpgt_epi8(v, _mm256_set1_epi8(25)));
+             v = _mm256_add_epi8(v, _mm256_shuffle_epi8(lut, indices));
+
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), v);
+          }
+          return i;
+       }
+
+       B2T_TARGET("avx2")
+       inline size_t base64_decode_blocks_avx2(uint8_t* out, const uint8_t* in, size_t inLen) {
+          const __m256i lut_lo = _mm256_setr_epi8(0x15, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11,
+                                                  0x11, 0x11, 0x13, 0x1A, 0x1B, 0x1B, 0x1B, 0x1A,
+                                                  0x15, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11,
+                                                  0x11, 0x11, 0x13, 0x1A, 0x1B, 0x1B, 0x1B, 0x1A);
+          const __m256i lut_hi = _mm256_setr_epi8(0x10, 0x10, 0x01, 0x02, 0x04, 0x08, 0x04, 0x08,
+                                                  0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10,
+                                                  0x10, 0x10, 0x01, 0x02, 0x04, 0x08, 0x04, 0x08,
+                                                  0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10);
+          const __m256i lut_roll = _mm256_setr_epi8(0, 16, 19, 4, -65, -65, -71, -71,
+                                                    0, 0, 0, 0, 0, 0, 0, 0,
+                                                    0, 16, 19, 4, -65, -65, -71, -71,
+                                                    0, 0, 0, 0, 0, 0, 0, 0);
+          const __m256i mask_2f = _mm256_set1_epi8(0x2f);
+
+          size_t i = 0;
+          // Each step stores 32 bytes of which 24 are output; stopping 12
+          // characters early keeps the 8 scratch bytes inside the
+          // base64_max_decoded_length(inLen) output buffer.
+          for (; i + 44 <= inLen; i += 32, out += 24) {
+             __m256i v = _mm256_loadu_si256(reinterpret_cast<const __m256i*>(in + i));
+
+             const __m256i hi_nibbles = _mm256_and_si256(_mm256_srli_epi32(v, 4), mask_2f);
+             const __m256i lo_nibbles = _mm256_and_si256(v, mask_2f);
+             const __m256i hi = _mm256_shuffle_epi8(lut_hi, hi_nibbles);
+             const __m256i lo = _mm256_shuffle_epi8(lut_lo, lo_nibbles);
+             if (_mm256_movemask_epi8(_mm256_cmpgt_epi8(_mm256_and_si256(lo, hi), _mm256_setzero_si256())))
+                break;
+
+             const __m256i eq_2f = _mm256_cmpeq_epi8(v, mask_2f);
+             v = _mm256_add_epi8(v, _mm256_shuffle_epi8(lut_roll, _mm256_add_epi8(eq_2f, hi_nibbles)));
+
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), base64_dec_reshuffle_avx2(v));
+          }
+          return i;
+       }
+
+       // Other alphabets cannot be translated with arithmetic, so characters
+       // and values are looked up in their tables 16 entries at a time: one
+       // shuffle per table row, kept where the row matches the high nibble.
+       // Same block sizes and scratch space as the kernels above.
+       B2T_TARGET("ssse3")
+       inline __m128i base64_lookup_ssse3(const __m128i* rows, int nrows, __m128i in) {
+          const __m128i lo = _mm_and_si128(in, _mm_set1_epi8(0x0f));
+          const __m128i hi = _mm_and_si128(_mm_srli_epi16(in, 4), _mm_set1_epi8(0x0f));
+          __m128i r = _mm_setzero_si128();
+          for (int k = 0; k < nrows; ++k) {
+             const __m128i hit = _mm_cmpeq_epi8(hi, _mm_set1_epi8(static_cast<char>(k)));
+             r = _mm_or_si128(r, _mm_and_si128(hit, _mm_shuffle_epi8(rows[k], lo)));
+          }
+          return r;
+       }
+
+       B2T_TARGET("ssse3")
+       inline size_t base64_encode_table_ssse3(char* out, const uint8_t* buf, size_t bufLen,
+                                               const base64_alphabet& a) {
+          __m128i rows[4];
+          for (int k = 0; k < 4; ++k)
+             rows[k] = _mm_loadu_si128(reinterpret_cast<const __m128i*>(a.chars + 16 * k));
+          size_t i = 0;
+          for (; i + 16 <= bufLen; i += 12, out += 16) {
+             const __m128i v = _mm_loadu_si128(reinterpret_cast<const __m128i*>(buf + i));
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out),
+                              base64_lookup_ssse3(rows, 4, base64_enc_reshuffle(v)));
+          }
+          return i;
+       }
+
+       B2T_TARGET("ssse3")
+       inline size_t base64_decode_table_ssse3(uint8_t* out, const uint8_t* in, size_t inLen,
+                                               const base64_alphabet& a) {
+          __m128i rows[8];
+          for (int k = 0; k < 8; ++k)
+             rows[k] = _mm_loadu_si128(reinterpret_cast<const __m128i*>(a.values + 16 * k));
+          size_t i = 0;
+          for (; i + 24 <= inLen; i += 16, out += 12) {
+             const __m128i chars = _mm_loadu_si128(reinterpret_cast<const __m128i*>(in + i));
+             const __m128i v = base64_lookup_ssse3(rows, 8, chars);
+             // Invalid characters look up 0xff, bytes >= 0x80 have the bit themselves
+             if (_mm_movemask_epi8(_mm_or_si128(v, chars)))
+                break;
+             _mm_storeu_si128(reinterpret_cast<__m128i*>(out), base64_dec_reshuffle(v));
+          }
+          return i;
+       }
+
+       B2T_TARGET("avx2")
+       inline __m256i base64_lookup_avx2(const __m256i* rows, int nrows, __m256i in) {
+          const __m256i lo = _mm256_and_si256(in, _mm256_set1_epi8(0x0f));
+          const __m256i hi = _mm256_and_si256(_mm256_srli_epi16(in, 4), _mm256_set1_epi8(0x0f));
+          __m256i r = _mm256_setzero_si256();
+          for (int k = 0; k < nrows; ++k) {
+             const __m256i hit = _mm256_cmpeq_epi8(hi, _mm256_set1_epi8(static_cast<char>(k)));
+             r = _mm256_or_si256(r, _mm256_and_si256(hit, _mm256_shuffle_epi8(rows[k], lo)));
+          }
+          return r;
+       }
+
+       B2T_TARGET("avx2")
+       inline size_t base64_encode_table_avx2(char* out, const uint8_t* buf, size_t bufLen,
+                                              const base64_alphabet& a) {
+          __m256i rows[4];
+          for (int k = 0; k < 4; ++k)
+             rows[k] = _mm256_broadcastsi128_si256(_mm_loadu_si128(reinterpret_cast<const __m128i*>(a.chars + 16 * k)));
+          size_t i = 0;
+          for (; i + 28 <= bufLen; i += 24, out += 32) {
+             const __m256i v = base64_lookup_avx2(rows, 4, base64_enc_reshuffle_avx2(buf + i));
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), v);
+          }
+          return i;
+       }
+
+       B2T_TARGET("avx2")
+       inline size_t base64_decode_table_avx2(uint8_t* out, const uint8_t* in, size_t inLen,
+                                              const base64_alphabet& a) {
+          __m256i rows[8];
+          for (int k = 0; k < 8; ++k)
+             rows[k] = _mm256_broadcastsi128_si256(_mm_loadu_si128(reinterpret_cast<const __m128i*>(a.values + 16 * k)));
+          size_t i = 0;
+          for (; i + 44 <= inLen; i += 32, out += 24) {
+             const __m256i chars = _mm256_loadu_si256(reinterpret_cast<const __m256i*>(in + i));
+             const __m256i v = base64_lookup_avx2(rows, 8, chars);
+             if (_mm256_movemask_epi8(_mm256_or_si256(v, chars)))
+                break;
+             _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), base64_dec_reshuffle_avx2(v));
+          }
+          return i;
+       }
+#endif // B2T_X86
+
+#if defined(B2T_NEON)
+       // NEON looks characters and values up in tables for every alphabet
+       inline size_t base64_encode_neon_with(char* out, const uint8_t* buf, size_t bufLen, const char* chars) {
+          const uint8_t* alphabet = reinterpret_cast<const uint8_t*>(chars);
+          uint8x16x4_t lut;
+          lut.val[0] = vld1q_u8(alphabet);
+          lut.val[1] = vld1q_u8(alphabet + 16);
+          lut.val[2] = vld1q_u8(alphabet + 32);
+          lut.val[3] = vld1q_u8(alphabet + 48);
+          const uint8x16_t mask = vdupq_n_u8(0x3f);
+
+          size_t i = 0;
+          // Each step de-interleaves 48 bytes into 16 groups of three
+          for (; i + 48 <= bufLen; i += 48, out += 64) {
+             const uint8x16x3_t in = vld3q_u8(buf + i);
+             uint8x16x4_t idx;
+             idx.val[0] = vshrq_n_u8(in.val[0], 2);
+             idx.val[1] = vandq_u8(vorrq_u8(vshlq_n_u8(in.val[0], 4), vshrq_n_u8(in.val[1], 4)), mask);
+             idx.val[2] = vandq_u8(vorrq_u8(vshlq_n_u8(in.val[1], 2), vshrq_n_u8(in.val[2], 6)), mask);
+             idx.val[3] = vandq_u8(in.val[2], mask);
+
+             uint8x16x4_t chars;
+             chars.val[0] = vqtbl4q_u8(lut, idx.val[0]);
+             chars.val[1] = vqtbl4q_u8(lut, idx.val[1]);
+             chars.val[2] = vqtbl4q_u8(lut, idx.val[2]);
+             chars.val[3] = vqtbl4q_u8(lut, idx.val[3]);
+             vst4q_u8(reinterpret_cast<uint8_t*>(out), chars);
+          }
+          return i;
+       }
+
+       inline size_t base64_decode_neon_with(uint8_t* out, const uint8_t* in, size_t inLen, const uint8_t* values) {
+          // The table split into the halves for characters 0..63 and 64..127
+          uint8x16x4_t lut_lo, lut_hi;
+          for (int k = 0; k < 4; ++k) {
+             lut_lo.val[k] = vld1q_u8(values + 16 * k);
+             lut_hi.val[k] = vld1q_u8(values + 64 + 16 * k);
+          }
+          const uint8x16_t flip = vdupq_n_u8(0x40);
+          const uint8x16_t high = vdupq_n_u8(0x80);
+          const uint8x16_t bad = vdupq_n_u8(0xc0);
+
+          size_t i = 0;
+          // Each step de-interleaves 64 characters into 16 groups of four
+          for (; i + 64 <= inLen; i += 64, out += 48) {
+             const uint8x16x4_t chars = vld4q_u8(in + i);
+             uint8x16x4_t v;
+             uint8x16_t error = vdupq_n_u8(0);
+             for (int k = 0; k < 4; ++k) {
+                // Out-of-range indices read as 0, so exactly one lookup hits for
+                // characters below 128; bytes >= 128 look up nothing and are
+                // caught by their own top bit, invalid values by 0x80 and up
+                v.val[k] = vorrq_u8(vqtbl4q_u8(lut_lo, chars.val[k]),
+                                    vqtbl4q_u8(lut_hi, veorq_u8(chars.val[k], flip)));
+                error = vorrq_u8(error, vorrq_u8(vandq_u8(chars.val[k], high), vandq_u8(v.val[k], bad)));
+             }
+             if (vmaxvq_u8(error) != 0)
+                break;
+
+             uint8x16x3_t bytes;
+             bytes.val[0] = vorrq_u8(vshlq_n_u8(v.val[0], 2), vshrq_n_u8(v.val[1], 4));
+             bytes.val[1] = vorrq_u8(vshlq_n_u8(v.val[1], 4), vshrq_n_u8(v.val[2], 2));
+             bytes.val[2] = vorrq_u8(vshlq_n_u8(v.val[2], 6), v.val[3]);
+             vst3q_u8(out, bytes);
+          }
+          return i;
+       }
+
+       inline size_t base64_encode_blocks_neon(char* out, const uint8_t* buf, size_t bufLen) {
+          return base64_encode_neon_with(out, buf, bufLen, to_base64);
+       }
+
+       inline size_t base64_decode_blocks_neon(uint8_t* out, const uint8_t* in, size_t inLen) {
+          return base64_decode_neon_with(out, in, inLen, from_base64);
+       }
+
+       inline size_t base64_encode_table_neon(char* out, const uint8_t* buf, size_t bufLen,
+                                              const base64_alphabet& a) {
+          return base64_encode_neon_with(out, buf, bufLen, a.chars);
+       }
+
+       inline size_t base64_decode_table_neon(uint8_t* out, const uint8_t* in, size_t inLen,
+                                              const base64_alphabet& a) {
+          return base64_decode_neon_with(out, in, inLen, a.values);
+       }
+#endif // B2T_NEON
+
+       struct base64_kernel {
+          simd_level level;
+          base64_encode_blocks_fn encode_blocks;
+          base64_decode_blocks_fn decode_blocks;
+          base64_encode_table_fn encode_table;
+          base64_decode_table_fn decode_table;
+       };
+
+       // Kernel for a given instruction set; levels this build or CPU cannot
+       // run fall back to the portable code
+       inline base64_kernel base64_kernel_for(simd_level level) {
+          base64_kernel k = { simd_scalar, base64_encode_blocks_scalar, base64_decode_blocks_scalar,
+                              base64_encode_table_scalar, base64_decode_table_scalar };
+#if defined(B2T_X86)
+          if (level >= simd_avx2 && cpu_simd_level() >= simd_avx2) {
+             k.level = simd_avx2;
+             k.encode_blocks = base64_encode_blocks_avx2;
+             k.decode_blocks = base64_decode_blocks_avx2;
+             k.encode_table = base64_encode_table_avx2;
+             k.decode_table = base64_decode_table_avx2;
+          } else if (level >= simd_ssse3 && cpu_simd_level() >= simd_ssse3) {
+             k.level = simd_ssse3;
+             k.encode_blocks = base64_encode_blocks_ssse3;
+             k.decode_blocks = base64_decode_blocks_ssse3;
+             k.encode_table = base64_encode_table_ssse3;
+             k.decode_table = base64_decode_table_ssse3;
+          }
+#elif defined(B2T_NEON)
+          if (level >= simd_neon) {
+             k.level = simd_neon;
+             k.encode_blocks = base64_encode_blocks_neon;
+             k.decode_blocks = base64_decode_blocks_neon;
+             k.encode_table = base64_encode_table_neon;
+             k.decode_table = base64_decode_table_neon;
+          }
+#else
+          (void)level;
+#endif
+          return k;
+       }
+
+       // Picked once per process from the CPU's features
+       inline const base64_kernel& base64_active_kernel() {
+          static const base64_kernel k = base64_kernel_for(cpu_simd_level());
+          return k;
+       }
+
+    } // namespace detail
+
+    inline const char* base64_kernel_name() {
+       return simd_level_name(detail::base64_active_kernel().level);
+    }
+
     inline void base64_encode(std::string & out, std::string const& buf) {
        if (buf.empty())
           base64_encode(out, NULL, 0);
@@ -54,90 +591,207 @@ namespace b2t {
           base64_encode(out, &buf[0], buf.size());
     }
 
-    inline void base64_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
-       // Calculate how many bytes that needs to be added to get a multiple of 3
-       size_t missing = 0;
-       size_t ret_size = bufLen;
-       while ((ret_size % 3) != 0) {
-          ++ret_size;
-          ++missing;
+    inline size_t base64_encoded_length(size_t bufLen) {
+       return 4 * ((bufLen + 2) / 3);
+    }
+
+    inline size_t base64_max_decoded_length(size_t inLen) {
+       return 3 * ((inLen + 3) / 4);
+    }
+
+    // Unpadded output leaves out the padding of the last group
+    inline size_t base64_encoded_length(const base64_alphabet& a, size_t bufLen) {
+       return a.pad ? base64_encoded_length(bufLen) : (4 * bufLen + 2) / 3;
+    }
+
+    namespace detail {
+       inline size_t base64_encode_into_with(const base64_kernel& k, const base64_alphabet& a, char* out,
+                                             uint8_t const* buf, size_t bufLen) {
+          // Vectorized blocks first, then whole groups of three, then the tail
+          size_t i = a.standard ? k.encode_blocks(out, buf, bufLen) : k.encode_table(out, buf, bufLen, a);
+          i += base64_encode_groups(out + i / 3 * 4, buf + i, bufLen - i, a.chars);
+          char* p = out + i / 3 * 4;
+
+          const size_t missing = bufLen - i;
+          if (missing == 1) {
+             const uint8_t b0 = buf[i];
+             *p++ = a.chars[b0 >> 2];
+             *p++ = a.chars[(b0 & 0x03) << 4];
+             if (a.pad) {
+                *p++ = a.pad;
+                *p++ = a.pad;
+             }
+          } else if (missing == 2) {
+             const uint8_t b0 = buf[i], b1 = buf[i+1];
+             *p++ = a.chars[b0 >> 2];
+             *p++ = a.chars[((b0 & 0x03) << 4) | (b1 >> 4)];
+             *p++ = a.chars[(b1 & 0x0f) << 2];
+             if (a.pad)
+                *p++ = a.pad;
+          }
+          return static_cast<size_t>(p - out);
        }
 
-       // Expand the return string size to a multiple of 4
-       ret_size = 4*ret_size/3;
+       inline size_t base64_encode_into_with(const base64_kernel& k, char* out,
+                                             uint8_t const* buf, size_t bufLen) {
+          return base64_encode_into_with(k, base64_standard_alphabet(), out, buf, bufLen);
+       }
+    } // namespace detail
 
-       ret.clear();
-       ret.reserve(ret_size);
+    // Writes exactly base64_encoded_length(bufLen) characters to out
+    inline size_t base64_encode_into(char* out, uint8_t const* buf, size_t bufLen) {
+       return detail::base64_encode_into_with(detail::base64_active_kernel(), base64_standard_alphabet(),
+                                              out, buf, bufLen);
+    }
+
+    // Writes exactly base64_encoded_length(a, bufLen) characters to out
+    inline size_t base64_encode_into(const base64_alphabet& a, char* out, uint8_t const* buf, size_t bufLen) {
+       return detail::base64_encode_into_with(detail::base64_active_kernel(), a, out, buf, bufLen);
+    }
 
-       for (size_t i = 0; i < ret_size/4; ++i) {
-          // Read a group of three bytes (avoid buffer overrun by replacing with 0)
-          const size_t index = i*3;
-          const uint8_t b3_0 = (index+0 < bufLen) ? buf[index+0] : 0;
-          const uint8_t b3_1 = (index+1 < bufLen) ? buf[index+1] : 0;
-          const uint8_t b3_2 = (index+2 < bufLen) ? buf[index+2] : 0;
+    inline void base64_encode(std::string & ret, uint8_t const* buf, size_t bufLen) {
+       ret.resize(base64_encoded_length(bufLen));
+       if (!ret.empty())
+          base64_encode_into(&ret[0], buf, bufLen);
+    }
 
-          // Transform into four base 64 characters
-          const uint8_t b4_0 =                        ((b3_0 & 0xfc) >> 2);
-          const uint8_t b4_1 = ((b3_0 & 0x03) << 4) + ((b3_1 & 0xf0) >> 4);
-          const uint8_t b4_2 = ((b3_1 & 0x0f) << 2) + ((b3_2 & 0xc0) >> 6);
-          const uint8_t b4_3 = ((b3_2 & 0x3f) << 0);
 
-          // Add the base 64 characters to the return value
-          ret.push_back(to_base64[b4_0]);
-          ret.push_back(to_base64[b4_1]);
-          ret.push_back(to_base64[b4_2]);
-          ret.push_back(to_base64[b4_3]);
+    namespace detail {
+       // suspect is set to the offset of the first group that holds anything
+       // but characters of the alphabet (padding included), or N if none does
+       inline size_t base64_decode_into_with(const base64_kernel& k, const base64_alphabet& a, uint8_t* out,
+                                             const char* in, size_t N, size_t& suspect) {
+          const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+          const uint8_t* values = a.values;
+
+          // Vectorized blocks first; the scalar loop takes over at the first
+          // block holding anything but plain alphabet characters
+          size_t i = a.standard ? k.decode_blocks(out, u, N) : k.decode_table(out, u, N, a);
+          size_t n = i / 4 * 3;
+          suspect = N;
+
+          for (; i < N; i += 4) {
+             // Get values for each group of four base 64 characters
+             const uint8_t b4_0 =              values[u[i+0]];
+             const uint8_t b4_1 = (i+1 < N) ? values[u[i+1]] : 0xff;
+             const uint8_t b4_2 = (i+2 < N) ? values[u[i+2]] : 0xff;
+             const uint8_t b4_3 = (i+3 < N) ? values[u[i+3]] : 0xff;
+
+             if (((b4_0 | b4_1 | b4_2 | b4_3) & 0x80) && suspect == N)
+                suspect = i;
+
+             // Transform into a group of three bytes
+             const uint8_t b3_0 = ((b4_0 & 0x3f) << 2) + ((b4_1 & 0x30) >> 4);
+             const uint8_t b3_1 = ((b4_1 & 0x0f) << 4) + ((b4_2 & 0x3c) >> 2);
+             const uint8_t b3_2 = ((b4_2 & 0x03) << 6) + ((b4_3 & 0x3f) >> 0);
+
+             // Add the byte to the output if it isn't part of an '=' character (indicated by 0xff)
+             if (b4_1 != 0xff) out[n++] = b3_0;
+             if (b4_2 != 0xff) out[n++] = b3_1;
+             if (b4_3 != 0xff) out[n++] = b3_2;
+          }
+
+          return n;
        }
 
-       // Replace data that is invalid (always as many as there are missing bytes)
-       for (size_t i = 0; i != missing; ++i)
-          ret[ret_size - i - 1] = '=';
+       inline size_t base64_decode_into_with(const base64_kernel& k, uint8_t* out,
+                                             const char* in, size_t N) {
+          size_t suspect;
+          return base64_decode_into_with(k, base64_standard_alphabet(), out, in, N, suspect);
+       }
+    } // namespace detail
+
+    // Offset of the first character that makes in[0, N) invalid strict
+    // Base64 in alphabet a, or N if there is none. Only the alphabet's own
+    // characters are valid, and its padding character only where it
+    // completes the final group; input may also end without padding, but
+    // not with a single character in its last group, which no encoder
+    // writes. The scan starts at `from`, which must be a multiple of 4 with
+    // everything before it known to be valid.
+    inline size_t base64_find_invalid(const base64_alphabet& a, const char* in, size_t N, size_t from = 0) {
+       const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+       for (size_t i = from; i < N; ++i) {
+          if (a.values[u[i]] < 0x80)
+             continue;
+          if (!a.pad || in[i] != a.pad || i % 4 < 2)
+             return i;
+          // Padding runs to the end of its group and ends the input
+          const size_t group_end = i - i % 4 + 4;
+          if (group_end > N)
+             return i;
+          for (size_t j = i; j < group_end; ++j)
+             if (in[j] != a.pad)
+                return j;
+          return group_end < N ? group_end : N;
+       }
+       return N % 4 == 1 ? N - 1 : N;
     }
 
+    // Same for the standard alphabet
+    inline size_t base64_find_invalid(const char* in, size_t N, size_t from = 0) {
+       return base64_find_invalid(base64_standard_alphabet(), in, N, from);
+    }
 
-    template <class Out>
-    inline void base64_decode_any( Out & ret, std::string const& in) {
-        typedef typename Out::value_type T;
-
-       // Make sure the *intended* string length is a multiple of 4
-       size_t encoded_size = in.size();
+    // Writes at most base64_max_decoded_length(inLen) bytes to out and
+    // returns the number actually written. out must have room for the full
+    // base64_max_decoded_length(inLen) bytes: the vectorized kernels use it
+    // as scratch space.
+    inline size_t base64_decode_into(uint8_t* out, const char* in, size_t N) {
+       return detail::base64_decode_into_with(detail::base64_active_kernel(), out, in, N);
+    }
 
-       while ((encoded_size % 4) != 0)
-          ++encoded_size;
+    // Same as above, and stores in *invalid_at the offset of the first
+    // character that is not valid strict Base64 (see base64_find_invalid),
+    // or inLen if there is none. Validation happens in the decoding pass;
+    // only the groups it could not vouch for are looked at again.
+    inline size_t base64_decode_into(uint8_t* out, const char* in, size_t N, size_t* invalid_at) {
+       return base64_decode_into(base64_standard_alphabet(), out, in, N, invalid_at);
+    }
 
-       const size_t N = in.size();
-       ret.clear();
-       ret.reserve(3*encoded_size/4);
+    // The same two for alphabet a
+    inline size_t base64_decode_into(const base64_alphabet& a, uint8_t* out, const char* in, size_t N) {
+       size_t suspect;
+       return detail::base64_decode_into_with(detail::base64_active_kernel(), a, out, in, N, suspect);
+    }
 
-       for (size_t i = 0; i < encoded_size; i += 4) {
-          // Note: 'z' == 122
+    inline size_t base64_decode_into(const base64_alphabet& a, uint8_t* out, const char* in, size_t N,
+                                     size_t* invalid_at) {
+       size_t suspect;
+       const size_t n = detail::base64_decode_into_with(detail::base64_active_kernel(), a, out, in, N, suspect);
+       *invalid_at = base64_find_invalid(a, in, N, suspect);
+       return n;
+    }
 
-          // Get values for each group of four base 64 characters
-          const uint8_t b4_0 = (            in[i+0] <= 'z') ? from_base64[static_cast<uint8_t>(in[i+0])] : 0xff;
-          const uint8_t b4_1 = (i+1 < N && in[i+1] <= 'z') ? from_base64[static_cast<uint8_t>(in[i+1])] : 0xff;
-          const uint8_t b4_2 = (i+2 < N && in[i+2] <= 'z') ? from_base64[static_cast<uint8_t>(in[i+2])] : 0xff;
-          const uint8_t b4_3 = (i+3 < N && in[i+3] <= 'z') ? from_base64[static_cast<uint8_t>(in[i+3])] : 0xff;
 
-          // Transform into a group of three bytes
-          const uint8_t b3_0 = ((b4_0 & 0x3f) << 2) + ((b4_1 & 0x30) >> 4);
-          const uint8_t b3_1 = ((b4_1 & 0x0f) << 4) + ((b4_2 & 0x3c) >> 2);
-          const uint8_t b3_2 = ((b4_2 & 0x03) << 6) + ((b4_3 & 0x3f) >> 0);
+    template <class Out>
+    inline void base64_decode_any( Out & ret, const char* in, size_t N) {
+       ret.resize(base64_max_decoded_length(N));
+       if (ret.empty())
+          return;
+       ret.resize(base64_decode_into(reinterpret_cast<uint8_t*>(&ret[0]), in, N));
+    }
 
-          // Add the byte to the return value if it isn't part of an '=' character (indicated by 0xff)
-          if (b4_1 != 0xff) ret.push_back( static_cast<T>(b3_0) );
-          if (b4_2 != 0xff) ret.push_back( static_cast<T>(b3_1) );
-          if (b4_3 != 0xff) ret.push_back( static_cast<T>(b3_2) );
-       }
+    template <class Out>
+    inline void base64_decode_any( Out & ret, std::string const& in) {
+       base64_decode_any(ret, in.data(), in.size());
     }
 
     inline void base64_decode(std::vector<uint8_t> & out, std::string const& encoded_string) {
        base64_decode_any(out, encoded_string);
     }
 
+    inline void base64_decode(std::vector<uint8_t> & out, const char* in, size_t inLen) {
+       base64_decode_any(out, in, inLen);
+    }
+
     inline void base64_decode(std::string & out, std::string const& encoded_string) {
        base64_decode_any(out, encoded_string);
     }
 
+    inline void base64_decode(std::string & out, const char* in, size_t inLen) {
+       base64_decode_any(out, in, inLen);
+    }
+
 } // namespace b2t
 
 
@@ -0,0 +1,240 @@
+#ifndef BIN2TEXT_PARALLEL_H
+#define BIN2TEXT_PARALLEL_H
+#pragma once
+
+#include <cstdint>
+#include <cstring>
+#include <thread>
+
+namespace b2t {
+
+    // Multi-threaded drivers for the *_encode_into / *_decode_into kernels.
+    //
+    // Every codec maps a fixed number of input bytes to a fixed number of
+    // characters (3:4 for base64, 5:8 for base32, 1:2 for base16, 7:8 for
+    // base128), so an input split on group boundaries can be encoded or
+    // decoded piece by piece straight into disjoint slices of one output.
+    //
+    // The drivers take kernels with a leading context pointer, which they
+    // pass through untouched: the alphabet variants (variants.h) read their
+    // alphabet from it, and the adapters below wrap the kernels that need
+    // none, e.g. encode_kernel<base16_encode_into>.
+
+    typedef size_t (*encode_into_fn)(const void* ctx, char* out, const uint8_t* buf, size_t bufLen);
+    typedef size_t (*decode_into_fn)(const void* ctx, uint8_t* out, const char* in, size_t inLen);
+    typedef size_t (*checked_decode_into_fn)(const void* ctx, uint8_t* out, const char* in, size_t inLen,
+                                             size_t* invalid_at);
+    typedef size_t (*length_fn)(const void* ctx, size_t len);
+
+    template <size_t (*Encode)(char*, const uint8_t*, size_t)>
+    size_t encode_kernel(const void*, char* out, const uint8_t* buf, size_t bufLen) {
+       return Encode(out, buf, bufLen);
+    }
+
+    template <size_t (*Decode)(uint8_t*, const char*, size_t)>
+    size_t decode_kernel(const void*, uint8_t* out, const char* in, size_t inLen) {
+       return Decode(out, in, inLen);
+    }
+
+    template <size_t (*Checked)(uint8_t*, const char*, size_t, size_t*)>
+    size_t checked_kernel(const void*, uint8_t* out, const char* in, size_t inLen, size_t* invalid_at) {
+       return Checked(out, in, inLen, invalid_at);
+    }
+
+    template <size_t (*Length)(size_t)>
+    size_t length_kernel(const void*, size_t len) {
+       return Length(len);
+    }
+
+    // Inputs are only split into pieces of at least this many bytes; below
+    // it starting a thread costs more than it saves
+    static const size_t parallel_min_chunk = 256 * 1024;
+
+    // Upper bound on the number of threads a single call uses
+    static const unsigned parallel_max_workers = 64;
+
+    // Writes exactly what encode(ctx, out, buf, bufLen) writes, using up to
+    // `workers` threads (the calling thread included). groupIn input bytes
+    // encode to groupOut characters.
+    size_t parallel_encode_into(encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+                                char* out, const uint8_t* buf, size_t bufLen, unsigned workers);
+
+    // Writes what decode(ctx, out, in, inLen) writes, using up to `workers`
+    // threads. groupIn characters decode to at most groupOut bytes. With
+    // stopAtShortGroup, a piece that decodes short (padding) ends the
+    // output, matching decoders that stop at the first padded group.
+    // out needs room for the codec's max_decoded_length(inLen).
+    size_t parallel_decode_into(decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                bool stopAtShortGroup, uint8_t* out, const char* in,
+                                size_t inLen, unsigned workers);
+
+    // Same for the *_decode_into overloads that also validate the input.
+    // *invalid_at receives the offset of the first invalid character or
+    // inLen. A piece that decodes short (padding) while more input follows
+    // makes the first character after it invalid.
+    size_t parallel_decode_into(checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                bool stopAtShortGroup, uint8_t* out, const char* in,
+                                size_t inLen, unsigned workers, size_t* invalid_at);
+
+    // Implementation
+    namespace detail {
+
+       // Number of pieces to split `groups` groups of `groupSize` bytes into
+       inline size_t parallel_pieces(size_t groups, size_t groupSize, unsigned workers) {
+          const size_t min_groups = parallel_min_chunk / groupSize + 1;
+          size_t pieces = groups / min_groups;
+          if (pieces > workers) pieces = workers;
+          if (pieces > parallel_max_workers) pieces = parallel_max_workers;
+          return pieces ? pieces : 1;
+       }
+
+       // Runs job(0) .. job(pieces - 1), the first on the calling thread;
+       // if a thread cannot be started its piece runs inline instead, so
+       // nothing here throws
+       template <class Job>
+       inline void parallel_run(size_t pieces, const Job& job) {
+          std::thread threads[parallel_max_workers];
+          size_t started = 0;
+          for (size_t k = 1; k < pieces; ++k) {
+             try {
+                threads[started] = std::thread(job, k);
+                ++started;
+             } catch (...) {
+                job(k);
+             }
+          }
+          job(0);
+          for (size_t k = 0; k < started; ++k)
+             threads[k].join();
+       }
+
+       struct parallel_encode_job {
+          encode_into_fn encode;
+          const void* ctx;
+          size_t groupIn, groupOut, groups, pieces;
+          char* out;
+          const uint8_t* buf;
+          size_t bufLen;
+          size_t* written;
+
+          void operator()(size_t k) const {
+             const size_t first = groups * k / pieces;
+             const size_t last = groups * (k + 1) / pieces;
+             // The last piece also takes the partial group at the end
+             const size_t end = (k + 1 == pieces) ? bufLen : last * groupIn;
+             written[k] = encode(ctx, out + first * groupOut, buf + first * groupIn, end - first * groupIn);
+          }
+       };
+
+       // Runs either decode or, when set, checked, which also stores the
+       // offset of the piece's first invalid character in invalid[k]
+       struct parallel_decode_job {
+          decode_into_fn decode;
+          checked_decode_into_fn checked;
+          const void* ctx;
+          size_t groupIn, groupOut, groups, pieces;
+          uint8_t* out;
+          const char* in;
+          size_t inLen;
+          size_t* written;
+          size_t* invalid;
+
+          void operator()(size_t k) const {
+             const size_t first = groups * k / pieces;
+             const size_t last = groups * (k + 1) / pieces;
+             const size_t end = (k + 1 == pieces) ? inLen : last * groupIn;
+             if (checked)
+                written[k] = checked(ctx, out + first * groupOut, in + first * groupIn, end - first * groupIn, &invalid[k]);
+             else
+                written[k] = decode(ctx, out + first * groupOut, in + first * groupIn, end - first * groupIn);
+          }
+       };
+
+       inline size_t parallel_decode_pieces(const parallel_decode_job& job, bool stopAtShortGroup,
+                                            size_t* invalid_at) {
+          parallel_run(job.pieces, job);
+
+          // Each piece decoded at its largest possible offset; close the gaps
+          // left by pieces that came out short (padding or invalid characters)
+          size_t n = 0;
+          for (size_t k = 0; k < job.pieces; ++k) {
+             const size_t first = job.groups * k / job.pieces;
+             const size_t last = job.groups * (k + 1) / job.pieces;
+             const size_t start = first * job.groupIn;
+             const size_t end = (k + 1 == job.pieces) ? job.inLen : last * job.groupIn;
+             const uint8_t* piece = job.out + first * job.groupOut;
+             if (piece != job.out + n)
+                std::memmove(job.out + n, piece, job.written[k]);
+             n += job.written[k];
+             if (invalid_at && job.invalid[k] < end - start) {
+                *invalid_at = start + job.invalid[k];
+                break;
+             }
+             if (k + 1 < job.pieces && job.written[k] < (last - first) * job.groupOut) {
+                // Padding before the end of the input
+                if (invalid_at) {
+                   *invalid_at = end;
+                   break;
+                }
+                if (stopAtShortGroup)
+                   break;
+             }
+          }
+          return n;
+       }
+
+    } // namespace detail
+
+    inline size_t parallel_encode_into(encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+                                       char* out, const uint8_t* buf, size_t bufLen, unsigned workers) {
+       const size_t groups = bufLen / groupIn;
+       const size_t pieces = detail::parallel_pieces(groups, groupIn, workers);
+       if (pieces == 1)
+          return encode(ctx, out, buf, bufLen);
+
+       size_t written[parallel_max_workers];
+       const detail::parallel_encode_job job = { encode, ctx, groupIn, groupOut, groups, pieces, out, buf, bufLen, written };
+       detail::parallel_run(pieces, job);
+
+       // Every piece but the last is a whole number of groups, so the
+       // pieces are already back to back
+       size_t n = 0;
+       for (size_t k = 0; k < pieces; ++k)
+          n += written[k];
+       return n;
+    }
+
+    inline size_t parallel_decode_into(decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                       bool stopAtShortGroup, uint8_t* out, const char* in,
+                                       size_t inLen, unsigned workers) {
+       const size_t groups = inLen / groupIn;
+       const size_t pieces = detail::parallel_pieces(groups, groupIn, workers);
+       if (pieces == 1)
+          return decode(ctx, out, in, inLen);
+
+       size_t written[parallel_max_workers];
+       const detail::parallel_decode_job job = { decode, NULL, ctx, groupIn, groupOut, groups, pieces,
+                                                 out, in, inLen, written, NULL };
+       return detail::parallel_decode_pieces(job, stopAtShortGroup, NULL);
+    }
+
+    inline size_t parallel_decode_into(checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                       bool stopAtShortGroup, uint8_t* out, const char* in,
+                                       size_t inLen, unsigned workers, size_t* invalid_at) {
+       const size_t groups = inLen / groupIn;
+       const size_t pieces = detail::parallel_pieces(groups, groupIn, workers);
+       if (pieces == 1)
+          return decode(ctx, out, in, inLen, invalid_at);
+
+       size_t written[parallel_max_workers];
+       size_t invalid[parallel_max_workers];
+       const detail::parallel_decode_job job = { NULL, decode, ctx, groupIn, groupOut, groups, pieces,
+                                                 out, in, inLen, written, invalid };
+       *invalid_at = inLen;
+       return detail::parallel_decode_pieces(job, stopAtShortGroup, invalid_at);
+    }
+
+} // namespace b2t
+
+
+#endif // BIN2TEXT_PARALLEL_H
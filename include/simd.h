@@ -0,0 +1,97 @@
+#ifndef BIN2TEXT_SIMD_H
+#define BIN2TEXT_SIMD_H
+#pragma once
+
+// Runtime CPU feature detection shared by the vectorized kernels.
+//
+// Kernels for SSSE3 and AVX2 are compiled with per-function target
+// attributes, so the library itself is built for the baseline ISA and the
+// fastest kernel is picked at run time. NEON is part of the AArch64 baseline
+// and needs no runtime check. Define B2T_NO_SIMD to compile scalar code only.
+
+#if !defined(B2T_NO_SIMD)
+#  if defined(__x86_64__) || defined(_M_X64) || defined(__i386__) || defined(_M_IX86)
+#    define B2T_X86 1
+#    include <immintrin.h>
+#    if defined(_MSC_VER) && !defined(__clang__)
+#      include <intrin.h>
+#    endif
+#  elif defined(__aarch64__) || defined(_M_ARM64)
+#    define B2T_NEON 1
+#    include <arm_neon.h>
+#  endif
+#endif
+
+#if defined(B2T_X86) && (defined(__GNUC__) || defined(__clang__))
+#  define B2T_TARGET(isa) __attribute__((target(isa)))
+#else
+#  define B2T_TARGET(isa)
+#endif
+
+namespace b2t {
+
+    // Instruction sets a kernel can be specialised for, fastest last
+    enum simd_level {
+        simd_scalar = 0,
+        simd_neon = 1,
+        simd_ssse3 = 2,
+        simd_avx2 = 3
+    };
+
+    namespace detail {
+
+#if defined(B2T_X86)
+        inline simd_level detect_simd_level() {
+#  if defined(_MSC_VER) && !defined(__clang__)
+            int regs[4];
+            __cpuid(regs, 0);
+            const int max_leaf = regs[0];
+            __cpuid(regs, 1);
+            const bool ssse3 = (regs[2] & (1 << 9)) != 0;
+            const bool osxsave = (regs[2] & (1 << 27)) != 0;
+            const bool avx = (regs[2] & (1 << 28)) != 0;
+            bool avx2 = false;
+            if (max_leaf >= 7 && osxsave && avx && (_xgetbv(0) & 0x6) == 0x6) {
+                __cpuidex(regs, 7, 0);
+                avx2 = (regs[1] & (1 << 5)) != 0;
+            }
+#  else
+            __builtin_cpu_init();
+            const bool ssse3 = __builtin_cpu_supports("ssse3") != 0;
+            const bool avx2 = __builtin_cpu_supports("avx2") != 0;
+#  endif
+            if (avx2) return simd_avx2;
+            if (ssse3) return simd_ssse3;
+            return simd_scalar;
+        }
+#elif defined(B2T_NEON)
+        inline simd_level detect_simd_level() {
+            return simd_neon;
+        }
+#else
+        inline simd_level detect_simd_level() {
+            return simd_scalar;
+        }
+#endif
+
+    } // namespace detail
+
+    // Best instruction set supported by this CPU, detected once per process
+    inline simd_level cpu_simd_level() {
+        static const simd_level level = detail::detect_simd_level();
+        return level;
+    }
+
+    inline const char* simd_level_name(simd_level level) {
+        switch (level) {
+        case simd_avx2: return "avx2";
+        case simd_ssse3: return "ssse3";
+        case simd_neon: return "neon";
+        default: return "scalar";
+        }
+    }
+
+} // namespace b2t
+
+
+#endif // BIN2TEXT_SIMD_H
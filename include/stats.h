@@ -0,0 +1,102 @@
+#ifndef BIN2TEXT_STATS_H
+#define BIN2TEXT_STATS_H
+#pragma once
+
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+
+namespace b2t {
+
+    // Counters for one codec operation (say Base64 encode). Every field is
+    // a relaxed atomic, so recording from many threads at once needs no lock
+    // and costs a handful of uncontended additions. A snapshot taken while
+    // calls are being recorded may mix counts from before and after them.
+    //
+    // Latencies go into power-of-two buckets of nanoseconds: bucket i
+    // counts calls that took [2^i, 2^(i+1)) ns, the last one everything
+    // slower.
+    static const unsigned stats_buckets = 36;
+
+    struct op_stats {
+       std::atomic<uint64_t> calls;
+       std::atomic<uint64_t> bytes_in;
+       std::atomic<uint64_t> bytes_out;
+       std::atomic<uint64_t> nanoseconds;
+       std::atomic<uint64_t> latency[stats_buckets];
+    };
+
+    // Plain copy of an op_stats, for reading
+    struct op_stats_snapshot {
+       uint64_t calls;
+       uint64_t bytes_in;
+       uint64_t bytes_out;
+       uint64_t nanoseconds;
+       uint64_t latency[stats_buckets];
+    };
+
+    // Monotonic time in nanoseconds, never 0
+    uint64_t stats_clock();
+
+    // Count one call that started at stats_clock() time `start`
+    void stats_record(op_stats& s, uint64_t start, size_t bytesIn, size_t bytesOut);
+
+    void stats_snapshot(const op_stats& s, op_stats_snapshot& out);
+    void stats_reset(op_stats& s);
+
+    // Implementation
+
+    inline uint64_t stats_clock() {
+       const uint64_t ns = static_cast<uint64_t>(std::chrono::duration_cast<std::chrono::nanoseconds>(
+          std::chrono::steady_clock::now().time_since_epoch()).count());
+       return ns | 1;
+    }
+
+    namespace detail {
+       // floor(log2(ns)), capped at the last bucket
+       inline unsigned stats_bucket(uint64_t ns) {
+          if (ns < 2)
+             return 0;
+#if defined(__GNUC__) || defined(__clang__)
+          const unsigned b = 63 - static_cast<unsigned>(__builtin_clzll(ns));
+#else
+          unsigned b = 0;
+          while (ns >>= 1)
+             ++b;
+#endif
+          return b < stats_buckets ? b : stats_buckets - 1;
+       }
+    } // namespace detail
+
+    inline void stats_record(op_stats& s, uint64_t start, size_t bytesIn, size_t bytesOut) {
+       const uint64_t now = stats_clock();
+       const uint64_t elapsed = now > start ? now - start : 0;
+       s.calls.fetch_add(1, std::memory_order_relaxed);
+       s.bytes_in.fetch_add(bytesIn, std::memory_order_relaxed);
+       s.bytes_out.fetch_add(bytesOut, std::memory_order_relaxed);
+       s.nanoseconds.fetch_add(elapsed, std::memory_order_relaxed);
+       s.latency[detail::stats_bucket(elapsed)].fetch_add(1, std::memory_order_relaxed);
+    }
+
+    inline void stats_snapshot(const op_stats& s, op_stats_snapshot& out) {
+       out.calls = s.calls.load(std::memory_order_relaxed);
+       out.bytes_in = s.bytes_in.load(std::memory_order_relaxed);
+       out.bytes_out = s.bytes_out.load(std::memory_order_relaxed);
+       out.nanoseconds = s.nanoseconds.load(std::memory_order_relaxed);
+       for (unsigned i = 0; i < stats_buckets; ++i)
+          out.latency[i] = s.latency[i].load(std::memory_order_relaxed);
+    }
+
+    inline void stats_reset(op_stats& s) {
+       s.calls.store(0, std::memory_order_relaxed);
+       s.bytes_in.store(0, std::memory_order_relaxed);
+       s.bytes_out.store(0, std::memory_order_relaxed);
+       s.nanoseconds.store(0, std::memory_order_relaxed);
+       for (unsigned i = 0; i < stats_buckets; ++i)
+          s.latency[i].store(0, std::memory_order_relaxed);
+    }
+
+} // namespace b2t
+
+
+#endif // BIN2TEXT_STATS_H
@@ -0,0 +1,106 @@
+#ifndef BIN2TEXT_VARIANTS_H
+#define BIN2TEXT_VARIANTS_H
+#pragma once
+
+#include <cstdint>
+
+#include "base64.h"
+#include "base32.h"
+#include "parallel.h"
+
+namespace b2t {
+
+    // Alphabet variants as kernels that take their alphabet as context, so
+    // they plug into everything built on encode_into_fn/decode_into_fn
+    // (multi-threading, line wrapping, strict decoding). The alphabet's
+    // tables are built once, by *_make_alphabet; nothing is looked up or
+    // copied per call.
+    struct codec_variant {
+       encode_into_fn encode;
+       decode_into_fn decode;
+       checked_decode_into_fn checked;
+       length_fn encoded_length;
+       const void* ctx; // The alphabet, passed to every function above
+    };
+
+    // Fill v with the kernels of alphabet a, which must outlive v
+    void base64_variant(const base64_alphabet& a, codec_variant& v);
+    void base32_variant(const base32_alphabet& a, codec_variant& v);
+
+    // Implementation
+    namespace detail {
+
+       struct base64_codec {
+          typedef base64_alphabet alphabet;
+          static size_t encode(const alphabet& a, char* out, const uint8_t* buf, size_t len) {
+             return base64_encode_into(a, out, buf, len);
+          }
+          static size_t decode(const alphabet& a, uint8_t* out, const char* in, size_t len) {
+             return base64_decode_into(a, out, in, len);
+          }
+          static size_t checked(const alphabet& a, uint8_t* out, const char* in, size_t len, size_t* invalid_at) {
+             return base64_decode_into(a, out, in, len, invalid_at);
+          }
+          static size_t encoded_length(const alphabet& a, size_t len) {
+             return base64_encoded_length(a, len);
+          }
+       };
+
+       struct base32_codec {
+          typedef base32_alphabet alphabet;
+          static size_t encode(const alphabet& a, char* out, const uint8_t* buf, size_t len) {
+             return base32_encode_into(a, out, buf, len);
+          }
+          static size_t decode(const alphabet& a, uint8_t* out, const char* in, size_t len) {
+             return base32_decode_into(a, out, in, len);
+          }
+          static size_t checked(const alphabet& a, uint8_t* out, const char* in, size_t len, size_t* invalid_at) {
+             return base32_decode_into(a, out, in, len, invalid_at);
+          }
+          static size_t encoded_length(const alphabet& a, size_t len) {
+             return base32_encoded_length(a, len);
+          }
+       };
+
+       // Codec's functions with the alphabet read from ctx
+       template <class Codec>
+       struct variant_kernels {
+          static const typename Codec::alphabet& alphabet(const void* ctx) {
+             return *static_cast<const typename Codec::alphabet*>(ctx);
+          }
+          static size_t encode(const void* ctx, char* out, const uint8_t* buf, size_t len) {
+             return Codec::encode(alphabet(ctx), out, buf, len);
+          }
+          static size_t decode(const void* ctx, uint8_t* out, const char* in, size_t len) {
+             return Codec::decode(alphabet(ctx), out, in, len);
+          }
+          static size_t checked(const void* ctx, uint8_t* out, const char* in, size_t len, size_t* invalid_at) {
+             return Codec::checked(alphabet(ctx), out, in, len, invalid_at);
+          }
+          static size_t encoded_length(const void* ctx, size_t len) {
+             return Codec::encoded_length(alphabet(ctx), len);
+          }
+
+          static void fill(const typename Codec::alphabet& a, codec_variant& v) {
+             v.encode = encode;
+             v.decode = decode;
+             v.checked = checked;
+             v.encoded_length = encoded_length;
+             v.ctx = &a;
+          }
+       };
+
+    } // namespace detail
+
+    inline void base64_variant(const base64_alphabet& a, codec_variant& v) {
+       detail::variant_kernels<detail::base64_codec>::fill(a, v);
+    }
+
+    inline void base32_variant(const base32_alphabet& a, codec_variant& v) {
+       detail::variant_kernels<detail::base32_codec>::fill(a, v);
+    }
+
+} // namespace b2t
+
+
+#endif // BIN2TEXT_VARIANTS_H
@@ -0,0 +1,273 @@
+#ifndef BIN2TEXT_WRAP_H
+#define BIN2TEXT_WRAP_H
+#pragma once
+
+#include <cstdint>
+#include <cstring>
+
+#include "parallel.h"
+
+namespace b2t {
+
+    // Line-wrapped encoding and whitespace-skipping decoding on top of the
+    // *_encode_into / *_decode_into kernels, for the codecs whose alphabet
+    // has no whitespace (base64, base32, base16). Both work in the same pass
+    // as the kernels: wrapped output is encoded line by line straight into
+    // place, and wrapped input is decoded run by run straight from the
+    // source, so neither makes a copy of the data.
+
+    // Length of encodedLen characters split into lines of `wrap` characters,
+    // each ended by '\n' (0 means no wrapping)
+    size_t wrapped_length(size_t encodedLen, size_t wrap);
+
+    // Writes exactly wrapped_length(encoded length, wrap) characters: what
+    // encode(ctx, out, buf, bufLen) writes, with '\n' after every `wrap`
+    // characters and at the end. groupIn bytes encode to groupOut
+    // characters, except that the last group may be shorter.
+    size_t encode_wrapped_into(encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+                               char* out, const uint8_t* buf, size_t bufLen, size_t wrap);
+
+    // Decodes in[0, inLen) as if all ASCII whitespace was removed first.
+    // groupIn characters decode to at most groupOut bytes; with
+    // stopAtShortGroup decoding ends at the first padded group. The offset
+    // (in `in`) of the first invalid character is stored in *invalid_at, or
+    // inLen if there is none; like the decoders, this never stops early.
+    // out needs room for the codec's max_decoded_length(inLen).
+    size_t decode_skipping_whitespace(checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                      bool stopAtShortGroup, uint8_t* out, const char* in,
+                                      size_t inLen, size_t* invalid_at);
+
+    // Implementation
+    namespace detail {
+
+       inline bool is_wrap_whitespace(uint8_t c) {
+          return c == ' ' || (c >= '\t' && c <= '\r');
+       }
+
+       // End of the run of non-whitespace characters starting at i. None of
+       // the alphabets has a character below '!', so eight bytes at a time
+       // are skipped until a word holds one and only that word is looked at
+       // byte by byte.
+       inline size_t wrap_run_end(const uint8_t* u, size_t i, size_t len) {
+          const uint64_t ones = 0x0101010101010101ULL;
+          while (i + 8 <= len) {
+             uint64_t word;
+             std::memcpy(&word, u + i, 8);
+             // High bit set in the lane of (at least) the first byte < 0x21
+             if ((word - ones * 0x21) & ~word & (ones * 0x80)) {
+                for (size_t end = i + 8; i < end; ++i) {
+                   if (is_wrap_whitespace(u[i]))
+                      return i;
+                }
+                continue;
+             }
+             i += 8;
+          }
+          while (i < len && !is_wrap_whitespace(u[i]))
+             ++i;
+          return i;
+       }
+
+       // State of decode_skipping_whitespace: the whitespace-free runs are
+       // gathered into a small buffer, so the kernel sees large blocks
+       // rather than one line at a time, and segments map positions in the
+       // buffer back to the input for error offsets
+       struct whitespace_decoder {
+          static const size_t capacity = 4096; // A multiple of every group size
+          static const size_t max_segments = 256;
+
+          checked_decode_into_fn decode;
+          const void* ctx;
+          size_t groupIn, groupOut;
+          bool stopAtShortGroup;
+          uint8_t* out;
+          const char* in;
+          size_t inLen;
+          size_t* invalid_at;
+          size_t n;
+          bool padded; // The last block decoded short, so it ended in padding
+          bool done;
+          size_t used, segments;
+          char buf[capacity];
+          size_t seg_at[max_segments], seg_from[max_segments];
+
+          whitespace_decoder(checked_decode_into_fn decode_, const void* ctx_, size_t groupIn_, size_t groupOut_,
+                             bool stopAtShortGroup_, uint8_t* out_, const char* in_, size_t inLen_,
+                             size_t* invalid_at_)
+             : decode(decode_), ctx(ctx_), groupIn(groupIn_), groupOut(groupOut_), stopAtShortGroup(stopAtShortGroup_),
+               out(out_), in(in_), inLen(inLen_), invalid_at(invalid_at_), n(0), padded(false),
+               done(false), used(0), segments(0) {}
+
+          void invalid(size_t at) {
+             if (*invalid_at == inLen)
+                *invalid_at = at;
+          }
+
+          // Offset in the input of buf[pos]
+          size_t source_of(size_t pos) const {
+             size_t k = segments - 1;
+             while (seg_at[k] > pos) --k;
+             return seg_from[k] + (pos - seg_at[k]);
+          }
+
+          // Anything after padding is invalid; returns false to stop
+          bool after_padding(size_t at) {
+             invalid(at);
+             padded = false;
+             done = stopAtShortGroup;
+             return !done;
+          }
+
+          // Decodes len characters of block, which is either buf or the
+          // input from offset `from` on
+          void decode_chunk(const char* block, size_t len, size_t from, bool buffered) {
+             size_t bad = len;
+             const size_t written = decode(ctx, out + n, block, len, &bad);
+             if (bad < len)
+                invalid(buffered ? source_of(bad) : from + bad);
+             n += written;
+             padded = written < len / groupIn * groupOut;
+          }
+
+          void append(size_t from, size_t len) {
+             if (segments == max_segments) {
+                flush(false);
+                if (done || (padded && !after_padding(from)))
+                   return;
+             }
+             seg_at[segments] = used;
+             seg_from[segments++] = from;
+             std::memcpy(buf + used, in + from, len);
+             used += len;
+             if (used == capacity)
+                flush(false);
+          }
+
+          // Decodes the whole groups in buf (everything when last) and
+          // keeps the partial group at the end for the next block
+          void flush(bool last) {
+             const size_t len = last ? used : used / groupIn * groupIn;
+             if (!len)
+                return;
+             decode_chunk(buf, len, 0, true);
+             const size_t rest = used - len;
+             if (rest) {
+                if (padded && !after_padding(source_of(len)))
+                   return;
+                const size_t from = source_of(len);
+                size_t k = segments - 1;
+                while (seg_at[k] > len) --k;
+                // The rest starts in segment k and goes on through the later ones
+                seg_at[0] = 0;
+                seg_from[0] = from;
+                size_t kept = 1;
+                for (++k; k < segments; ++k) {
+                   seg_at[kept] = seg_at[k] - len;
+                   seg_from[kept++] = seg_from[k];
+                }
+                segments = kept;
+                std::memmove(buf, buf + len, rest);
+             } else {
+                segments = 0;
+             }
+             used = rest;
+          }
+       };
+
+    } // namespace detail
+
+    inline size_t wrapped_length(size_t encodedLen, size_t wrap) {
+       return wrap ? encodedLen + (encodedLen + wrap - 1) / wrap : encodedLen;
+    }
+
+    inline size_t encode_wrapped_into(encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+                                      char* out, const uint8_t* buf, size_t bufLen, size_t wrap) {
+       if (!wrap)
+          return encode(ctx, out, buf, bufLen);
+
+       // The last group may be short when the encoding is unpadded
+       char partial[8];
+       size_t total = bufLen / groupIn * groupOut;
+       if (bufLen % groupIn)
+          total += encode(ctx, partial, buf + bufLen / groupIn * groupIn, bufLen % groupIn);
+
+       char* o = out;
+       size_t pos = 0; // Position in the unwrapped output
+       while (pos < total) {
+          const size_t line_end = (total - pos < wrap) ? total : pos + wrap;
+
+          // A group split by the previous line break: its second half
+          if (pos % groupOut) {
+             const size_t g = pos / groupOut;
+             const size_t end = (g + 1) * groupIn < bufLen ? (g + 1) * groupIn : bufLen;
+             encode(ctx, partial, buf + g * groupIn, end - g * groupIn);
+             size_t take = groupOut - pos % groupOut;
+             if (take > line_end - pos) take = line_end - pos;
+             std::memcpy(o, partial + pos % groupOut, take);
+             o += take;
+             pos += take;
+          }
+
+          // Whole groups straight into place
+          const size_t whole = (line_end - pos) / groupOut;
+          if (whole) {
+             const size_t g = pos / groupOut;
+             const size_t end = (g + whole) * groupIn < bufLen ? (g + whole) * groupIn : bufLen;
+             o += encode(ctx, o, buf + g * groupIn, end - g * groupIn);
+             pos += whole * groupOut;
+          }
+
+          // A group split by this line break: its first half
+          if (pos < line_end) {
+             const size_t g = pos / groupOut;
+             const size_t end = (g + 1) * groupIn < bufLen ? (g + 1) * groupIn : bufLen;
+             encode(ctx, partial, buf + g * groupIn, end - g * groupIn);
+             std::memcpy(o, partial, line_end - pos);
+             o += line_end - pos;
+             pos = line_end;
+          }
+          *o++ = '\n';
+       }
+       return static_cast<size_t>(o - out);
+    }
+
+    inline size_t decode_skipping_whitespace(checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+                                             bool stopAtShortGroup, uint8_t* out, const char* in,
+                                             size_t inLen, size_t* invalid_at) {
+       detail::whitespace_decoder d(decode, ctx, groupIn, groupOut, stopAtShortGroup, out, in, inLen, invalid_at);
+       const uint8_t* u = reinterpret_cast<const uint8_t*>(in);
+       *invalid_at = inLen;
+
+       size_t i = 0;
+       while (i < inLen && !d.done) {
+          if (detail::is_wrap_whitespace(u[i])) {
+             ++i;
+             continue;
+          }
+          const size_t run_end = detail::wrap_run_end(u, i, inLen);
+          while (i < run_end && !d.done) {
+             if (d.padded && !d.after_padding(i))
+                break;
+             if (!d.used && run_end - i >= detail::whitespace_decoder::capacity) {
+                // Nothing is pending, so a long run (input without line
+                // breaks) decodes straight from the input
+                const size_t len = (run_end - i) / groupIn * groupIn;
+                d.decode_chunk(in + i, len, i, false);
+                i += len;
+                continue;
+             }
+             size_t take = detail::whitespace_decoder::capacity - d.used;
+             if (take > run_end - i) take = run_end - i;
+             d.append(i, take);
+             i += take;
+          }
+       }
+       if (!d.done)
+          d.flush(true);
+       return d.n;
+    }
+
+} // namespace b2t
+
+
+#endif // BIN2TEXT_WRAP_H
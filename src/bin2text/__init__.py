@@ -2,15 +2,164 @@
 
 __version__ = "0.1.0"
 
-# Import the compiled Cython modules
-from .base64 import Base64, base64_encode, base64_decode
-from .base32 import Base32, base32_encode, base32_decode
-from .base16 import Base16, base16_encode, base16_decode
-from .base128 import Base128, base128_encode, base128_decode
+import importlib
+import sys
+
+# Public names and the submodule defining each. Nothing is imported until a
+# name is first used, so ``import bin2text`` loads no extension module (or
+# asyncio), and a process using one codec never loads the others.
+_EXPORTS = {
+    'base64': (
+        'Base64', 'Base64Encoder', 'Base64Decoder',
+        'base64_encode', 'base64_decode', 'base64_decode_to_bytes',
+        'base64url_encode', 'base64url_decode', 'base64url_decode_to_bytes',
+        'base64_encode_many', 'base64_decode_many',
+        'base64_encode_array', 'base64_decode_array',
+    ),
+    'base32': (
+        'Base32', 'Base32Encoder', 'Base32Decoder',
+        'base32_encode', 'base32_decode', 'base32_decode_to_bytes',
+        'base32hex_encode', 'base32hex_decode', 'base32hex_decode_to_bytes',
+        'base32_encode_many', 'base32_decode_many',
+        'base32_encode_array', 'base32_decode_array',
+    ),
+    'base16': (
+        'Base16', 'Base16Encoder', 'Base16Decoder',
+        'base16_encode', 'base16_decode', 'base16_decode_to_bytes',
+        'base16_encode_many', 'base16_decode_many',
+        'base16_encode_array', 'base16_decode_array',
+    ),
+    'base128': (
+        'Base128', 'Base128Encoder', 'Base128Decoder',
+        'base128_encode', 'base128_decode', 'base128_decode_to_bytes',
+        'base128_encode_many', 'base128_decode_many',
+        'base128_encode_array', 'base128_decode_array',
+    ),
+    'files': ('encode_file', 'decode_file'),
+    'aio': ('aencode', 'adecode', 'aencode_stream', 'adecode_stream'),
+    'registry': (
+        'encode', 'decode', 'get_codec',
+        'register_codec', 'unregister_codec', 'available_codecs', 'codec_spec', 'CodecSpec',
+    ),
+}
+_CODEC_MODULES = ('base64', 'base32', 'base16', 'base128')
+_NATIVE_MODULES = _CODEC_MODULES + ('_cyutility',)
+_LAZY = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return importlib.import_module('.' + name, __name__)
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+class _NativeFinder:
+    """Loads the codec modules from ``_native`` in a single-extension build.
+
+    Built with ``-DBIN2TEXT_SINGLE_EXTENSION=ON``, every codec is linked into
+    that one shared object, each keeping its own ``PyInit_<codec>`` and
+    module state, along with the ``_cyutility`` Cython runtime they share
+    when Cython >= 3.1 built them. This finder runs after the regular ones,
+    so it is only consulted when there are no separate codec modules.
+    """
+
+    _origin = None
+
+    @classmethod
+    def find_spec(cls, fullname, path=None, target=None):
+        package, _, name = fullname.rpartition('.')
+        if package != __name__ or name not in _NATIVE_MODULES:
+            return None
+        import importlib.machinery
+        import importlib.util
+        if cls._origin is None:
+            spec = importlib.util.find_spec(__name__ + '._native')
+            if spec is None or spec.origin is None:
+                return None
+            cls._origin = spec.origin
+        loader = importlib.machinery.ExtensionFileLoader(fullname, cls._origin)
+        return importlib.util.spec_from_file_location(fullname, cls._origin, loader=loader)
+
+
+sys.meta_path.append(_NativeFinder)
+
+
+def _codec_modules():
+    return [importlib.import_module('.' + name, __name__) for name in _CODEC_MODULES]
+
 
 __all__ = [
-    "Base64", "base64_encode", "base64_decode",
-    "Base32", "base32_encode", "base32_decode",
-    "Base16", "base16_encode", "base16_decode",
-    "Base128", "base128_encode", "base128_decode"
-]
\ No newline at end of file
+    "Base64", "Base64Encoder", "Base64Decoder",
+    "base64_encode", "base64_decode", "base64_encode_many", "base64_decode_many",
+    "base64_decode_to_bytes", "base64url_encode", "base64url_decode", "base64url_decode_to_bytes",
+    "base64_encode_array", "base64_decode_array",
+    "Base32", "Base32Encoder", "Base32Decoder",
+    "base32_encode", "base32_decode", "base32_encode_many", "base32_decode_many",
+    "base32_decode_to_bytes", "base32hex_encode", "base32hex_decode", "base32hex_decode_to_bytes",
+    "base32_encode_array", "base32_decode_array",
+    "Base16", "Base16Encoder", "Base16Decoder",
+    "base16_encode", "base16_decode", "base16_encode_many", "base16_decode_many",
+    "base16_decode_to_bytes", "base16_encode_array", "base16_decode_array",
+    "Base128", "Base128Encoder", "Base128Decoder",
+    "base128_encode", "base128_decode", "base128_encode_many", "base128_decode_many",
+    "base128_decode_to_bytes", "base128_encode_array", "base128_decode_array",
+    "encode_file", "decode_file",
+    "aencode", "adecode", "aencode_stream", "adecode_stream",
+    "encode", "decode", "get_codec",
+    "register_codec", "unregister_codec", "available_codecs", "codec_spec", "CodecSpec",
+    "get_nogil_threshold", "set_nogil_threshold",
+    "enable_stats", "stats", "reset_stats",
+]
+
+
+def get_nogil_threshold():
+    """Return the input size in bytes from which codec calls release the GIL."""
+    return importlib.import_module('.base64', __name__).get_nogil_threshold()
+
+
+def set_nogil_threshold(nbytes):
+    """Release the GIL in every codec for inputs of at least ``nbytes`` bytes.
+
+    ``0`` releases it for every call, ``sys.maxsize`` never releases it.
+    Each codec module also has its own ``set_nogil_threshold``.
+    """
+    for module in _codec_modules():
+        module.set_nogil_threshold(nbytes)
+
+
+def enable_stats(enabled=True):
+    """Start counting codec calls for :func:`stats`, or stop with ``enabled=False``.
+
+    Counting is off by default. While it is on, every encode and decode call
+    records its input and output sizes and its latency with a few atomic
+    additions, cheap enough to leave on in production.
+    """
+    for module in _codec_modules():
+        module.enable_stats(enabled)
+
+
+def stats():
+    """Return the call counters of every codec, e.g. ``stats()['base64']['decode']``.
+
+    Each operation reports ``calls``, ``bytes_in``, ``bytes_out``, the total
+    ``seconds`` spent in those calls and ``latency_ns``, a histogram where
+    entry ``i`` counts the calls that took from ``2**i`` up to ``2**(i + 1)``
+    nanoseconds (the last entry also counts anything slower). Batch calls
+    count once, stream ``update()``/``finalize()`` calls each count.
+    """
+    return {name: module.stats() for name, module in zip(_CODEC_MODULES, _codec_modules())}
+
+
+def reset_stats():
+    """Set every codec call counter back to zero."""
+    for module in _codec_modules():
+        module.reset_stats()
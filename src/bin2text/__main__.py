@@ -1,47 +1,138 @@
 """Command-line interface for bin2text."""
 
 import argparse
-from bin2text import (
-    base64_encode, base64_decode,
-    base32_encode, base32_decode,
-    base16_encode, base16_decode,
-    base128_encode, base128_decode
-)
+import contextlib
+import sys
+from bin2text.registry import available_codecs, codec_spec, get_codec
 
+# Bytes read per step when streaming; large enough that the native codecs
+# dominate and the per-chunk Python overhead disappears
+CHUNK_SIZE = 1 << 20
 
-def main():
+# Whitespace dropped from encoded input so wrapped files decode. Formats
+# registered as not wrappable (base128, which uses every 7-bit character,
+# whitespace included) are never wrapped and their input is decoded as is.
+WHITESPACE = b" \t\r\n\v\f"
+
+# Marks --encode/--decode given without a TEXT argument
+_STREAM = object()
+
+
+def _read_chunks(stream, size=CHUNK_SIZE):
+    """Yield ``size``-byte chunks from a binary stream until EOF."""
+    return iter(lambda: stream.read(size), b"")
+
+
+def _wrap(pieces, width):
+    """Split a stream of encoded pieces into newline-terminated lines of ``width`` characters.
+
+    Only for streamed output, whose pieces end anywhere in a line; a whole
+    input is wrapped by the codec's own ``encode(wrap=)`` instead.
+    """
+    pending = b""
+    for piece in pieces:
+        pending += piece
+        if len(pending) < width:
+            continue
+        end = len(pending) - len(pending) % width
+        yield b"".join(pending[i:i + width] + b"\n" for i in range(0, end, width))
+        pending = pending[end:]
+    if pending:
+        yield pending + b"\n"
+
+
+def _encode_stream(encoder, chunks):
+    for chunk in chunks:
+        yield encoder.update(chunk)
+    yield encoder.finalize()
+
+
+def _decode_stream(decoder, chunks, skip_whitespace):
+    for chunk in chunks:
+        if skip_whitespace:
+            chunk = chunk.translate(None, WHITESPACE)
+        yield decoder.update(chunk)
+    yield decoder.finalize()
+
+
+def stream(src, dst, format='base64', decode=False, wrap=0, chunk_size=CHUNK_SIZE):
+    """Encode (or decode) the binary stream ``src`` into ``dst`` chunk by chunk.
+
+    Encoded output is written raw; with ``wrap`` > 0 it is split into
+    newline-terminated lines of ``wrap`` characters. Whitespace in encoded
+    input is ignored, except for base128 whose alphabet includes it.
+    """
+    spec = codec_spec(format)
+    if wrap > 0 and not spec.wrappable:
+        raise ValueError(f"{format} output cannot be wrapped")
+    chunks = _read_chunks(src, chunk_size)
+    if decode:
+        pieces = _decode_stream(spec.new_decoder(), chunks, spec.wrappable)
+    else:
+        pieces = _encode_stream(spec.new_encoder(), chunks)
+        if wrap > 0:
+            pieces = _wrap(pieces, wrap)
+    for piece in pieces:
+        if piece:
+            dst.write(piece)
+
+
+def _open(stack, path, mode, default):
+    """Open ``path`` on ``stack``, or return ``default`` for ``None`` and ``-``."""
+    if path is None or path == '-':
+        return default
+    return stack.enter_context(open(path, mode))
+
+
+def main(argv=None):
     """Command-line tool for bin2text with multiple encoding formats."""
     parser = argparse.ArgumentParser(description='Binary to text encoding/decoding tool')
-    parser.add_argument('--encode', '-e', type=str, help='Encode a string')
-    parser.add_argument('--decode', '-d', type=str, help='Decode an encoded string')
-    parser.add_argument('--format', '-f', type=str, choices=['base64', 'base32', 'base16', 'base128'],
+    parser.add_argument('--encode', '-e', type=str, nargs='?', const=_STREAM,
+                        help='Encode a string, or the input stream when TEXT is omitted')
+    parser.add_argument('--decode', '-d', type=str, nargs='?', const=_STREAM,
+                        help='Decode an encoded string, or the input stream when TEXT is omitted')
+    parser.add_argument('--format', '-f', type=str, choices=available_codecs(),
                         default='base64', help='Encoding format (default: base64)')
+    parser.add_argument('--input', '-i', type=str, default=None,
+                        help='Input file to stream (default: stdin)')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='Output file for the raw result (default: stdout)')
+    parser.add_argument('--wrap', '-w', type=int, default=0, metavar='COLS',
+                        help='Wrap encoded output after COLS characters (default: 0, no wrapping)')
+
+    args = parser.parse_args(argv)
+
+    if args.wrap < 0:
+        parser.error('--wrap must be non-negative')
+    if args.wrap and not codec_spec(args.format).wrappable:
+        parser.error(f'--wrap is not supported for {args.format}')
+    if args.encode is not None and args.decode is not None:
+        parser.error('--encode and --decode are mutually exclusive')
+
+    streaming = args.encode is _STREAM or args.decode is _STREAM
+    if not streaming and (args.input is not None or args.output is not None):
+        parser.error('--input/--output stream data; pass --encode or --decode without TEXT')
 
-    args = parser.parse_args()
-
-    if args.encode:
-        if args.format == 'base64':
-            result = base64_encode(args.encode)
-        elif args.format == 'base32':
-            result = base32_encode(args.encode)
-        elif args.format == 'base16':
-            result = base16_encode(args.encode)
-        elif args.format == 'base128':
-            result = base128_encode(args.encode)
+    if streaming:
+        with contextlib.ExitStack() as stack:
+            src = _open(stack, args.input, 'rb', sys.stdin.buffer)
+            dst = _open(stack, args.output, 'wb', sys.stdout.buffer)
+            stream(src, dst, args.format, decode=args.decode is _STREAM, wrap=args.wrap)
+            dst.flush()
+    elif args.encode:
+        codec = get_codec(args.format)
+        if args.wrap:
+            # Wrapped in the same native pass; drop the final newline print adds
+            result = codec.encode(args.encode, wrap=args.wrap).rstrip("\n")
+        else:
+            result = codec.encode(args.encode)
         print(f"Encoded ({args.format}): {result}")
     elif args.decode:
-        if args.format == 'base64':
-            result = base64_decode(args.decode)
-        elif args.format == 'base32':
-            result = base32_decode(args.decode)
-        elif args.format == 'base16':
-            result = base16_decode(args.decode)
-        elif args.format == 'base128':
-            result = base128_decode(args.decode)
+        result = get_codec(args.format).decode(args.decode)
         print(f"Decoded ({args.format}): {result}")
     else:
         parser.print_help()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,966 @@
+# cython: language_level=3
+
+"""
+Buffer helpers shared by the codec modules
+"""
+
+from cpython.array cimport array, clone
+from cpython.buffer cimport (
+    PyObject_CheckBuffer, PyObject_GetBuffer, PyBuffer_Release, PyBUF_SIMPLE, PyBUF_READ,
+)
+from cpython.bytes cimport PyBytes_AS_STRING
+from cpython.mem cimport PyMem_Malloc, PyMem_Free
+from cpython.memoryview cimport PyMemoryView_FromMemory
+from cpython.object cimport PyObject
+from cpython.ref cimport Py_DECREF
+from cpython.unicode cimport (
+    PyUnicode_New, PyUnicode_1BYTE_DATA, PyUnicode_DecodeUTF8, PyUnicode_AsUTF8AndSize,
+)
+from libc.stdint cimport uint64_t
+from libc.string cimport memcpy
+from libcpp.vector cimport vector
+
+
+cdef extern from "Python.h":
+    # Declared here with raw pointers so the result can be resized in place
+    # while we still hold the only reference to it.
+    PyObject* PyBytes_FromStringAndSize(const char* v, Py_ssize_t size) except NULL
+    int _PyBytes_Resize(PyObject** string, Py_ssize_t newsize) except -1
+
+
+# Signatures shared by every b2t::*_encode_into / b2t::*_decode_into kernel,
+# as the drivers in parallel.h take them: with a leading context pointer
+# (the alphabet of a b2t::codec_variant) passed through untouched
+ctypedef size_t (*encode_into_fn)(const void* ctx, char* out, const unsigned char* buf,
+                                  size_t bufLen) noexcept nogil
+ctypedef size_t (*decode_into_fn)(const void* ctx, unsigned char* out, const char* buf,
+                                  size_t bufLen) noexcept nogil
+# ... the *_decode_into overloads that also report the first invalid character
+ctypedef size_t (*checked_decode_into_fn)(const void* ctx, unsigned char* out, const char* buf,
+                                          size_t bufLen, size_t* invalid_at) noexcept nogil
+# ... and by the b2t::*_encoded_length / b2t::*_max_decoded_length helpers
+ctypedef size_t (*length_fn)(const void* ctx, size_t n) noexcept nogil
+
+
+cdef extern from "parallel.h" nogil:
+    size_t parallel_encode_into "b2t::parallel_encode_into"(
+        encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+        char* out, const unsigned char* buf, size_t bufLen, unsigned workers)
+    size_t parallel_decode_into "b2t::parallel_decode_into"(
+        decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+        bint stopAtShortGroup, unsigned char* out, const char* buf, size_t inLen, unsigned workers)
+    size_t parallel_checked_decode_into "b2t::parallel_decode_into"(
+        checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+        bint stopAtShortGroup, unsigned char* out, const char* buf, size_t inLen, unsigned workers,
+        size_t* invalid_at)
+
+
+cdef extern from "wrap.h" nogil:
+    size_t wrapped_length "b2t::wrapped_length"(size_t encodedLen, size_t wrap)
+    size_t encode_wrapped_into "b2t::encode_wrapped_into"(
+        encode_into_fn encode, const void* ctx, size_t groupIn, size_t groupOut,
+        char* out, const unsigned char* buf, size_t bufLen, size_t wrap)
+    size_t decode_skipping_whitespace "b2t::decode_skipping_whitespace"(
+        checked_decode_into_fn decode, const void* ctx, size_t groupIn, size_t groupOut,
+        bint stopAtShortGroup, unsigned char* out, const char* buf, size_t inLen, size_t* invalid_at)
+
+
+cdef extern from "variants.h" nogil:
+    # The kernels of one alphabet variant (b2t::base64_variant and friends)
+    ctypedef struct codec_variant "b2t::codec_variant":
+        encode_into_fn encode
+        decode_into_fn decode
+        checked_decode_into_fn checked
+        length_fn encoded_length
+        const void* ctx
+
+
+cdef extern from "stats.h" nogil:
+    # Call, byte and latency counters of one codec operation
+    cppclass op_stats "b2t::op_stats":
+        pass
+    ctypedef struct op_stats_snapshot "b2t::op_stats_snapshot":
+        uint64_t calls
+        uint64_t bytes_in
+        uint64_t bytes_out
+        uint64_t nanoseconds
+        uint64_t latency[36]
+    const unsigned stats_buckets "b2t::stats_buckets"
+    uint64_t stats_clock "b2t::stats_clock"()
+    void stats_record "b2t::stats_record"(op_stats& s, uint64_t start, size_t bytesIn, size_t bytesOut)
+    void stats_snapshot "b2t::stats_snapshot"(const op_stats& s, op_stats_snapshot& out)
+    void stats_reset "b2t::stats_reset"(op_stats& s)
+
+
+# How a codec instance splits large inputs across threads
+cdef struct parallel_config:
+    unsigned workers            # 1 (or 0) keeps everything on the calling thread
+    size_t bytes_per_group      # input bytes per encoded group ...
+    size_t chars_per_group      # ... and the characters they encode to
+    bint stop_at_padding        # the decoder stops at the first padded group
+
+
+# Output memory a codec instance keeps between calls, for results that are
+# built somewhere first and then copied into the returned object
+cdef struct scratch_buffer:
+    char* data
+    size_t capacity
+    size_t limit                # a buffer grown past this is freed after the call
+    bint busy                   # in use by a call that released the GIL
+
+
+# Inputs of at least this many bytes are processed with the GIL released.
+# Below it the release/reacquire round trip costs more than it saves; this
+# is the same cut-off CPython's hashlib uses.
+cdef enum:
+    DEFAULT_NOGIL_THRESHOLD = 2048
+
+
+# Scratch memory up to this size is kept by a codec instance between calls
+cdef enum:
+    DEFAULT_SCRATCH_LIMIT = 1 << 20
+
+
+cdef inline int scratch_init(scratch_buffer* scratch, object limit) except -1:
+    """Set up an empty scratch buffer for the ``scratch_limit`` codec argument."""
+    scratch.limit = DEFAULT_SCRATCH_LIMIT if limit is None else check_length(limit)
+    return 0
+
+
+cdef inline void scratch_free(scratch_buffer* scratch) noexcept:
+    PyMem_Free(scratch.data)
+    scratch.data = NULL
+    scratch.capacity = 0
+
+
+cdef inline char* scratch_acquire(scratch_buffer* scratch, size_t n) except NULL:
+    """Return room for ``n`` bytes, reusing the buffer left by earlier calls.
+
+    A call already using the buffer (from another thread, while it runs
+    without the GIL) gets memory of its own instead. Hand the result back
+    with scratch_done.
+    """
+    cdef char* data
+    if scratch.busy:
+        data = <char*>PyMem_Malloc(n if n else 1)
+        if data == NULL:
+            raise MemoryError()
+        return data
+    if n > scratch.capacity or scratch.data == NULL:
+        scratch_free(scratch)
+        # Grow geometrically, so slowly growing payloads reallocate rarely
+        if n < 2 * scratch.capacity:
+            n = 2 * scratch.capacity
+        scratch.data = <char*>PyMem_Malloc(n if n else 1)
+        if scratch.data == NULL:
+            raise MemoryError()
+        scratch.capacity = n
+    scratch.busy = True
+    return scratch.data
+
+
+cdef inline void scratch_done(scratch_buffer* scratch, char* data) noexcept:
+    """Hand back memory from scratch_acquire, freeing it if it was a one-off or too large."""
+    if data != scratch.data:
+        PyMem_Free(data)
+        return
+    scratch.busy = False
+    if scratch.capacity > scratch.limit:
+        scratch_free(scratch)
+
+
+cdef inline const unsigned char[::1] as_byte_view(object data) except *:
+    """Return a contiguous read-only byte view over ``data`` without copying.
+
+    ``str`` is read as UTF-8 and objects without the buffer protocol go
+    through ``str()`` first, matching the historical ``encode`` behaviour.
+    An ASCII ``str`` is its own UTF-8, so the view is over the string's
+    characters; other strings are viewed through the UTF-8 copy CPython
+    caches on them. Either way the caller's reference keeps the memory
+    alive while the view is in use.
+    """
+    cdef const char* ptr
+    cdef Py_ssize_t size
+    if isinstance(data, str):
+        ptr = PyUnicode_AsUTF8AndSize(data, &size)
+        return PyMemoryView_FromMemory(<char*>ptr, size, PyBUF_READ)
+    if not PyObject_CheckBuffer(data):
+        return str(data).encode('utf-8')
+    try:
+        return data
+    except (ValueError, BufferError):
+        # Non-byte item formats (array.array('i'), float ndarrays, ...) or
+        # non-contiguous layouts: reinterpret as raw bytes, copying only
+        # when the exporter is not C-contiguous.
+        view = memoryview(data)
+        if not view.c_contiguous:
+            return view.tobytes()
+        return view.cast('B')
+
+
+cdef inline const unsigned char* byte_ptr(const unsigned char[::1] view) noexcept nogil:
+    """Pointer to the first byte of ``view`` or NULL when it is empty."""
+    if view.shape[0] == 0:
+        return NULL
+    return &view[0]
+
+
+cdef inline unsigned char[::1] as_writable_byte_view(object out) except *:
+    """Return a contiguous writable byte view over the caller's ``out`` buffer."""
+    try:
+        return out
+    except ValueError:
+        # Same reinterpretation as as_byte_view, but never copy: the caller
+        # has to see what we write.
+        return memoryview(out).cast('B')
+
+
+cdef inline int check_capacity(size_t available, size_t needed) except -1:
+    """Raise ValueError when an output buffer cannot hold ``needed`` bytes."""
+    if available < needed:
+        raise ValueError(
+            f"output buffer too small: need {needed} bytes, got {available}")
+    return 0
+
+
+cdef inline size_t check_length(Py_ssize_t n) except? 0:
+    """Validate a length argument for the ``*_length`` helpers."""
+    if n < 0:
+        raise ValueError("length must be non-negative")
+    return <size_t>n
+
+
+cdef inline size_t check_wrap(Py_ssize_t wrap) except? 0:
+    """Validate a ``wrap`` line length (0 disables wrapping)."""
+    if wrap < 0:
+        raise ValueError("wrap must be non-negative")
+    return <size_t>wrap
+
+
+cdef inline unsigned resolve_workers(object parallel, object workers) except 0:
+    """Thread count for the ``parallel``/``workers`` codec arguments."""
+    if workers is None:
+        if not parallel:
+            return 1
+        import os
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    return workers
+
+
+cdef inline uint64_t stats_start(op_stats* stats) noexcept nogil:
+    """Start timing a call counted in ``stats``; NULL (stats disabled) costs nothing."""
+    return stats_clock() if stats != NULL else 0
+
+
+cdef inline void stats_stop(op_stats* stats, uint64_t start, size_t bytes_in,
+                            size_t bytes_out) noexcept nogil:
+    """Count a call started by stats_start in ``stats``."""
+    if stats != NULL:
+        stats_record(stats[0], start, bytes_in, bytes_out)
+
+
+cdef inline dict stats_dict(op_stats* stats):
+    """The counters of ``stats`` as the dict ``stats()`` returns for one operation."""
+    cdef op_stats_snapshot snap
+    stats_snapshot(stats[0], snap)
+    return {
+        'calls': snap.calls,
+        'bytes_in': snap.bytes_in,
+        'bytes_out': snap.bytes_out,
+        'seconds': snap.nanoseconds / 1e9,
+        'latency_ns': [snap.latency[i] for i in range(stats_buckets)],
+    }
+
+
+cdef inline size_t run_encode(encode_into_fn kernel, const void* ctx, char* out,
+                              const unsigned char[::1] view, size_t nogil_threshold,
+                              const parallel_config* parallel=NULL):
+    """Run an encode kernel, without the GIL when ``view`` reaches the threshold.
+
+    With a ``parallel`` config of more than one worker, large inputs are
+    split on group boundaries and encoded on that many threads.
+    """
+    cdef size_t n = view.shape[0]
+    cdef bint threaded = parallel != NULL and parallel.workers > 1
+    if n < nogil_threshold and not threaded:
+        return kernel(ctx, out, byte_ptr(view), n)
+    with nogil:
+        if threaded:
+            n = parallel_encode_into(kernel, ctx, parallel.bytes_per_group, parallel.chars_per_group,
+                                     out, byte_ptr(view), n, parallel.workers)
+        else:
+            n = kernel(ctx, out, byte_ptr(view), n)
+    return n
+
+
+cdef inline size_t run_decode(decode_into_fn kernel, const void* ctx, unsigned char* out,
+                              const unsigned char[::1] view, size_t nogil_threshold,
+                              const parallel_config* parallel=NULL):
+    """Run a decode kernel, without the GIL when ``view`` reaches the threshold.
+
+    ``parallel`` works as for run_encode.
+    """
+    cdef size_t n = view.shape[0]
+    cdef bint threaded = parallel != NULL and parallel.workers > 1
+    if n < nogil_threshold and not threaded:
+        return kernel(ctx, out, <const char*>byte_ptr(view), n)
+    with nogil:
+        if threaded:
+            n = parallel_decode_into(kernel, ctx, parallel.chars_per_group, parallel.bytes_per_group,
+                                     parallel.stop_at_padding, out,
+                                     <const char*>byte_ptr(view), n, parallel.workers)
+        else:
+            n = kernel(ctx, out, <const char*>byte_ptr(view), n)
+    return n
+
+
+cdef inline size_t run_checked_decode(checked_decode_into_fn kernel, const void* ctx, unsigned char* out,
+                                      const unsigned char[::1] view, size_t nogil_threshold,
+                                      const parallel_config* parallel, size_t* invalid_at):
+    """Like run_decode, and store the offset of the first invalid character in ``invalid_at``."""
+    cdef size_t n = view.shape[0]
+    cdef bint threaded = parallel != NULL and parallel.workers > 1
+    if n < nogil_threshold and not threaded:
+        return kernel(ctx, out, <const char*>byte_ptr(view), n, invalid_at)
+    with nogil:
+        if threaded:
+            n = parallel_checked_decode_into(kernel, ctx, parallel.chars_per_group, parallel.bytes_per_group,
+                                             parallel.stop_at_padding, out,
+                                             <const char*>byte_ptr(view), n, parallel.workers,
+                                             invalid_at)
+        else:
+            n = kernel(ctx, out, <const char*>byte_ptr(view), n, invalid_at)
+    return n
+
+
+cdef inline size_t run_encode_wrapped(encode_into_fn kernel, const void* ctx, char* out,
+                                      const unsigned char[::1] view, size_t nogil_threshold,
+                                      const parallel_config* parallel, size_t wrap):
+    """Run an encode kernel line by line, with a newline after every ``wrap`` characters.
+
+    ``parallel`` only supplies the codec's group sizes; the lines are
+    written on the calling thread, without the GIL from the threshold on.
+    """
+    cdef size_t n = view.shape[0]
+    if n < nogil_threshold:
+        return encode_wrapped_into(kernel, ctx, parallel.bytes_per_group, parallel.chars_per_group,
+                                   out, byte_ptr(view), n, wrap)
+    with nogil:
+        n = encode_wrapped_into(kernel, ctx, parallel.bytes_per_group, parallel.chars_per_group,
+                                out, byte_ptr(view), n, wrap)
+    return n
+
+
+cdef inline size_t run_decode_skipping_whitespace(checked_decode_into_fn kernel, const void* ctx,
+                                                  unsigned char* out, const unsigned char[::1] view,
+                                                  size_t nogil_threshold, const parallel_config* parallel,
+                                                  size_t* invalid_at):
+    """Like run_checked_decode, with ASCII whitespace in ``view`` skipped.
+
+    As for run_encode_wrapped, ``parallel`` only supplies the group sizes.
+    """
+    cdef size_t n = view.shape[0]
+    if n < nogil_threshold:
+        return decode_skipping_whitespace(kernel, ctx, parallel.chars_per_group, parallel.bytes_per_group,
+                                          parallel.stop_at_padding, out,
+                                          <const char*>byte_ptr(view), n, invalid_at)
+    with nogil:
+        n = decode_skipping_whitespace(kernel, ctx, parallel.chars_per_group, parallel.bytes_per_group,
+                                       parallel.stop_at_padding, out,
+                                       <const char*>byte_ptr(view), n, invalid_at)
+    return n
+
+
+cdef inline int check_decoded(str codec, const unsigned char[::1] view, size_t invalid_at) except -1:
+    """Raise ValueError for the invalid character a strict decode found at ``invalid_at``."""
+    if invalid_at < <size_t>view.shape[0]:
+        raise ValueError(
+            f"invalid {codec} character {bytes([view[invalid_at]])!r} at offset {invalid_at}")
+    return 0
+
+
+cdef inline bytes encode_to_new_bytes(encode_into_fn kernel, const void* ctx, const unsigned char[::1] view,
+                                      size_t length, size_t nogil_threshold,
+                                      const parallel_config* parallel=NULL, size_t wrap=0,
+                                      op_stats* stats=NULL):
+    """Encode ``view`` straight into a new bytes object of exactly ``length`` bytes.
+
+    With ``wrap``, ``length`` is the unwrapped length and the output is
+    split into lines of ``wrap`` characters, each ended by a newline, in the
+    same pass (``parallel`` is then required for its group sizes).
+    The call is counted in ``stats`` unless it is NULL, as for every helper
+    below that takes it.
+    """
+    cdef uint64_t start = stats_start(stats)
+    if wrap:
+        length = wrapped_length(length, wrap)
+    cdef PyObject* raw = PyBytes_FromStringAndSize(NULL, length)
+    result = <bytes>raw
+    Py_DECREF(result)
+    if length and wrap:
+        run_encode_wrapped(kernel, ctx, PyBytes_AS_STRING(result), view, nogil_threshold, parallel, wrap)
+    elif length:
+        run_encode(kernel, ctx, PyBytes_AS_STRING(result), view, nogil_threshold, parallel)
+    stats_stop(stats, start, view.shape[0], length)
+    return result
+
+
+cdef inline size_t run_decode_any(decode_into_fn kernel, const void* ctx, unsigned char* out,
+                                  const unsigned char[::1] view, size_t capacity,
+                                  size_t nogil_threshold, const parallel_config* parallel,
+                                  checked_decode_into_fn checked, bint strict,
+                                  bint ignore_whitespace, size_t* invalid_at):
+    """Decode ``view`` into ``out`` as decode_to_new_bytes describes.
+
+    ``invalid_at`` is set to the offset of the first invalid character when
+    ``strict``, or to the length of ``view``.
+    """
+    cdef size_t n = 0
+    invalid_at[0] = view.shape[0]
+    if ignore_whitespace:
+        n = run_decode_skipping_whitespace(checked, ctx, out, view, nogil_threshold, parallel, invalid_at)
+        if not strict:
+            invalid_at[0] = view.shape[0]
+    elif strict:
+        # Even input too short to decode to anything has to be validated
+        n = run_checked_decode(checked, ctx, out, view, nogil_threshold, parallel, invalid_at)
+    elif capacity:
+        n = run_decode(kernel, ctx, out, view, nogil_threshold, parallel)
+    return n
+
+
+cdef inline bytes decode_to_new_bytes(decode_into_fn kernel, const void* ctx, const unsigned char[::1] view,
+                                      size_t capacity, size_t nogil_threshold,
+                                      const parallel_config* parallel=NULL,
+                                      checked_decode_into_fn checked=NULL, str codec=None,
+                                      bint strict=False, bint ignore_whitespace=False,
+                                      op_stats* stats=NULL):
+    """Decode ``view`` straight into a new bytes object of at most ``capacity`` bytes.
+
+    The bytes object is allocated once, filled by the kernel and shrunk in
+    place to the decoded size, so the cost is linear in the input. The
+    kernel runs without the GIL when the input reaches ``nogil_threshold``.
+    With ``strict``, the ``checked`` kernel is used instead and invalid
+    input raises ValueError (see check_decoded). With ``ignore_whitespace``,
+    the ``checked`` kernel runs on the whitespace-free runs of ``view``.
+    """
+    cdef uint64_t start = stats_start(stats)
+    cdef PyObject* raw = PyBytes_FromStringAndSize(NULL, capacity)
+    cdef size_t invalid_at
+    cdef size_t n = run_decode_any(kernel, ctx, <unsigned char*>PyBytes_AS_STRING(<object>raw), view,
+                                   capacity, nogil_threshold, parallel, checked, strict,
+                                   ignore_whitespace, &invalid_at)
+    if n != capacity:
+        _PyBytes_Resize(&raw, n)
+    result = <bytes>raw
+    Py_DECREF(result)
+    stats_stop(stats, start, view.shape[0], n)
+    check_decoded(codec, view, invalid_at)
+    return result
+
+
+cdef inline str encode_to_str(encode_into_fn kernel, const void* ctx, const unsigned char[::1] view,
+                              size_t length, size_t nogil_threshold,
+                              const parallel_config* parallel, size_t wrap,
+                              op_stats* stats=NULL):
+    """Like encode_to_new_bytes, but return the text as ``str``.
+
+    Encoders only write ASCII, so the characters go straight into a compact
+    ASCII str allocated at the exact length: no intermediate buffer, copy
+    or decoding pass.
+    """
+    cdef uint64_t start = stats_start(stats)
+    if wrap:
+        length = wrapped_length(length, wrap)
+    result = PyUnicode_New(length, 127)
+    cdef char* out = <char*>PyUnicode_1BYTE_DATA(result)
+    if length and wrap:
+        run_encode_wrapped(kernel, ctx, out, view, nogil_threshold, parallel, wrap)
+    elif length:
+        run_encode(kernel, ctx, out, view, nogil_threshold, parallel)
+    stats_stop(stats, start, view.shape[0], length)
+    return result
+
+
+cdef inline str decode_to_str(decode_into_fn kernel, const void* ctx, const unsigned char[::1] view,
+                              size_t capacity, size_t nogil_threshold,
+                              const parallel_config* parallel, checked_decode_into_fn checked,
+                              str codec, bint strict, bint ignore_whitespace,
+                              scratch_buffer* scratch, op_stats* stats=NULL):
+    """Like decode_to_new_bytes, but return the decoded bytes read as UTF-8.
+
+    The bytes are decoded into ``scratch`` and read from there, so no
+    intermediate bytes object is made.
+    """
+    cdef uint64_t start = stats_start(stats)
+    cdef char* out = scratch_acquire(scratch, capacity)
+    cdef size_t invalid_at, n
+    try:
+        n = run_decode_any(kernel, ctx, <unsigned char*>out, view, capacity, nogil_threshold, parallel,
+                           checked, strict, ignore_whitespace, &invalid_at)
+        stats_stop(stats, start, view.shape[0], n)
+        check_decoded(codec, view, invalid_at)
+        return PyUnicode_DecodeUTF8(out, n, NULL)
+    finally:
+        scratch_done(scratch, out)
+
+
+# One input of a batch: a pointer into an object the batch keeps alive
+cdef struct byte_span:
+    const unsigned char* ptr
+    size_t len
+
+
+cdef inline object acquire_batch(object items, vector[byte_span]& spans,
+                                 vector[Py_buffer]& bufs):
+    """Collect a byte span for every item of ``items``, read as as_byte_view would.
+
+    ``bytes`` and ``str`` are read in place (``str`` through its cached UTF-8
+    form); other exporters are held in ``bufs``, which the caller releases
+    with release_batch even when this raises. Returns a tuple snapshot of
+    the items, which keeps every one alive while the caller reads them,
+    without the GIL, even if another thread empties ``items`` meanwhile.
+    """
+    cdef Py_buffer buf
+    cdef Py_ssize_t size
+    cdef const char* ptr
+    try:
+        seq = tuple(items)
+    except TypeError:
+        raise TypeError("expected an iterable of str or bytes-like objects") from None
+    spans.reserve(len(seq))
+    for item in seq:
+        if type(item) is bytes:
+            spans.push_back(byte_span(<const unsigned char*>PyBytes_AS_STRING(item),
+                                      len(<bytes>item)))
+            continue
+        if isinstance(item, str):
+            ptr = PyUnicode_AsUTF8AndSize(item, &size)
+            spans.push_back(byte_span(<const unsigned char*>ptr, size))
+            continue
+        if not PyObject_CheckBuffer(item):
+            item = str(item).encode('utf-8')
+        try:
+            PyObject_GetBuffer(item, &buf, PyBUF_SIMPLE)
+        except BufferError:
+            # Non-contiguous exporters are copied, as in as_byte_view
+            PyObject_GetBuffer(memoryview(item).tobytes(), &buf, PyBUF_SIMPLE)
+        bufs.push_back(buf)
+        spans.push_back(byte_span(<const unsigned char*>buf.buf, buf.len))
+    return seq
+
+
+cdef inline void release_batch(vector[Py_buffer]& bufs) noexcept:
+    cdef size_t i
+    for i in range(bufs.size()):
+        PyBuffer_Release(&bufs[i])
+    bufs.clear()
+
+
+cdef inline void encode_batch(encode_into_fn kernel, const void* ctx, char* out, const byte_span* spans,
+                              size_t n, long long* offsets) noexcept nogil:
+    """Encode ``n`` spans back to back into ``out``, recording where each starts."""
+    cdef size_t i, pos = 0
+    for i in range(n):
+        offsets[i] = pos
+        pos += kernel(ctx, out + pos, spans[i].ptr, spans[i].len)
+    offsets[n] = pos
+
+
+cdef inline void decode_batch(decode_into_fn kernel, const void* ctx, unsigned char* out,
+                              const byte_span* spans, size_t n, long long* offsets) noexcept nogil:
+    """Decode ``n`` spans back to back into ``out``, recording where each starts.
+
+    Every item starts at or before the sum of the previous items' maximum
+    decoded lengths, so each kernel has its full scratch space.
+    """
+    cdef size_t i, pos = 0
+    for i in range(n):
+        offsets[i] = pos
+        pos += kernel(ctx, out + pos, <const char*>spans[i].ptr, spans[i].len)
+    offsets[n] = pos
+
+
+cdef inline tuple encode_many_packed(encode_into_fn kernel, const void* ctx, length_fn encoded_length,
+                                     object items, size_t nogil_threshold, op_stats* stats=NULL):
+    """Encode every item of ``items`` into one bytes object in a single native loop.
+
+    Returns ``(packed, offsets)`` where item ``i`` is
+    ``packed[offsets[i]:offsets[i + 1]]`` and ``offsets`` is an
+    ``array('q')``. The loop runs without the GIL when the batch holds at
+    least ``nogil_threshold`` input bytes.
+    """
+    cdef vector[byte_span] spans
+    cdef vector[Py_buffer] bufs
+    cdef size_t i, n, total_in = 0, total_out = 0
+    cdef array offsets
+    cdef char* out
+    cdef uint64_t start = stats_start(stats)
+    try:
+        seq = acquire_batch(items, spans, bufs)
+        n = spans.size()
+        for i in range(n):
+            total_in += spans[i].len
+            total_out += encoded_length(ctx, spans[i].len)
+
+        offsets = clone(array('q'), n + 1, False)
+        result = <bytes>PyBytes_FromStringAndSize(NULL, total_out)
+        Py_DECREF(result)
+        out = PyBytes_AS_STRING(result)
+        if total_in < nogil_threshold:
+            encode_batch(kernel, ctx, out, spans.data(), n, offsets.data.as_longlongs)
+        else:
+            with nogil:
+                encode_batch(kernel, ctx, out, spans.data(), n, offsets.data.as_longlongs)
+        stats_stop(stats, start, total_in, total_out)
+        return result, offsets
+    finally:
+        release_batch(bufs)
+
+
+cdef inline tuple decode_many_packed(decode_into_fn kernel, const void* ctx, length_fn max_decoded_length,
+                                     object items, size_t nogil_threshold, op_stats* stats=NULL):
+    """Decode every item of ``items`` into one bytes object in a single native loop.
+
+    Same layout and GIL handling as encode_many_packed; the bytes object is
+    shrunk in place to the decoded size.
+    """
+    cdef vector[byte_span] spans
+    cdef vector[Py_buffer] bufs
+    cdef size_t i, n, total_in = 0, capacity = 0
+    cdef array offsets
+    cdef PyObject* raw
+    cdef unsigned char* out
+    cdef uint64_t start = stats_start(stats)
+    try:
+        seq = acquire_batch(items, spans, bufs)
+        n = spans.size()
+        for i in range(n):
+            total_in += spans[i].len
+            capacity += max_decoded_length(ctx, spans[i].len)
+
+        offsets = clone(array('q'), n + 1, False)
+        raw = PyBytes_FromStringAndSize(NULL, capacity)
+        out = <unsigned char*>PyBytes_AS_STRING(<object>raw)
+        if total_in < nogil_threshold:
+            decode_batch(kernel, ctx, out, spans.data(), n, offsets.data.as_longlongs)
+        else:
+            with nogil:
+                decode_batch(kernel, ctx, out, spans.data(), n, offsets.data.as_longlongs)
+        if <size_t>offsets.data.as_longlongs[n] != capacity:
+            _PyBytes_Resize(&raw, offsets.data.as_longlongs[n])
+        result = <bytes>raw
+        Py_DECREF(result)
+        stats_stop(stats, start, total_in, offsets.data.as_longlongs[n])
+        return result, offsets
+    finally:
+        release_batch(bufs)
+
+
+cdef inline str ascii_str(const char* chars, Py_ssize_t n):
+    """Copy ``n`` characters known to be ASCII into a new compact str, unchecked."""
+    result = PyUnicode_New(n, 127)
+    if n:
+        memcpy(PyUnicode_1BYTE_DATA(result), chars, n)
+    return result
+
+
+cdef inline list unpack_ascii(bytes packed, array offsets):
+    """Split a packed encode_many result into one ``str`` per item."""
+    cdef const char* base = PyBytes_AS_STRING(packed)
+    cdef const long long* offs = offsets.data.as_longlongs
+    cdef Py_ssize_t i, n = len(offsets) - 1
+    return [ascii_str(base + offs[i], offs[i + 1] - offs[i]) for i in range(n)]
+
+
+cdef inline list unpack_bytes(bytes packed, array offsets):
+    """Split a packed decode_many result into one ``bytes`` per item."""
+    cdef const char* base = PyBytes_AS_STRING(packed)
+    cdef const long long* offs = offsets.data.as_longlongs
+    cdef Py_ssize_t i, n = len(offsets) - 1
+    return [base[offs[i]:offs[i + 1]] for i in range(n)]
+
+
+cdef inline void encode_rows(encode_into_fn kernel, const void* ctx, char* out, size_t width,
+                             const unsigned char* buf, size_t rows, size_t row_len) noexcept nogil:
+    """Encode ``rows`` rows of ``row_len`` bytes into fixed ``width`` slots."""
+    cdef size_t i
+    for i in range(rows):
+        kernel(ctx, out + i * width, buf + i * row_len, row_len)
+
+
+cdef inline size_t decode_rows(decode_into_fn kernel, checked_decode_into_fn checked, const void* ctx,
+                               unsigned char* out, size_t row_len, const char* buf, size_t rows,
+                               size_t width, size_t* invalid_at) noexcept nogil:
+    """Decode ``rows`` slots of ``width`` characters into rows of ``row_len`` bytes.
+
+    Unless ``checked`` is NULL it runs instead of ``kernel``, and
+    ``invalid_at`` receives the offset of the first invalid character in
+    the returned row, or ``width``. Returns the index of the first row that
+    is invalid or does not decode to exactly ``row_len`` bytes, or ``rows``.
+    """
+    cdef size_t i, n
+    invalid_at[0] = width
+    for i in range(rows):
+        if checked:
+            n = checked(ctx, out + i * row_len, buf + i * width, width, invalid_at)
+            if invalid_at[0] != width:
+                return i
+        else:
+            n = kernel(ctx, out + i * row_len, buf + i * width, width)
+        if n != row_len:
+            return i
+    return rows
+
+
+cdef inline object import_numpy():
+    """Import NumPy, which only the array functions need, on their first call."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("the *_encode_array/*_decode_array functions need NumPy; "
+                          "install it with `pip install bin2text[numpy]`") from None
+    return numpy
+
+
+cdef inline object encode_array(encode_into_fn kernel, const void* ctx, length_fn encoded_length,
+                                object arr, size_t nogil_threshold, op_stats* stats=NULL):
+    """Encode every row of a 2-D ``uint8`` array into a 1-D fixed-width ``S`` array.
+
+    The rows are encoded in one native loop over the contiguous block,
+    without the GIL when it holds at least ``nogil_threshold`` bytes.
+    Rows of zero length raise ValueError, as NumPy has no zero-width ``S``
+    dtype. An empty array records its row length in the dtype's metadata,
+    so decode_array can restore it where padding makes the width ambiguous.
+    """
+    np = import_numpy()
+
+    cdef uint64_t start = stats_start(stats)
+    arr = np.ascontiguousarray(arr)
+    if arr.ndim != 2 or arr.dtype != np.uint8:
+        raise TypeError(f"expected a 2-D uint8 array, got a {arr.ndim}-D {arr.dtype} array")
+    cdef size_t rows = arr.shape[0], row_len = arr.shape[1]
+    if row_len == 0:
+        raise ValueError("cannot encode rows of zero length: NumPy has no zero-width S dtype")
+    cdef size_t width = encoded_length(ctx, row_len)
+    if rows == 0:
+        return np.zeros(0, dtype=np.dtype(f'S{width}', metadata={'row_len': row_len}))
+
+    out = np.empty(rows * width, dtype=np.uint8)
+    cdef const unsigned char[::1] src = arr.reshape(-1)
+    cdef unsigned char[::1] dst = out
+    if rows * row_len < nogil_threshold:
+        encode_rows(kernel, ctx, <char*>&dst[0], width, &src[0], rows, row_len)
+    else:
+        with nogil:
+            encode_rows(kernel, ctx, <char*>&dst[0], width, &src[0], rows, row_len)
+    stats_stop(stats, start, rows * row_len, rows * width)
+    return out.view(f'S{width}')
+
+
+cdef inline object decode_array(decode_into_fn kernel, const void* ctx, length_fn encoded_length,
+                                length_fn max_decoded_length, object arr, size_t nogil_threshold,
+                                checked_decode_into_fn checked=NULL, str codec=None,
+                                bint strict=False, op_stats* stats=NULL):
+    """Decode a 1-D fixed-width ``S`` (or ASCII ``U``) array into a 2-D ``uint8`` array.
+
+    Every element must decode to the same number of bytes, which becomes
+    the number of columns; ValueError names the first row that does not.
+    An empty array takes its column count from the row length encode_array
+    records in its dtype, or else from the shortest row that encodes to its
+    width. With ``strict``, the ``checked`` kernel is used and ValueError
+    names the first invalid character.
+    """
+    np = import_numpy()
+
+    cdef uint64_t start = stats_start(stats)
+    arr = np.asarray(arr)
+    if arr.dtype.kind == 'U':
+        arr = arr.astype('S')
+    if arr.ndim != 1 or arr.dtype.kind != 'S':
+        raise TypeError(f"expected a 1-D S or U array, got a {arr.ndim}-D {arr.dtype} array")
+    arr = np.ascontiguousarray(arr)
+    cdef size_t rows = arr.shape[0], width = arr.dtype.itemsize
+    cdef size_t capacity = max_decoded_length(ctx, width)
+    cdef size_t row_len, bad, invalid_at = width
+    cdef checked_decode_into_fn check = checked if strict else NULL
+    if rows == 0:
+        metadata = arr.dtype.metadata or {}
+        row_len = metadata.get('row_len', 0)
+        if row_len > capacity or encoded_length(ctx, row_len) != width:
+            row_len = 0
+            while row_len < capacity and encoded_length(ctx, row_len) < width:
+                row_len += 1
+            while row_len and encoded_length(ctx, row_len) > width:
+                row_len -= 1
+        return np.zeros((0, row_len), dtype=np.uint8)
+
+    # Row 0 fixes the column count; every later row is decoded right after
+    # the previous one, with the rest of the buffer as kernel scratch space
+    # (one byte more, so there is a buffer even when rows decode to nothing)
+    out = np.empty(rows * capacity + 1, dtype=np.uint8)
+    cdef const unsigned char[::1] src = arr.view(np.uint8)
+    cdef unsigned char[::1] dst = out
+    if check:
+        row_len = check(ctx, &dst[0], <const char*>&src[0], width, &invalid_at)
+    else:
+        row_len = kernel(ctx, &dst[0], <const char*>&src[0], width)
+    bad = 0
+    if invalid_at == width:
+        if rows * width < nogil_threshold:
+            bad = decode_rows(kernel, check, ctx, &dst[0], row_len, <const char*>&src[0], rows, width,
+                              &invalid_at)
+        else:
+            with nogil:
+                bad = decode_rows(kernel, check, ctx, &dst[0], row_len, <const char*>&src[0], rows,
+                                  width, &invalid_at)
+    if invalid_at != width:
+        raise ValueError(f"invalid {codec} character {bytes([src[bad * width + invalid_at]])!r} "
+                         f"at offset {invalid_at} of row {bad}")
+    if bad != rows:
+        raise ValueError(f"row {bad} decodes to a different length than row 0 ({row_len} bytes)")
+    stats_stop(stats, start, rows * width, rows * row_len)
+    return out[:rows * row_len].reshape(rows, row_len)
+
+
+# State of an incremental encoder or decoder: the partial group held back
+# from the last update() until the rest of it arrives
+cdef struct stream_state:
+    unsigned char carry[8]
+    size_t carry_len
+    size_t group            # input bytes (encoders) or characters (decoders) per group
+    bint stop_at_padding    # a padded group ends the input, as in base32_decode_into
+    bint finished
+
+
+cdef inline void stream_init(stream_state* st, size_t group, bint stop_at_padding=False) noexcept:
+    st.carry_len = 0
+    st.group = group
+    st.stop_at_padding = stop_at_padding
+    st.finished = False
+
+
+cdef inline size_t stream_split(stream_state* st, size_t n) noexcept:
+    """Return how many of ``n`` new bytes complete whole groups; hold back the rest."""
+    cdef size_t total = st.carry_len + n
+    return total - total % st.group - st.carry_len if total >= st.group else 0
+
+
+cdef inline bytes stream_encode(encode_into_fn kernel, const void* ctx, length_fn encoded_length,
+                                stream_state* st, object chunk, size_t nogil_threshold,
+                                op_stats* stats=NULL):
+    """Encode the whole groups completed by ``chunk`` and carry the rest over."""
+    cdef uint64_t start = stats_start(stats)
+    cdef const unsigned char[::1] view = as_byte_view(chunk)
+    cdef size_t n = view.shape[0]
+    cdef size_t used = stream_split(st, n)
+    cdef size_t head = 0, pos = 0
+    cdef char* out
+
+    if st.carry_len + n < st.group:
+        if n:
+            memcpy(st.carry + st.carry_len, &view[0], n)
+            st.carry_len += n
+        stats_stop(stats, start, n, 0)
+        return b""
+
+    # carry_len + used is a whole number of groups, so there is no padding
+    result = <bytes>PyBytes_FromStringAndSize(NULL, encoded_length(ctx, st.carry_len + used))
+    Py_DECREF(result)
+    out = PyBytes_AS_STRING(result)
+    if st.carry_len:
+        head = st.group - st.carry_len
+        memcpy(st.carry + st.carry_len, &view[0], head)
+        pos = kernel(ctx, out, st.carry, st.group)
+        st.carry_len = 0
+    if used > head:
+        run_encode(kernel, ctx, out + pos, view[head:used], nogil_threshold)
+    if used < n:
+        memcpy(st.carry, &view[used], n - used)
+        st.carry_len = n - used
+    stats_stop(stats, start, n, len(result))
+    return result
+
+
+cdef inline bytes stream_encode_final(encode_into_fn kernel, const void* ctx, length_fn encoded_length,
+                                      stream_state* st, op_stats* stats=NULL):
+    """Encode the held-back partial group, with padding, and reset ``st``."""
+    cdef uint64_t start = stats_start(stats)
+    cdef size_t n = st.carry_len
+    result = <bytes>PyBytes_FromStringAndSize(NULL, encoded_length(ctx, n))
+    Py_DECREF(result)
+    if n:
+        kernel(ctx, PyBytes_AS_STRING(result), st.carry, n)
+    st.carry_len = 0
+    st.finished = False
+    stats_stop(stats, start, 0, len(result))
+    return result
+
+
+cdef inline bytes stream_decode(decode_into_fn kernel, const void* ctx, length_fn max_decoded_length,
+                                stream_state* st, object chunk, size_t nogil_threshold,
+                                op_stats* stats=NULL):
+    """Decode the whole groups completed by ``chunk`` and carry the rest over."""
+    cdef uint64_t start = stats_start(stats)
+    cdef const unsigned char[::1] view = as_byte_view(chunk)
+    cdef size_t n = view.shape[0]
+    cdef size_t used, head = 0, pos = 0, capacity
+    cdef PyObject* raw
+    cdef unsigned char* out
+
+    if st.finished:
+        stats_stop(stats, start, n, 0)
+        return b""
+    used = stream_split(st, n)
+    if st.carry_len + n < st.group:
+        if n:
+            memcpy(st.carry + st.carry_len, &view[0], n)
+            st.carry_len += n
+        stats_stop(stats, start, n, 0)
+        return b""
+
+    capacity = max_decoded_length(ctx, st.carry_len + used)
+    raw = PyBytes_FromStringAndSize(NULL, capacity)
+    out = <unsigned char*>PyBytes_AS_STRING(<object>raw)
+    if st.carry_len:
+        head = st.group - st.carry_len
+        memcpy(st.carry + st.carry_len, &view[0], head)
+        pos = kernel(ctx, out, <const char*>st.carry, st.group)
+        st.carry_len = 0
+        if st.stop_at_padding and pos < max_decoded_length(ctx, st.group):
+            st.finished = True
+    if used > head and not st.finished:
+        pos += run_decode(kernel, ctx, out + pos, view[head:used], nogil_threshold)
+        if st.stop_at_padding and pos < capacity:
+            st.finished = True
+    if used < n and not st.finished:
+        memcpy(st.carry, &view[used], n - used)
+        st.carry_len = n - used
+    if pos != capacity:
+        _PyBytes_Resize(&raw, pos)
+    result = <bytes>raw
+    Py_DECREF(result)
+    stats_stop(stats, start, n, pos)
+    return result
+
+
+cdef inline bytes stream_decode_final(decode_into_fn kernel, const void* ctx, length_fn max_decoded_length,
+                                      stream_state* st, op_stats* stats=NULL):
+    """Decode the held-back partial group and reset ``st``."""
+    cdef uint64_t start = stats_start(stats)
+    cdef size_t n = 0 if st.finished else st.carry_len
+    cdef size_t capacity = max_decoded_length(ctx, n)
+    cdef PyObject* raw = PyBytes_FromStringAndSize(NULL, capacity)
+    cdef size_t written = 0
+    st.carry_len = 0
+    st.finished = False
+    if n:
+        written = kernel(ctx, <unsigned char*>PyBytes_AS_STRING(<object>raw), <const char*>st.carry, n)
+    if written != capacity:
+        _PyBytes_Resize(&raw, written)
+    result = <bytes>raw
+    Py_DECREF(result)
+    stats_stop(stats, start, 0, written)
+    return result
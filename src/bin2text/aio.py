@@ -0,0 +1,147 @@
+"""asyncio front end: coroutines that keep large payloads off the event loop."""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .registry import codec_spec, get_codec
+
+# Whitespace dropped from encoded streams of wrappable formats, as the
+# command-line tool does
+WHITESPACE = b" \t\r\n\v\f"
+
+# Bytes read from a StreamReader per step
+CHUNK_SIZE = 1 << 18
+
+# Inputs below this many bytes are encoded or decoded on the event loop:
+# they take a few tens of microseconds, less than handing them to a thread
+_inline_limit = 1 << 18
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_inline_limit():
+    """Return the input size in bytes from which the coroutines use the worker pool."""
+    return _inline_limit
+
+
+def set_inline_limit(nbytes):
+    """Run inputs of at least ``nbytes`` bytes on the worker pool.
+
+    ``0`` sends every call to the pool, ``sys.maxsize`` runs everything on
+    the event loop.
+    """
+    global _inline_limit
+    if nbytes < 0:
+        raise ValueError("limit must be non-negative")
+    _inline_limit = nbytes
+
+
+def _worker_pool():
+    """The threads large inputs run on, started on first use.
+
+    The codecs release the GIL while their native kernels run, so these
+    threads encode and decode in parallel with the event loop.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                       thread_name_prefix='bin2text')
+        return _pool
+
+
+def _codec(format):
+    """The shared codec instance for ``format``, or ``format`` itself if it is one."""
+    if not isinstance(format, str):
+        return format
+    return get_codec(format)
+
+
+def _nbytes(data):
+    if isinstance(data, str):
+        return len(data)
+    try:
+        return memoryview(data).nbytes
+    except TypeError:
+        return 0
+
+
+async def _run(func, data, *args):
+    """Call ``func(data, *args)`` inline for small inputs, on the worker pool otherwise."""
+    if _nbytes(data) < _inline_limit:
+        return func(data, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_worker_pool(), func, data, *args)
+
+
+async def aencode(data, format='base64', **options):
+    """Encode ``data`` like ``encode()`` of the codec for ``format``, without blocking the loop.
+
+    ``format`` is a format name or a codec instance (for example
+    ``Base64(alphabet='urlsafe')``); ``options`` are passed to ``encode()``.
+    Inputs from ``get_inline_limit()`` bytes up run on a worker thread with
+    the GIL released, and ``data`` must not be modified until the call
+    completes.
+    """
+    codec = _codec(format)
+    if options:
+        return await _run(lambda d: codec.encode(d, **options), data)
+    return await _run(codec.encode, data)
+
+
+async def adecode(encoded, format='base64', **options):
+    """Decode ``encoded`` to bytes like ``decode_to_bytes()``, without blocking the loop.
+
+    ``format`` and large inputs work as for :func:`aencode`; ``options``
+    (``strict``, ``ignore_whitespace``) are passed to ``decode_to_bytes()``.
+    """
+    codec = _codec(format)
+    if options:
+        return await _run(lambda d: codec.decode_to_bytes(d, **options), encoded)
+    return await _run(codec.decode_to_bytes, encoded)
+
+
+async def aencode_stream(reader, writer, format='base64', chunk_size=CHUNK_SIZE):
+    """Encode everything read from the StreamReader ``reader`` into the StreamWriter ``writer``.
+
+    Chunks are encoded as they arrive, large ones on the worker pool, and
+    the writer is drained after each one so memory stays bounded. The
+    writer is left open.
+    """
+    encoder = codec_spec(format).new_encoder()
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        piece = await _run(encoder.update, chunk)
+        if piece:
+            writer.write(piece)
+            await writer.drain()
+    writer.write(encoder.finalize())
+    await writer.drain()
+
+
+async def adecode_stream(reader, writer, format='base64', chunk_size=CHUNK_SIZE):
+    """Decode everything read from the StreamReader ``reader`` into the StreamWriter ``writer``.
+
+    Whitespace in the input is ignored, except for formats whose alphabet
+    includes it (base128). Otherwise this works as :func:`aencode_stream`.
+    """
+    spec = codec_spec(format)
+    decoder = spec.new_decoder()
+    skip_whitespace = spec.wrappable
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        if skip_whitespace:
+            chunk = chunk.translate(None, WHITESPACE)
+        piece = await _run(decoder.update, chunk)
+        if piece:
+            writer.write(piece)
+            await writer.drain()
+    writer.write(decoder.finalize())
+    await writer.drain()
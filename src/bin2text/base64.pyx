@@ -5,80 +5,463 @@
 A Cython project with scikit-build that includes base64 functionality
 """
 
-from libc.stdlib cimport malloc, free
-from libc.string cimport strcpy, strlen
-from libcpp.string cimport string
-from libcpp.vector cimport vector
-from libcpp cimport bool
-import sys
+from threading import local
+
+from libc.stdint cimport uint64_t
+
+from bin2text._common cimport (
+    as_byte_view, as_writable_byte_view, check_capacity, check_length,
+    encode_to_new_bytes, decode_to_new_bytes, run_encode, run_decode_any, check_decoded,
+    encode_to_str, decode_to_str, scratch_buffer, scratch_init, scratch_free,
+    encode_many_packed, decode_many_packed, unpack_ascii, unpack_bytes,
+    encode_array, decode_array,
+    stream_state, stream_init, stream_encode, stream_encode_final,
+    stream_decode, stream_decode_final,
+    parallel_config, resolve_workers, check_wrap, codec_variant,
+    op_stats, stats_start, stats_stop, stats_dict, stats_reset,
+    DEFAULT_NOGIL_THRESHOLD,
+)
 
 
 # Import the base64 functionality from the header-only library
-cdef extern from "base64.h" namespace "b2t":
-    void base64_encode(string& out, string const& buf) except +
-    void base64_encode(string& out, const unsigned char* buf, size_t bufLen) except +
-    void base64_encode(string& out, vector[unsigned char] const& buf) except +
-    void base64_decode(vector[unsigned char]& out, string const& encoded_string) except +
-    void base64_decode(string& out, string const& encoded_string) except +
+cdef extern from "base64.h" nogil:
+    size_t _base64_max_decoded_length "b2t::base64_max_decoded_length"(size_t inLen)
+    const char* _base64_kernel_name "b2t::base64_kernel_name"()
+
+
+# The base64.h kernels in the form the drivers in _common take: with a leading
+# context argument, which they ignore
+cdef extern from "parallel.h" nogil:
+    size_t _base64_encode_kernel "b2t::encode_kernel<b2t::base64_encode_into>"(
+        const void* ctx, char* out, const unsigned char* buf, size_t bufLen)
+    size_t _base64_decode_kernel "b2t::decode_kernel<b2t::base64_decode_into>"(
+        const void* ctx, unsigned char* out, const char* buf, size_t bufLen)
+    size_t _base64_checked_kernel "b2t::checked_kernel<b2t::base64_decode_into>"(
+        const void* ctx, unsigned char* out, const char* buf, size_t bufLen, size_t* invalid_at)
+    size_t _base64_encoded_length_kernel "b2t::length_kernel<b2t::base64_encoded_length>"(
+        const void* ctx, size_t bufLen)
+    size_t _base64_max_decoded_length_kernel "b2t::length_kernel<b2t::base64_max_decoded_length>"(
+        const void* ctx, size_t inLen)
+
+
+cdef extern from "variants.h" nogil:
+    cdef cppclass base64_alphabet "b2t::base64_alphabet":
+        char pad
+    bint _base64_make_alphabet "b2t::base64_make_alphabet"(base64_alphabet& a, const char* chars, char pad)
+    const base64_alphabet& _base64_standard_alphabet "b2t::base64_standard_alphabet"()
+    const base64_alphabet& _base64_url_alphabet "b2t::base64_url_alphabet"()
+    void _base64_variant "b2t::base64_variant"(const base64_alphabet& a, codec_variant& v)
+
+
+# Vectorized kernel chosen for this CPU at import time: "avx2", "ssse3",
+# "neon" or "scalar"
+KERNEL = _base64_kernel_name().decode('ascii')
+
+
+# Inputs of at least this many bytes are encoded/decoded without the GIL
+cdef size_t _nogil_threshold = DEFAULT_NOGIL_THRESHOLD
+
+
+# Kernels of the standard, padded alphabet
+cdef codec_variant _standard_kernels = codec_variant(
+    _base64_encode_kernel, _base64_decode_kernel, _base64_checked_kernel,
+    _base64_encoded_length_kernel, NULL)
+
+
+cdef int _use_alphabet(codec_variant* kernels, base64_alphabet* a, object alphabet,
+                       bint padding) except -1:
+    """Point ``kernels`` at the kernels for ``alphabet`` with or without padding.
+
+    Any alphabet but the standard padded one has its tables copied into
+    ``a``, which the kernels then read and which must outlive them.
+    """
+    cdef bytes chars
+    if not isinstance(alphabet, str):
+        raise TypeError("alphabet must be a str")
+    if alphabet == 'standard':
+        if padding:
+            kernels[0] = _standard_kernels
+            return 0
+        a[0] = _base64_standard_alphabet()
+    elif alphabet == 'urlsafe':
+        a[0] = _base64_url_alphabet()
+    else:
+        chars = alphabet.encode('ascii')
+        if len(chars) != 64 or not _base64_make_alphabet(a[0], chars, b'='):
+            raise ValueError("alphabet must be 'standard', 'urlsafe' or 64 distinct printable "
+                             "ASCII characters other than '='")
+    if not padding:
+        a.pad = 0
+    _base64_variant(a[0], kernels[0])
+    return 0
+
+
+def get_nogil_threshold():
+    """Return the input size in bytes from which base64 calls release the GIL."""
+    return _nogil_threshold
+
+
+def set_nogil_threshold(Py_ssize_t nbytes):
+    """Release the GIL in base64 calls for inputs of at least nbytes bytes.
+
+    0 releases it for every call, sys.maxsize never releases it.
+    """
+    global _nogil_threshold
+    _nogil_threshold = check_length(nbytes)
+
+
+# Call counters behind stats(), collected while enable_stats() is on
+cdef bint _stats_enabled = False
+cdef op_stats _encode_stats
+cdef op_stats _decode_stats
+
+
+cdef inline op_stats* _encoding() noexcept:
+    return &_encode_stats if _stats_enabled else NULL
+
+
+cdef inline op_stats* _decoding() noexcept:
+    return &_decode_stats if _stats_enabled else NULL
+
+
+def enable_stats(bint enabled=True):
+    """Count base64 calls for stats() from now on, or stop with ``enabled=False``."""
+    global _stats_enabled
+    _stats_enabled = enabled
+
+
+def stats():
+    """Return the base64 call counters as ``{'encode': {...}, 'decode': {...}}``."""
+    return {'encode': stats_dict(&_encode_stats), 'decode': stats_dict(&_decode_stats)}
+
+
+def reset_stats():
+    """Set every base64 call counter back to zero."""
+    stats_reset(_encode_stats)
+    stats_reset(_decode_stats)
 
 
 cdef class Base64:
-    """A base64 encoding/decoding class implemented in Cython."""
-
-    def encode(self, data):
-        """Encode data to base64 string."""
-        cdef string result
-        cdef string input_str
-
-        if isinstance(data, str):
-            # Convert Python string to bytes if needed
-            input_str = data.encode('utf-8')
-        elif isinstance(data, bytes):
-            input_str = data
-        else:
-            # Convert other types to string then to bytes
-            input_str = str(data).encode('utf-8')
-
-        base64_encode(result, input_str)
-        return result.decode('utf-8')
-
-    def encode_bytes(self, bytes data):
+    """A base64 encoding/decoding class implemented in Cython.
+
+    Every method accepts ``str`` (encoded as UTF-8) or any object exposing
+    the buffer protocol (bytes, bytearray, memoryview, mmap, NumPy arrays,
+    array.array); buffers are read in place without an intermediate copy.
+
+    With ``parallel=True`` (one thread per CPU) or ``workers=N``, inputs of
+    a few hundred KiB and more are split on group boundaries and encoded or
+    decoded on that many native threads, each writing its own slice of the
+    output.
+
+    ``alphabet`` selects the characters: ``'standard'`` (RFC 4648 section 4),
+    ``'urlsafe'`` (section 5, ``-`` and ``_`` for ``+`` and ``/``) or any
+    string of 64 distinct printable ASCII characters. With ``padding=False``
+    the ``=`` padding is left out when encoding, and rejected by strict
+    decoding. Every alphabet runs on the same native kernels as the
+    standard one.
+
+    ``encode()`` writes its characters straight into the returned ``str``.
+    ``decode()`` builds its ``str`` result in scratch memory the instance
+    keeps between calls. A buffer that grows past ``scratch_limit`` bytes
+    (1 MiB by default) is freed after the call, so a single large payload
+    does not stay pinned.
+    """
+
+    cdef parallel_config _parallel
+    cdef codec_variant _kernels
+    cdef base64_alphabet _alphabet
+    cdef scratch_buffer _scratch
+
+    def __init__(self, parallel=False, workers=None, alphabet='standard', bint padding=True,
+                 scratch_limit=None):
+        self._parallel = parallel_config(resolve_workers(parallel, workers), 3, 4, False)
+        _use_alphabet(&self._kernels, &self._alphabet, alphabet, padding)
+        scratch_init(&self._scratch, scratch_limit)
+
+    def __dealloc__(self):
+        scratch_free(&self._scratch)
+
+    @property
+    def workers(self):
+        """Number of threads used for large inputs."""
+        return self._parallel.workers
+
+    def encode(self, data, Py_ssize_t wrap=0):
+        """Encode data to base64 string.
+
+        With ``wrap``, the output is split into lines of ``wrap`` characters,
+        each ended by a newline (the MIME/PEM layout). The line breaks are
+        written by the encoding pass itself.
+        """
+        cdef const unsigned char[::1] view = as_byte_view(data)
+
+        return encode_to_str(self._kernels.encode, self._kernels.ctx, view,
+                             self._kernels.encoded_length(self._kernels.ctx, view.shape[0]),
+                             _nogil_threshold, &self._parallel,
+                             check_wrap(wrap), _encoding())
+
+    def encode_bytes(self, data, Py_ssize_t wrap=0):
         """Encode bytes to base64 string."""
-        cdef string result
-        cdef string input_str = data
+        return self.encode(data, wrap)
+
+    def decode(self, encoded_str, bint strict=False, bint ignore_whitespace=False):
+        """Decode base64 string to bytes.
+
+        ``strict`` and ``ignore_whitespace`` work as for :meth:`decode_to_bytes`.
+        """
+        cdef const unsigned char[::1] view = as_byte_view(encoded_str)
+
+        return decode_to_str(self._kernels.decode, self._kernels.ctx, view,
+                             _base64_max_decoded_length(view.shape[0]),
+                             _nogil_threshold, &self._parallel,
+                             self._kernels.checked, 'base64', strict, ignore_whitespace,
+                             &self._scratch, _decoding())
+
+    def decode_to_bytes(self, encoded_str, bint strict=False, bint ignore_whitespace=False):
+        """Decode base64 string to bytes.
+
+        With ``strict``, anything but characters of the alphabet and
+        padding that completes the final group raises ValueError naming
+        the offset of the first invalid character. The check happens in the
+        decoding pass itself.
 
-        base64_encode(result, input_str)
-        return result.decode('utf-8')
+        With ``ignore_whitespace``, spaces, tabs and line breaks are skipped
+        as the input is decoded, so wrapped (MIME/PEM) text decodes without
+        being copied first. Offsets reported by ``strict`` still count them.
+        """
+        cdef const unsigned char[::1] view = as_byte_view(encoded_str)
 
-    def decode(self, str encoded_str):
-        """Decode base64 string to bytes."""
-        cdef string result
-        cdef string input_str = encoded_str.encode('utf-8')
+        return decode_to_new_bytes(self._kernels.decode, self._kernels.ctx, view,
+                                   _base64_max_decoded_length(view.shape[0]),
+                                   _nogil_threshold, &self._parallel,
+                                   self._kernels.checked, 'base64', strict, ignore_whitespace,
+                                   _decoding())
 
-        base64_decode(result, input_str)
-        return result.decode('utf-8')
+    def encoded_length(self, Py_ssize_t n):
+        """Return the exact base64 length of ``n`` input bytes."""
+        return self._kernels.encoded_length(self._kernels.ctx, check_length(n))
 
-    def decode_to_bytes(self, str encoded_str):
-        """Decode base64 string to bytes."""
-        cdef vector[unsigned char] result
-        cdef string input_str = encoded_str.encode('utf-8')
+    def max_decoded_length(self, Py_ssize_t n):
+        """Return an upper bound on the bytes decoded from ``n`` base64 characters."""
+        return _base64_max_decoded_length(check_length(n))
 
-        base64_decode(result, input_str)
+    def encode_into(self, data, out):
+        """Encode data into the writable buffer ``out``.
 
-        # Convert vector to bytes
-        cdef bytes py_bytes = b""
-        for i in range(result.size()):
-            py_bytes += bytes([<unsigned char>result[i]])
-        return py_bytes
+        ``out`` must hold at least ``encoded_length(len(data))`` bytes.
+        Returns the number of characters written.
+        """
+        cdef const unsigned char[::1] view = as_byte_view(data)
+        cdef unsigned char[::1] dst = as_writable_byte_view(out)
+        cdef size_t needed = self._kernels.encoded_length(self._kernels.ctx, view.shape[0])
 
+        check_capacity(dst.shape[0], needed)
+        if needed == 0:
+            return 0
+        cdef op_stats* stats = _encoding()
+        cdef uint64_t start = stats_start(stats)
+        cdef size_t n = run_encode(self._kernels.encode, self._kernels.ctx, <char*>&dst[0], view,
+                                   _nogil_threshold, &self._parallel)
+        stats_stop(stats, start, view.shape[0], n)
+        return n
 
-def base64_encode(data):
+    def decode_into(self, encoded_str, out, bint strict=False, bint ignore_whitespace=False):
+        """Decode a base64 string into the writable buffer ``out``.
+
+        ``out`` must hold at least ``max_decoded_length(len(encoded_str))``
+        bytes. Returns the number of bytes written. ``strict`` and ``ignore_whitespace`` work
+        as for :meth:`decode_to_bytes`.
+        """
+        cdef const unsigned char[::1] view = as_byte_view(encoded_str)
+        cdef unsigned char[::1] dst = as_writable_byte_view(out)
+        cdef size_t needed = _base64_max_decoded_length(view.shape[0])
+        cdef size_t invalid_at
+
+        check_capacity(dst.shape[0], needed)
+        if needed == 0 and not strict:
+            return 0
+        cdef op_stats* stats = _decoding()
+        cdef uint64_t start = stats_start(stats)
+        # Input too short to decode to anything is still validated by strict
+        cdef size_t n = run_decode_any(self._kernels.decode, self._kernels.ctx,
+                                       &dst[0] if needed else NULL, view, needed,
+                                       _nogil_threshold, &self._parallel,
+                                       self._kernels.checked, strict, ignore_whitespace, &invalid_at)
+        stats_stop(stats, start, view.shape[0], n)
+        check_decoded('base64', view, invalid_at)
+        return n
+
+    def encode_many(self, items, bint packed=False):
+        """Encode every item of ``items`` to base64 in one native loop.
+
+        Returns a list of strings, or with ``packed=True`` a ``(bytes, offsets)``
+        pair where item ``i`` is ``bytes[offsets[i]:offsets[i + 1]]`` and
+        ``offsets`` is an ``array('q')`` of ``len(items) + 1`` entries.
+        """
+        result, offsets = encode_many_packed(self._kernels.encode, self._kernels.ctx,
+                                             self._kernels.encoded_length, items, _nogil_threshold,
+                                             _encoding())
+        if packed:
+            return result, offsets
+        return unpack_ascii(result, offsets)
+
+    def decode_many(self, items, bint packed=False):
+        """Decode every base64 string of ``items`` to bytes in one native loop.
+
+        Returns a list of bytes, or with ``packed=True`` a ``(bytes, offsets)``
+        pair laid out as in ``encode_many``.
+        """
+        result, offsets = decode_many_packed(self._kernels.decode, self._kernels.ctx,
+                                             _base64_max_decoded_length_kernel, items, _nogil_threshold,
+                                             _decoding())
+        if packed:
+            return result, offsets
+        return unpack_bytes(result, offsets)
+
+    def encode_array(self, arr):
+        """Encode each row of a 2-D ``uint8`` NumPy array to base64.
+
+        Returns a 1-D ``S`` array with one fixed-width element per row.
+        Rows of zero length raise ValueError.
+        """
+        return encode_array(self._kernels.encode, self._kernels.ctx, self._kernels.encoded_length, arr,
+                            _nogil_threshold, _encoding())
+
+    def decode_array(self, arr, bint strict=False):
+        """Decode a 1-D ``S`` or ``U`` array of base64 strings into a 2-D ``uint8`` array.
+
+        Every element must decode to the same number of bytes. ``strict``
+        works as for :meth:`decode_to_bytes`, with the row named as well.
+        An empty array from :meth:`encode_array` keeps its column count.
+        """
+        return decode_array(self._kernels.decode, self._kernels.ctx, self._kernels.encoded_length,
+                            _base64_max_decoded_length_kernel, arr, _nogil_threshold,
+                            self._kernels.checked, 'base64', strict, _decoding())
+
+
+cdef class Base64Encoder:
+    """Incremental base64 encoder.
+
+    Feed chunks to ``update()`` and call ``finalize()`` once at the end.
+    Partial groups of three bytes are carried between calls, so the concatenated
+    output equals ``base64_encode`` of the whole input while only one
+    chunk is held in memory at a time.
+    """
+
+    cdef stream_state _state
+
+    def __cinit__(self):
+        stream_init(&self._state, 3)
+
+    def update(self, data):
+        """Encode the next chunk and return the base64 characters completed so far as bytes."""
+        return stream_encode(_base64_encode_kernel, NULL, _base64_encoded_length_kernel,
+                             &self._state, data, _nogil_threshold, _encoding())
+
+    def finalize(self):
+        """Return the encoding of the held-back bytes, with padding, and reset the encoder."""
+        return stream_encode_final(_base64_encode_kernel, NULL, _base64_encoded_length_kernel,
+                                   &self._state, _encoding())
+
+
+cdef class Base64Decoder:
+    """Incremental base64 decoder.
+
+    Feed chunks to ``update()`` and call ``finalize()`` once at the end.
+    Partial groups of four characters are carried between calls, so the concatenated
+    output equals ``Base64().decode_to_bytes`` of the whole input.
+    """
+
+    cdef stream_state _state
+
+    def __cinit__(self):
+        stream_init(&self._state, 4)
+
+    def update(self, encoded):
+        """Decode the next chunk and return the bytes completed so far."""
+        return stream_decode(_base64_decode_kernel, NULL, _base64_max_decoded_length_kernel,
+                             &self._state, encoded, _nogil_threshold, _decoding())
+
+    def finalize(self):
+        """Return the decoding of the held-back characters and reset the decoder."""
+        return stream_decode_final(_base64_decode_kernel, NULL, _base64_max_decoded_length_kernel,
+                                   &self._state, _decoding())
+
+
+# Per-thread instances behind the module-level functions, so repeated calls
+# reuse their scratch memory
+_shared = local()
+
+
+cdef Base64 _shared_codec(str alphabet='standard', object padding=True):
+    """Return the calling thread's Base64 instance for the module-level functions."""
+    cdef dict codecs
+    try:
+        codecs = _shared.codecs
+    except AttributeError:
+        codecs = _shared.codecs = {}
+    key = (alphabet, padding)
+    codec = codecs.get(key)
+    if codec is None:
+        codec = codecs[key] = Base64(alphabet=alphabet, padding=padding)
+    return codec
+
+
+def base64_encode(data, wrap=0):
     """Encode data to base64 string (convenience function)."""
-    cdef Base64 b64 = Base64()
-    return b64.encode(data)
+    cdef Base64 b64 = _shared_codec()
+    return b64.encode(data, wrap)
+
+
+def base64_decode(encoded_str, strict=False, ignore_whitespace=False):
+    """Decode base64 string to a UTF-8 str (convenience function)."""
+    cdef Base64 b64 = _shared_codec()
+    return b64.decode(encoded_str, strict, ignore_whitespace)
 
 
-def base64_decode(encoded_str):
+def base64_decode_to_bytes(encoded_str, strict=False, ignore_whitespace=False):
     """Decode base64 string to bytes (convenience function)."""
-    cdef Base64 b64 = Base64()
-    return b64.decode(encoded_str)
\ No newline at end of file
+    cdef Base64 b64 = _shared_codec()
+    return b64.decode_to_bytes(encoded_str, strict, ignore_whitespace)
+
+
+def base64url_encode(data, padding=True):
+    """Encode data to URL-safe base64 string (convenience function)."""
+    cdef Base64 b64 = _shared_codec('urlsafe', padding)
+    return b64.encode(data)
+
+
+def base64url_decode(encoded_str, strict=False):
+    """Decode URL-safe base64 string, padded or not, to a UTF-8 str (convenience function)."""
+    cdef Base64 b64 = _shared_codec('urlsafe')
+    return b64.decode(encoded_str, strict)
+
+
+def base64url_decode_to_bytes(encoded_str, strict=False):
+    """Decode URL-safe base64 string, padded or not, to bytes (convenience function)."""
+    cdef Base64 b64 = _shared_codec('urlsafe')
+    return b64.decode_to_bytes(encoded_str, strict)
+
+
+def base64_encode_many(items, packed=False):
+    """Encode every item of ``items`` to base64 (convenience function)."""
+    cdef Base64 b64 = _shared_codec()
+    return b64.encode_many(items, packed)
+
+
+def base64_decode_many(items, packed=False):
+    """Decode every base64 string of ``items`` to bytes (convenience function)."""
+    cdef Base64 b64 = _shared_codec()
+    return b64.decode_many(items, packed)
+
+
+def base64_encode_array(arr):
+    """Encode each row of a 2-D uint8 array to base64 (convenience function)."""
+    cdef Base64 b64 = _shared_codec()
+    return b64.encode_array(arr)
+
+
+def base64_decode_array(arr, bint strict=False):
+    """Decode a 1-D S or U array of base64 strings to rows of bytes (convenience function)."""
+    cdef Base64 b64 = _shared_codec()
+    return b64.decode_array(arr, strict)
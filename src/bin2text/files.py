@@ -0,0 +1,92 @@
+"""Memory-mapped file-to-file encoding and decoding."""
+
+import mmap
+import os
+
+from .registry import get_codec
+
+
+def _codec(format, parallel, workers):
+    if not parallel and workers is None:
+        return get_codec(format)
+    return get_codec(format, parallel=parallel, workers=workers)
+
+
+def _map_input(src):
+    """Map ``src`` read-only, or return None for an empty file (which cannot be mapped)."""
+    if os.fstat(src.fileno()).st_size == 0:
+        return None
+    mapping = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapping, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return mapping
+
+
+def _check_distinct(src_path, dst_path):
+    if os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):
+        raise ValueError("source and destination must be different files")
+
+
+def encode_file(src_path, dst_path, format='base64', parallel=False, workers=None):
+    """Encode the file at ``src_path`` into ``dst_path``.
+
+    Both files are memory-mapped and the kernel reads one mapping and
+    writes the other directly, so neither file is loaded into memory.
+    ``dst_path`` is created or truncated to exactly the encoded length.
+    ``parallel``/``workers`` are passed to the codec. Returns the number of
+    characters written.
+    """
+    codec = _codec(format, parallel, workers)
+    _check_distinct(src_path, dst_path)
+    with open(src_path, 'rb') as src, open(dst_path, 'w+b') as dst:
+        src_map = _map_input(src)
+        if src_map is None:
+            return 0
+        with src_map:
+            size = codec.encoded_length(len(src_map))
+            dst.truncate(size)
+            with mmap.mmap(dst.fileno(), size) as dst_map:
+                return codec.encode_into(src_map, dst_map)
+
+
+def decode_file(src_path, dst_path, format='base64', parallel=False, workers=None,
+                strict=False, ignore_whitespace=False):
+    """Decode the file at ``src_path`` into ``dst_path``.
+
+    Works like :func:`encode_file`: the output is mapped at the codec's
+    maximum decoded length, decoded into directly and then truncated to the
+    number of bytes written, which is returned.
+
+    ``strict`` and ``ignore_whitespace`` are passed to the codec's
+    ``decode_into`` when set, so wrapped files (line-broken base64, PEM
+    bodies) decode in the same single pass, skipping the line breaks. If
+    decoding fails, ``dst_path`` is left empty.
+    """
+    codec = _codec(format, parallel, workers)
+    options = {}
+    if strict:
+        options['strict'] = True
+    if ignore_whitespace:
+        options['ignore_whitespace'] = True
+    _check_distinct(src_path, dst_path)
+    with open(src_path, 'rb') as src, open(dst_path, 'w+b') as dst:
+        src_map = _map_input(src)
+        if src_map is None:
+            return 0
+        with src_map:
+            capacity = codec.max_decoded_length(len(src_map))
+            if capacity == 0:
+                if strict:
+                    # Nothing to write, but the input still has to be valid
+                    codec.decode_to_bytes(src_map, **options)
+                return 0
+            dst.truncate(capacity)
+            try:
+                with mmap.mmap(dst.fileno(), capacity) as dst_map:
+                    written = codec.decode_into(src_map, dst_map, **options)
+            except BaseException:
+                # Leave an empty file rather than a partly decoded one
+                dst.truncate(0)
+                raise
+        dst.truncate(written)
+        return written
@@ -0,0 +1,193 @@
+"""Codecs by format name, for every API that takes a ``format`` argument."""
+
+import importlib
+import threading
+
+# Methods every registered codec type has to provide
+CODEC_METHODS = (
+    'encode', 'decode', 'decode_to_bytes', 'encode_into', 'decode_into',
+    'encoded_length', 'max_decoded_length',
+)
+
+
+def _resolve(target):
+    """Return ``target``, importing it first if it is a ``'module:name'`` string."""
+    if not isinstance(target, str):
+        return target
+    module, _, name = target.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _check_methods(codec_type):
+    missing = [m for m in CODEC_METHODS if not callable(getattr(codec_type, m, None))]
+    if missing:
+        raise TypeError(f"{codec_type!r} is missing codec methods: {', '.join(missing)}")
+
+
+class CodecSpec:
+    """What the registry knows about one format.
+
+    ``codec_type(**options)`` makes a codec instance with the
+    :data:`CODEC_METHODS`; ``encoder_type()``/``decoder_type()`` make the
+    incremental encoder and decoder (``None`` if the format has none).
+    Types given as ``'module:name'`` strings are imported on first access.
+    ``bytes_per_group`` input bytes encode to ``chars_per_group``
+    characters, and ``wrappable`` tells whether whitespace can be added to
+    the output (it cannot when the alphabet includes whitespace).
+    """
+
+    __slots__ = ('name', '_codec_type', '_encoder_type', '_decoder_type',
+                 'bytes_per_group', 'chars_per_group', 'wrappable')
+
+    def __init__(self, name, codec_type, encoder_type, decoder_type,
+                 bytes_per_group, chars_per_group, wrappable):
+        self.name = name
+        self._codec_type = codec_type
+        self._encoder_type = encoder_type
+        self._decoder_type = decoder_type
+        self.bytes_per_group = bytes_per_group
+        self.chars_per_group = chars_per_group
+        self.wrappable = wrappable
+
+    @property
+    def codec_type(self):
+        if isinstance(self._codec_type, str):
+            codec_type = _resolve(self._codec_type)
+            _check_methods(codec_type)
+            self._codec_type = codec_type
+        return self._codec_type
+
+    @property
+    def encoder_type(self):
+        self._encoder_type = _resolve(self._encoder_type)
+        return self._encoder_type
+
+    @property
+    def decoder_type(self):
+        self._decoder_type = _resolve(self._decoder_type)
+        return self._decoder_type
+
+    def new_encoder(self):
+        """Return a new incremental encoder for this format."""
+        if self.encoder_type is None:
+            raise ValueError(f"{self.name} has no incremental encoder")
+        return self.encoder_type()
+
+    def new_decoder(self):
+        """Return a new incremental decoder for this format."""
+        if self.decoder_type is None:
+            raise ValueError(f"{self.name} has no incremental decoder")
+        return self.decoder_type()
+
+    def __repr__(self):
+        codec_type = self._codec_type
+        if not isinstance(codec_type, str):
+            codec_type = codec_type.__name__
+        return f"CodecSpec({self.name!r}, {codec_type}, {self.bytes_per_group}:{self.chars_per_group})"
+
+
+_specs = {}
+_instances = {}
+_lock = threading.Lock()
+
+
+def register_codec(name, codec_type, encoder_type=None, decoder_type=None,
+                   bytes_per_group=1, chars_per_group=1, wrappable=True, replace=False):
+    """Make ``codec_type`` available under ``name`` to every ``format`` argument.
+
+    ``codec_type`` is called with the keyword options given to
+    :func:`get_codec` (none for the shared instance, ``parallel`` and
+    ``workers`` from the file functions) and must provide the
+    :data:`CODEC_METHODS`. Any of the types can be given as a
+    ``'module:name'`` string, so the module is only imported once the
+    format is used. Registering a name again raises ValueError
+    unless ``replace`` is true, which also drops the shared instance of the
+    codec it replaces. Returns the new :class:`CodecSpec`.
+    """
+    if not isinstance(name, str) or not name:
+        raise TypeError("codec name must be a non-empty str")
+    if not isinstance(codec_type, str):
+        _check_methods(codec_type)
+    if bytes_per_group < 1 or chars_per_group < 1:
+        raise ValueError("group sizes must be at least 1")
+    spec = CodecSpec(name, codec_type, encoder_type, decoder_type,
+                     bytes_per_group, chars_per_group, wrappable)
+    with _lock:
+        if name in _specs and not replace:
+            raise ValueError(f"codec {name!r} is already registered")
+        _specs[name] = spec
+        _instances.pop(name, None)
+    return spec
+
+
+def unregister_codec(name):
+    """Remove the codec registered under ``name``."""
+    with _lock:
+        if _specs.pop(name, None) is None:
+            raise ValueError(_unknown(name))
+        _instances.pop(name, None)
+
+
+def available_codecs():
+    """Return the registered format names, in registration order."""
+    return tuple(_specs)
+
+
+def _unknown(format):
+    return f"unknown format {format!r}; expected one of {', '.join(_specs)}"
+
+
+def codec_spec(format):
+    """Return the :class:`CodecSpec` registered under ``format``."""
+    try:
+        return _specs[format]
+    except (KeyError, TypeError):
+        raise ValueError(_unknown(format)) from None
+
+
+def get_codec(format, **options):
+    """Return a codec instance for ``format``.
+
+    Without options this is one shared instance per format, created on
+    first use, so callers can look it up once and keep calling its methods.
+    Options (``parallel``, ``alphabet``, ...) make a new instance.
+    """
+    if options:
+        return codec_spec(format).codec_type(**options)
+    try:
+        return _instances[format]
+    except (KeyError, TypeError):
+        codec_type = codec_spec(format).codec_type
+    with _lock:
+        codec = _instances.get(format)
+        if codec is None:
+            codec = _instances[format] = codec_type()
+    return codec
+
+
+def encode(data, format='base64', **options):
+    """Encode ``data`` to ``str`` with the codec registered under ``format``.
+
+    ``options`` (``wrap``) are passed to the codec's ``encode()``.
+    """
+    return get_codec(format).encode(data, **options)
+
+
+def decode(encoded, format='base64', **options):
+    """Decode ``encoded`` to ``bytes`` with the codec registered under ``format``.
+
+    ``options`` (``strict``, ``ignore_whitespace``) are passed to the
+    codec's ``decode_to_bytes()``.
+    """
+    return get_codec(format).decode_to_bytes(encoded, **options)
+
+
+register_codec('base64', 'bin2text.base64:Base64',
+               'bin2text.base64:Base64Encoder', 'bin2text.base64:Base64Decoder', 3, 4)
+register_codec('base32', 'bin2text.base32:Base32',
+               'bin2text.base32:Base32Encoder', 'bin2text.base32:Base32Decoder', 5, 8)
+register_codec('base16', 'bin2text.base16:Base16',
+               'bin2text.base16:Base16Encoder', 'bin2text.base16:Base16Decoder', 1, 2)
+register_codec('base128', 'bin2text.base128:Base128',
+               'bin2text.base128:Base128Encoder', 'bin2text.base128:Base128Decoder', 7, 8,
+               wrappable=False)
@@ -1,6 +1,6 @@
-#define DOCTEST_CONFIG_IMPLEMENT_WITH_MAIN
 #include "doctest.h"
 #include "base128.h"
+#include <algorithm>
 #include <string>
 #include <vector>
 
@@ -30,10 +30,82 @@ TEST_CASE("Base128 encoding and decoding") {
     base128_encode(binary_encoded, binary_data);
     base128_decode(binary_decoded, binary_encoded);
     CHECK(binary_decoded.size() == 6);
-    CHECK(binary_decoded[0] == 0x00);
-    CHECK(binary_decoded[1] == 0x01);
-    CHECK(binary_decoded[2] == 0x02);
-    CHECK(binary_decoded[3] == 0xFF);
-    CHECK(binary_decoded[4] == 0xFE);
-    CHECK(binary_decoded[5] == 0xFD);
-}
\ No newline at end of file
+    CHECK(static_cast<uint8_t>(binary_decoded[0]) == 0x00);
+    CHECK(static_cast<uint8_t>(binary_decoded[1]) == 0x01);
+    CHECK(static_cast<uint8_t>(binary_decoded[2]) == 0x02);
+    CHECK(static_cast<uint8_t>(binary_decoded[3]) == 0xFF);
+    CHECK(static_cast<uint8_t>(binary_decoded[4]) == 0xFE);
+    CHECK(static_cast<uint8_t>(binary_decoded[5]) == 0xFD);
+}
+
+TEST_CASE("Base128 encode_into and decode_into") {
+    const string input = "Hello, World!";
+    char encoded[32];
+
+    CHECK(base128_encoded_length(input.size()) == 15);
+    size_t n = base128_encode_into(encoded, reinterpret_cast<const uint8_t*>(input.data()), input.size());
+    CHECK(n == 15);
+
+    uint8_t decoded[32];
+    CHECK(base128_max_decoded_length(n) >= input.size());
+    size_t m = base128_decode_into(decoded, encoded, n);
+    CHECK(string(reinterpret_cast<char*>(decoded), m) == input);
+}
+
+TEST_CASE("Base128 SIMD kernels match the scalar kernel") {
+    vector<uint8_t> input(1000);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+
+    const detail::base128_kernel scalar = detail::base128_kernel_for(simd_scalar);
+    const simd_level levels[] = { simd_neon, simd_ssse3, simd_avx2 };
+
+    for (size_t len = 0; len < input.size(); len += 13) {
+        string expected(base128_encoded_length(len), '\0');
+        CHECK(detail::base128_encode_into_with(scalar, &expected[0], input.data(), len) == expected.size());
+
+        // Bytes outside ASCII are invalid and decode as the value 0
+        string damaged = expected;
+        for (size_t i = 0; i < damaged.size(); i += 11)
+            damaged[i] = static_cast<char>(0x80 | i);
+        vector<uint8_t> damaged_expected(base128_max_decoded_length(damaged.size()));
+        uint8_t error = 0;
+        detail::base128_decode_into_with(scalar, damaged_expected.data(), damaged.data(), damaged.size(), error);
+
+        for (simd_level level : levels) {
+            const detail::base128_kernel k = detail::base128_kernel_for(level);
+            string encoded(base128_encoded_length(len), '\0');
+            detail::base128_encode_into_with(k, &encoded[0], input.data(), len);
+            CHECK(encoded == expected);
+
+            vector<uint8_t> decoded(base128_max_decoded_length(encoded.size()));
+            error = 0;
+            CHECK(detail::base128_decode_into_with(k, decoded.data(), encoded.data(), encoded.size(), error) == len);
+            CHECK(error == 0);
+            CHECK(std::equal(input.begin(), input.begin() + len, decoded.begin()));
+
+            error = 0;
+            detail::base128_decode_into_with(k, decoded.data(), damaged.data(), damaged.size(), error);
+            CHECK(decoded == damaged_expected);
+            CHECK(error == (damaged.empty() ? 0 : 0x80));
+        }
+    }
+}
+
+TEST_CASE("Base128 decode_into reports the first character outside ASCII") {
+    vector<uint8_t> input(100, 0x5A);
+    string text;
+    base128_encode(text, input);
+    vector<uint8_t> decoded(base128_max_decoded_length(text.size()));
+    size_t invalid_at = 0;
+
+    base128_decode_into(decoded.data(), text.data(), text.size(), &invalid_at);
+    CHECK(invalid_at == text.size());
+
+    for (size_t pos : { size_t(0), size_t(7), size_t(31), size_t(64), text.size() - 1 }) {
+        string broken = text;
+        broken[pos] = '\x80';
+        base128_decode_into(decoded.data(), broken.data(), broken.size(), &invalid_at);
+        CHECK(invalid_at == pos);
+    }
+}
@@ -1,8 +1,8 @@
-#define DOCTEST_CONFIG_IMPLEMENT_WITH_MAIN
 #include "doctest.h"
 #include "base16.h"
 #include <string>
 #include <vector>
+#include <algorithm>
 
 using namespace std;
 using namespace b2t;
@@ -34,10 +34,81 @@ TEST_CASE("Base16 encoding and decoding") {
     CHECK(binary_encoded == "000102FFFEFD");
     base16_decode(binary_decoded, binary_encoded);
     CHECK(binary_decoded.size() == 6);
-    CHECK(binary_decoded[0] == 0x00);
-    CHECK(binary_decoded[1] == 0x01);
-    CHECK(binary_decoded[2] == 0x02);
-    CHECK(binary_decoded[3] == 0xFF);
-    CHECK(binary_decoded[4] == 0xFE);
-    CHECK(binary_decoded[5] == 0xFD);
-}
\ No newline at end of file
+    CHECK(static_cast<uint8_t>(binary_decoded[0]) == 0x00);
+    CHECK(static_cast<uint8_t>(binary_decoded[1]) == 0x01);
+    CHECK(static_cast<uint8_t>(binary_decoded[2]) == 0x02);
+    CHECK(static_cast<uint8_t>(binary_decoded[3]) == 0xFF);
+    CHECK(static_cast<uint8_t>(binary_decoded[4]) == 0xFE);
+    CHECK(static_cast<uint8_t>(binary_decoded[5]) == 0xFD);
+}
+
+TEST_CASE("Base16 encode_into and decode_into") {
+    const string input = "Hello, World!";
+    char encoded[32];
+
+    CHECK(base16_encoded_length(input.size()) == 26);
+    size_t n = base16_encode_into(encoded, reinterpret_cast<const uint8_t*>(input.data()), input.size());
+    CHECK(n == 26);
+    CHECK(string(encoded, n) == "48656C6C6F2C20576F726C6421");
+
+    uint8_t decoded[32];
+    CHECK(base16_max_decoded_length(n) >= input.size());
+    size_t m = base16_decode_into(decoded, encoded, n);
+    CHECK(string(reinterpret_cast<char*>(decoded), m) == input);
+}
+
+TEST_CASE("Base16 SIMD kernels match the scalar kernel") {
+    vector<uint8_t> input(1000);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+
+    const detail::base16_kernel scalar = detail::base16_kernel_for(simd_scalar);
+    const simd_level levels[] = { simd_neon, simd_ssse3, simd_avx2 };
+
+    for (size_t len = 0; len < input.size(); len += 37) {
+        string expected(base16_encoded_length(len), '\0');
+        detail::base16_encode_into_with(scalar, &expected[0], input.data(), len);
+
+        for (simd_level level : levels) {
+            const detail::base16_kernel k = detail::base16_kernel_for(level);
+            string encoded(base16_encoded_length(len), '\0');
+            detail::base16_encode_into_with(k, &encoded[0], input.data(), len);
+            CHECK(encoded == expected);
+
+            // Lowercase digits decode the same way
+            string lower = encoded;
+            for (char& c : lower)
+                if (c >= 'A' && c <= 'F') c = static_cast<char>(c - 'A' + 'a');
+
+            for (const string* text : { &encoded, &lower }) {
+                vector<uint8_t> decoded(base16_max_decoded_length(text->size()));
+                uint8_t error = 0;
+                size_t n = detail::base16_decode_into_with(k, decoded.data(), text->data(), text->size(), error);
+                CHECK(n == len);
+                CHECK(error == 0);
+                CHECK(std::equal(input.begin(), input.begin() + len, decoded.begin()));
+            }
+        }
+    }
+}
+
+TEST_CASE("Base16 decode_into reports the first invalid character") {
+    string text(200, '0');
+    vector<uint8_t> decoded(base16_max_decoded_length(text.size()));
+    size_t invalid_at = 0;
+
+    base16_decode_into(decoded.data(), text.data(), text.size(), &invalid_at);
+    CHECK(invalid_at == text.size());
+
+    const size_t positions[] = { 0, 1, 15, 16, 31, 63, 64, 150, 199 };
+    for (size_t pos : positions) {
+        for (char bad : { 'g', 'G', '/', ':', '@', '`', ' ', '\x80', '\xff' }) {
+            string broken = text;
+            broken[pos] = bad;
+            base16_decode_into(decoded.data(), broken.data(), broken.size(), &invalid_at);
+            CHECK(invalid_at == pos);
+            // Invalid characters still decode leniently as a zero nibble
+            CHECK(std::all_of(decoded.begin(), decoded.end(), [](uint8_t b) { return b == 0; }));
+        }
+    }
+}
@@ -1,4 +1,3 @@
-#define DOCTEST_CONFIG_IMPLEMENT_WITH_MAIN
 #include "doctest.h"
 #include "base32.h"
 #include <string>
@@ -30,12 +29,12 @@ TEST_CASE("Base32 encoding and decoding") {
     base32_encode(binary_encoded, binary_data);
     base32_decode(binary_decoded, binary_encoded);
     CHECK(binary_decoded.size() == 6);
-    CHECK(binary_decoded[0] == 0x00);
-    CHECK(binary_decoded[1] == 0x01);
-    CHECK(binary_decoded[2] == 0x02);
-    CHECK(binary_decoded[3] == 0xFF);
-    CHECK(binary_decoded[4] == 0xFE);
-    CHECK(binary_decoded[5] == 0xFD);
+    CHECK(static_cast<uint8_t>(binary_decoded[0]) == 0x00);
+    CHECK(static_cast<uint8_t>(binary_decoded[1]) == 0x01);
+    CHECK(static_cast<uint8_t>(binary_decoded[2]) == 0x02);
+    CHECK(static_cast<uint8_t>(binary_decoded[3]) == 0xFF);
+    CHECK(static_cast<uint8_t>(binary_decoded[4]) == 0xFE);
+    CHECK(static_cast<uint8_t>(binary_decoded[5]) == 0xFD);
     
     // Test specific Base32 example
     string simple = "f";
@@ -43,4 +42,91 @@ TEST_CASE("Base32 encoding and decoding") {
     base32_encode(simple_encoded, simple);
     base32_decode(simple_decoded, simple_encoded);
     CHECK(simple_decoded == simple);
-}
\ No newline at end of file
+}
+
+TEST_CASE("Base32 encode_into and decode_into") {
+    const string input = "Hello, World!";
+    char encoded[32];
+
+    CHECK(base32_encoded_length(input.size()) == 24);
+    size_t n = base32_encode_into(encoded, reinterpret_cast<const uint8_t*>(input.data()), input.size());
+    CHECK(n == 24);
+    CHECK(string(encoded, n) == "JBSWY3DPFQQFO33SNRSCC===");
+
+    uint8_t decoded[32];
+    CHECK(base32_max_decoded_length(n) >= input.size());
+    size_t m = base32_decode_into(decoded, encoded, n);
+    CHECK(string(reinterpret_cast<char*>(decoded), m) == input);
+}
+
+TEST_CASE("Base32 whole groups, padding and invalid characters") {
+    // RFC 4648 test vectors cover every tail length
+    const char* vectors[][2] = {
+        {"f", "MY======"}, {"fo", "MZXQ===="}, {"foo", "MZXW6==="},
+        {"foob", "MZXW6YQ="}, {"fooba", "MZXW6YTB"}, {"foobar", "MZXW6YTBOI======"},
+    };
+    for (auto& v : vectors) {
+        string encoded, decoded;
+        base32_encode(encoded, string(v[0]));
+        CHECK(encoded == v[1]);
+        base32_decode(decoded, encoded);
+        CHECK(decoded == v[0]);
+    }
+
+    // Many whole groups of every byte value, upper and lower case
+    vector<uint8_t> data(1000);
+    for (size_t i = 0; i < data.size(); ++i)
+        data[i] = static_cast<uint8_t>(i * 131 + 7);
+    string encoded;
+    vector<uint8_t> decoded;
+    base32_encode(encoded, data);
+    base32_decode(decoded, encoded);
+    CHECK(decoded == data);
+    for (auto& c : encoded)
+        c = static_cast<char>(tolower(c));
+    base32_decode(decoded, encoded);
+    CHECK(decoded == data);
+
+    // An invalid character only zeroes its own 5 bits; the groups after
+    // it still decode
+    string damaged = "MZXW6YT!MZXW6YTBMZXW6YTB";
+    base32_decode(decoded, damaged);
+    CHECK(decoded.size() == 15);
+    CHECK(string(decoded.begin() + 5, decoded.end()) == "foobafooba");
+
+    // Decoding stops at the first padded group
+    base32_decode(decoded, string("MZXW6===MZXW6YTB"));
+    CHECK(string(decoded.begin(), decoded.end()) == "foo");
+}
+
+TEST_CASE("Base32 decode_into reports the first invalid character") {
+    const string text = "MZXW6YTBMZXW6YTBMZXW6YTBOI======";
+    uint8_t decoded[32];
+    size_t invalid_at = 0;
+
+    base32_decode_into(decoded, text.data(), text.size(), &invalid_at);
+    CHECK(invalid_at == text.size());
+    base32_decode_into(decoded, "mzxw6ytb", 8, &invalid_at);
+    CHECK(invalid_at == 8);
+
+    for (size_t pos : { size_t(0), size_t(7), size_t(9), size_t(24), size_t(25) }) {
+        for (char bad : { '!', '0', '1', '8', '\n', '\x80' }) {
+            string broken = text;
+            broken[pos] = bad;
+            base32_decode_into(decoded, broken.data(), broken.size(), &invalid_at);
+            CHECK(invalid_at == pos);
+        }
+    }
+
+    // Padding has to follow 2, 4, 5 or 7 characters, fill the group and end the input
+    const char* cases[][2] = {
+        { "MY======", "" }, { "MZXQ====", "" }, { "MZXW6===", "" }, { "MZXW6YQ=", "" }, { "MZXW6", "" },
+        { "M=======", "1" }, { "MZX=====", "3" }, { "MY=====A", "7" }, { "MY======MY======", "8" },
+        { "MY=", "2" }, { "M", "0" }, { "MZX", "2" }, { "MZXW6Y", "5" }, { "MZXW6YTBM", "8" },
+    };
+    for (auto& c : cases) {
+        const string s = c[0];
+        base32_decode_into(decoded, s.data(), s.size(), &invalid_at);
+        CHECK(invalid_at == (*c[1] ? size_t(std::stoul(c[1])) : s.size()));
+    }
+}
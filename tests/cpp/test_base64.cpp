@@ -3,6 +3,7 @@
 #include <string>
 #include <vector>
 #include <cstdint>
+#include <algorithm>
 
 // Test base64 encoding functions
 TEST_CASE("Base64 encoding with std::string") {
@@ -293,3 +294,115 @@ TEST_CASE("Base64 vector<uint8_t> round-trip") {
         CHECK(test_case == decoded);
     }
 }
+
+// Test decoding straight from a pointer/length pair
+TEST_CASE("Base64 decoding from pointer and length") {
+    const char* input = "SGVsbG8sIFdvcmxkIQ==trailing";
+    std::string output;
+
+    b2t::base64_decode(output, input, 20);
+
+    CHECK(output == "Hello, World!");
+}
+
+// Test encoding/decoding into caller-owned buffers
+TEST_CASE("Base64 encode_into and decode_into") {
+    const std::string input = "Hello, World!";
+    char encoded[32];
+
+    CHECK(b2t::base64_encoded_length(input.size()) == 20);
+    size_t n = b2t::base64_encode_into(encoded, reinterpret_cast<const uint8_t*>(input.data()), input.size());
+    CHECK(std::string(encoded, n) == "SGVsbG8sIFdvcmxkIQ==");
+
+    uint8_t decoded[32];
+    CHECK(b2t::base64_max_decoded_length(n) >= input.size());
+    size_t m = b2t::base64_decode_into(decoded, encoded, n);
+    CHECK(std::string(reinterpret_cast<char*>(decoded), m) == input);
+}
+
+// Every vectorized kernel available on this CPU must match the portable code
+TEST_CASE("Base64 SIMD kernels match the scalar kernel") {
+    std::vector<uint8_t> input(1000);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+
+    const b2t::detail::base64_kernel scalar = b2t::detail::base64_kernel_for(b2t::simd_scalar);
+    const b2t::simd_level levels[] = { b2t::simd_neon, b2t::simd_ssse3, b2t::simd_avx2 };
+
+    for (size_t len = 0; len < input.size(); len += 37) {
+        std::string expected(b2t::base64_encoded_length(len), '\0');
+        b2t::detail::base64_encode_into_with(scalar, &expected[0], input.data(), len);
+
+        for (b2t::simd_level level : levels) {
+            const b2t::detail::base64_kernel k = b2t::detail::base64_kernel_for(level);
+            std::string encoded(b2t::base64_encoded_length(len), '\0');
+            b2t::detail::base64_encode_into_with(k, &encoded[0], input.data(), len);
+            CHECK(encoded == expected);
+
+            std::vector<uint8_t> decoded(b2t::base64_max_decoded_length(encoded.size()));
+            size_t n = b2t::detail::base64_decode_into_with(k, decoded.data(), encoded.data(), encoded.size());
+            CHECK(n == len);
+            CHECK(std::equal(input.begin(), input.begin() + len, decoded.begin()));
+        }
+    }
+}
+
+TEST_CASE("Base64 decode_into reports the first invalid character") {
+    std::vector<uint8_t> input(150);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+    std::string text;
+    b2t::base64_encode(text, input.data(), input.size());
+    std::vector<uint8_t> decoded(b2t::base64_max_decoded_length(text.size() + 8));
+    size_t invalid_at = 0;
+
+    b2t::base64_decode_into(decoded.data(), text.data(), text.size(), &invalid_at);
+    CHECK(invalid_at == text.size());
+
+    for (size_t pos : { size_t(0), size_t(1), size_t(17), size_t(64), size_t(150), text.size() - 1 }) {
+        for (char bad : { '!', '-', '_', '<', '\n', '\x80', '\xff' }) {
+            std::string broken = text;
+            broken[pos] = bad;
+            b2t::base64_decode_into(decoded.data(), broken.data(), broken.size(), &invalid_at);
+            CHECK(invalid_at == pos);
+        }
+    }
+
+    // Padding is only valid at the end of the final group, which must fill it
+    const char* cases[][2] = {
+        { "QQ==", "" }, { "QUE=", "" }, { "QQ", "" }, { "QUE", "" }, { "QQ=", "2" }, { "Q", "0" },
+        { "QUFBQ", "4" }, { "Q===", "1" }, { "QQ==QUFB", "4" }, { "QQ=A", "3" }, { "QUE==", "4" },
+    };
+    for (auto& c : cases) {
+        const std::string s = c[0];
+        b2t::base64_decode_into(decoded.data(), s.data(), s.size(), &invalid_at);
+        CHECK(invalid_at == (*c[1] ? size_t(std::stoul(c[1])) : s.size()));
+    }
+}
+
+#if defined(B2T_NEON)
+// The NEON kernels must decode valid blocks themselves rather than leave
+// every character to the scalar tail
+TEST_CASE("Base64 NEON kernels decode valid blocks") {
+    std::vector<uint8_t> input(96);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+
+    for (const b2t::base64_alphabet* a : { &b2t::base64_standard_alphabet(), &b2t::base64_url_alphabet() }) {
+        std::string text(b2t::base64_encoded_length(input.size()), '\0');
+        b2t::detail::base64_encode_table_neon(&text[0], input.data(), input.size(), *a);
+
+        std::vector<uint8_t> decoded(input.size());
+        const uint8_t* in = reinterpret_cast<const uint8_t*>(text.data());
+        size_t i = b2t::detail::base64_decode_table_neon(decoded.data(), in, text.size(), *a);
+        CHECK(i > 0);
+        CHECK(i == text.size());
+        CHECK(std::equal(decoded.begin(), decoded.begin() + i / 4 * 3, input.begin()));
+    }
+    std::string text;
+    b2t::base64_encode(text, input.data(), input.size());
+    std::vector<uint8_t> decoded(input.size());
+    CHECK(b2t::detail::base64_decode_blocks_neon(decoded.data(), reinterpret_cast<const uint8_t*>(text.data()),
+                                                 text.size()) == text.size());
+}
+#endif
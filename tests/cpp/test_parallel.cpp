@@ -0,0 +1,121 @@
+#include "doctest.h"
+#include "base64.h"
+#include "base32.h"
+#include "base16.h"
+#include "base128.h"
+#include "parallel.h"
+#include <string>
+#include <vector>
+
+using namespace std;
+using namespace b2t;
+
+namespace {
+    struct codec {
+        encode_into_fn encode;
+        decode_into_fn decode;
+        checked_decode_into_fn checked;
+        size_t (*encoded_length)(size_t);
+        size_t (*max_decoded_length)(size_t);
+        size_t groupIn, groupOut;
+        bool stopAtShortGroup;
+    };
+
+    const codec codecs[] = {
+        { encode_kernel<base64_encode_into>, decode_kernel<base64_decode_into>, checked_kernel<base64_decode_into>, base64_encoded_length, base64_max_decoded_length, 3, 4, false },
+        { encode_kernel<base32_encode_into>, decode_kernel<base32_decode_into>, checked_kernel<base32_decode_into>, base32_encoded_length, base32_max_decoded_length, 5, 8, true },
+        { encode_kernel<base16_encode_into>, decode_kernel<base16_decode_into>, checked_kernel<base16_decode_into>, base16_encoded_length, base16_max_decoded_length, 1, 2, false },
+        { encode_kernel<base128_encode_into>, decode_kernel<base128_decode_into>, checked_kernel<base128_decode_into>, base128_encoded_length, base128_max_decoded_length, 7, 8, false },
+    };
+
+    vector<uint8_t> decode_serial(const codec& c, const string& text) {
+        vector<uint8_t> out(c.max_decoded_length(text.size()));
+        out.resize(c.decode(NULL, out.data(), text.data(), text.size()));
+        return out;
+    }
+
+    vector<uint8_t> decode_parallel(const codec& c, const string& text, unsigned workers) {
+        vector<uint8_t> out(c.max_decoded_length(text.size()));
+        out.resize(parallel_decode_into(c.decode, NULL, c.groupOut, c.groupIn, c.stopAtShortGroup,
+                                        out.data(), text.data(), text.size(), workers));
+        return out;
+    }
+}
+
+TEST_CASE("Parallel encode and decode match the single-threaded kernels") {
+    vector<uint8_t> input(3 * parallel_min_chunk + 11);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + (i >> 9));
+
+    for (const codec& c : codecs) {
+        for (size_t len : { size_t(0), size_t(100), input.size() - 5, input.size() }) {
+            string expected(c.encoded_length(len), '\0');
+            c.encode(NULL, &expected[0], input.data(), len);
+
+            for (unsigned workers : { 1u, 2u, 3u, 8u }) {
+                string encoded(c.encoded_length(len), '\0');
+                size_t n = parallel_encode_into(c.encode, NULL, c.groupIn, c.groupOut,
+                                                &encoded[0], input.data(), len, workers);
+                CHECK(n == expected.size());
+                CHECK(encoded == expected);
+
+                vector<uint8_t> decoded = decode_parallel(c, encoded, workers);
+                CHECK(decoded == vector<uint8_t>(input.begin(), input.begin() + len));
+            }
+        }
+    }
+}
+
+TEST_CASE("Parallel decode handles padding and invalid characters mid-stream") {
+    vector<uint8_t> input(2 * parallel_min_chunk + 3);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 7);
+
+    for (const codec& c : codecs) {
+        string encoded(c.encoded_length(input.size()), '\0');
+        c.encode(NULL, &encoded[0], input.data(), input.size());
+
+        // Corrupt the first piece so it decodes short, then compare with the
+        // single-threaded decoder, which defines the expected semantics
+        string broken = encoded;
+        broken[c.groupOut * 10 + 1] = '=';
+        broken[encoded.size() / 2 + 3] = '!';
+        for (unsigned workers : { 2u, 4u }) {
+            CHECK(decode_parallel(c, broken, workers) == decode_serial(c, broken));
+        }
+    }
+}
+
+TEST_CASE("Parallel checked decode reports the same offset as the single-threaded one") {
+    vector<uint8_t> input(2 * parallel_min_chunk + 3);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 7);
+
+    for (const codec& c : codecs) {
+        string encoded(c.encoded_length(input.size()), '\0');
+        c.encode(NULL, &encoded[0], input.data(), input.size());
+
+        // Valid input, a bad byte in the second half, and (for the padded
+        // codecs) a group padded in the middle of the input
+        vector<string> texts(2, encoded);
+        texts[1][encoded.size() / 2 + 3] = static_cast<char>(0xC3);
+        if (c.groupOut != 2 && c.groupIn != 7) {
+            texts.push_back(encoded);
+            texts.back()[c.groupOut * 10 + 3] = '=';
+        }
+
+        for (const string& text : texts) {
+            vector<uint8_t> serial(c.max_decoded_length(text.size()));
+            size_t serial_invalid = 0;
+            c.checked(NULL, serial.data(), text.data(), text.size(), &serial_invalid);
+
+            for (unsigned workers : { 2u, 4u }) {
+                vector<uint8_t> out(c.max_decoded_length(text.size()));
+                size_t invalid = 0;
+                parallel_decode_into(c.checked, NULL, c.groupOut, c.groupIn, c.stopAtShortGroup,
+                                     out.data(), text.data(), text.size(), workers, &invalid);
+                CHECK(invalid == serial_invalid);
+            }
+        }
+    }
+}
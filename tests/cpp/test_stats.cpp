@@ -0,0 +1,58 @@
+#include "doctest.h"
+#include "stats.h"
+#include <thread>
+#include <vector>
+
+using namespace b2t;
+
+TEST_CASE("Stats count calls, bytes and latency buckets") {
+    static op_stats s;
+    stats_reset(s);
+
+    CHECK(detail::stats_bucket(0) == 0);
+    CHECK(detail::stats_bucket(1) == 0);
+    CHECK(detail::stats_bucket(2) == 1);
+    CHECK(detail::stats_bucket(1023) == 9);
+    CHECK(detail::stats_bucket(1024) == 10);
+    CHECK(detail::stats_bucket(~uint64_t(0)) == stats_buckets - 1);
+
+    const uint64_t start = stats_clock();
+    CHECK(start != 0);
+    stats_record(s, start, 3, 4);
+    stats_record(s, start, 6, 8);
+
+    op_stats_snapshot snap;
+    stats_snapshot(s, snap);
+    CHECK(snap.calls == 2);
+    CHECK(snap.bytes_in == 9);
+    CHECK(snap.bytes_out == 12);
+    uint64_t counted = 0;
+    for (unsigned i = 0; i < stats_buckets; ++i)
+        counted += snap.latency[i];
+    CHECK(counted == 2);
+
+    stats_reset(s);
+    stats_snapshot(s, snap);
+    CHECK(snap.calls == 0);
+    CHECK(snap.nanoseconds == 0);
+}
+
+TEST_CASE("Stats record from many threads without losing counts") {
+    static op_stats s;
+    stats_reset(s);
+
+    std::vector<std::thread> threads;
+    for (int t = 0; t < 4; ++t)
+        threads.push_back(std::thread([] {
+            for (int i = 0; i < 10000; ++i)
+                stats_record(s, stats_clock(), 1, 2);
+        }));
+    for (std::thread& t : threads)
+        t.join();
+
+    op_stats_snapshot snap;
+    stats_snapshot(s, snap);
+    CHECK(snap.calls == 40000);
+    CHECK(snap.bytes_in == 40000);
+    CHECK(snap.bytes_out == 80000);
+}
@@ -0,0 +1,152 @@
+#include "doctest.h"
+#include "variants.h"
+#include "wrap.h"
+#include <algorithm>
+#include <string>
+#include <vector>
+
+using namespace std;
+using namespace b2t;
+
+namespace {
+    string encode(const codec_variant& v, const string& data) {
+        string out(v.encoded_length(v.ctx, data.size()), '\0');
+        out.resize(v.encode(v.ctx, &out[0], reinterpret_cast<const uint8_t*>(data.data()), data.size()));
+        return out;
+    }
+
+    string decode(const codec_variant& v, const string& text, size_t& invalid) {
+        string out(text.size(), '\0');
+        out.resize(v.checked(v.ctx, reinterpret_cast<uint8_t*>(&out[0]), text.data(), text.size(), &invalid));
+        return out;
+    }
+}
+
+TEST_CASE("Base64 alphabet variants") {
+    codec_variant url, url_unpadded;
+    base64_alphabet unpadded = base64_url_alphabet();
+    unpadded.pad = '\0';
+    base64_variant(base64_url_alphabet(), url);
+    base64_variant(unpadded, url_unpadded);
+
+    size_t invalid = 0;
+    CHECK(encode(url, "\xfb\xff\xbf?") == "-_-_Pw==");
+    CHECK(encode(url_unpadded, "\xfb\xff\xbf?") == "-_-_Pw");
+    CHECK(decode(url, "-_-_Pw", invalid) == "\xfb\xff\xbf?");
+    CHECK(invalid == 6);
+
+    // The standard characters are read leniently but are not strict URL-safe Base64
+    CHECK(decode(url, "+/+/", invalid) == "\xfb\xff\xbf");
+    CHECK(invalid == 0);
+    decode(url_unpadded, "Pw==", invalid);
+    CHECK(invalid == 2);
+
+    // Every alphabet shares the same kernels and only differs in ctx
+    CHECK(url_unpadded.encode == url.encode);
+    CHECK(url.ctx == &base64_url_alphabet());
+    CHECK(url_unpadded.ctx == &unpadded);
+
+    base64_alphabet custom;
+    CHECK_FALSE(base64_make_alphabet(custom, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+A", '='));
+    CHECK_FALSE(base64_make_alphabet(custom, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+=", '='));
+    CHECK(base64_make_alphabet(custom, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+=", '\0'));
+}
+
+// The table kernels of every level available on this CPU must match the
+// portable code, including where a block holds an invalid character
+TEST_CASE("Base64 table kernels match the scalar kernel") {
+    vector<uint8_t> input(1000);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + 7);
+
+    base64_alphabet reversed;
+    string chars(to_base64, 64);
+    reverse(chars.begin(), chars.end());
+    REQUIRE(base64_make_alphabet(reversed, chars.c_str(), '.'));
+
+    const detail::base64_kernel scalar = detail::base64_kernel_for(simd_scalar);
+    const simd_level levels[] = { simd_neon, simd_ssse3, simd_avx2 };
+
+    const base64_alphabet* alphabets[] = { &base64_url_alphabet(), &reversed };
+    for (const base64_alphabet* a : alphabets) {
+        for (size_t len = 0; len < input.size(); len += 37) {
+            string expected(base64_encoded_length(*a, len), '\0');
+            detail::base64_encode_into_with(scalar, *a, &expected[0], input.data(), len);
+
+            for (simd_level level : levels) {
+                const detail::base64_kernel k = detail::base64_kernel_for(level);
+                string encoded(base64_encoded_length(*a, len), '\0');
+                detail::base64_encode_into_with(k, *a, &encoded[0], input.data(), len);
+                CHECK(encoded == expected);
+
+                vector<uint8_t> decoded(base64_max_decoded_length(encoded.size()));
+                size_t suspect;
+                size_t n = detail::base64_decode_into_with(k, *a, decoded.data(), encoded.data(),
+                                                           encoded.size(), suspect);
+                CHECK(n == len);
+                CHECK(equal(input.begin(), input.begin() + len, decoded.begin()));
+
+                if (encoded.size() > 100) {
+                    string broken = encoded;
+                    broken[70] = '\x80';
+                    vector<uint8_t> partial(decoded.size());
+                    detail::base64_decode_into_with(k, *a, partial.data(), broken.data(), broken.size(), suspect);
+                    CHECK(suspect == 68);
+                    CHECK(equal(input.begin(), input.begin() + 51, partial.begin()));
+                }
+            }
+        }
+    }
+}
+
+TEST_CASE("Base32 alphabet variants") {
+    codec_variant hex, crockford;
+    base32_variant(base32_hex_alphabet(), hex);
+    base32_variant(base32_crockford_alphabet(), crockford);
+
+    // RFC 4648 section 10
+    size_t invalid = 0;
+    CHECK(encode(hex, "f") == "CO======");
+    CHECK(encode(hex, "foobar") == "CPNMUOJ1E8======");
+    CHECK(decode(hex, "cpnmuoj1e8======", invalid) == "foobar");
+    CHECK(invalid == 16);
+
+    CHECK(encode(crockford, "foobar") == "CSQPYRK1E8");
+    CHECK(decode(crockford, "csqpyrk1e8", invalid) == "foobar");
+    CHECK(invalid == 10);
+    CHECK(decode(crockford, "0O1IL", invalid) == decode(crockford, "00111", invalid));
+    CHECK(invalid == 5);
+    decode(crockford, "CSQPYRK1E8======", invalid);
+    CHECK(invalid == 10);
+
+    base32_alphabet custom;
+    CHECK_FALSE(base32_make_alphabet(custom, "ABCDEFGHIJKLMNOPQRSTUVWXYZ23456A", '='));
+    CHECK_FALSE(base32_make_alphabet(custom, "ABCDEFGHIJKLMNOPQRSTUVWXYZ23456 ", '='));
+}
+
+TEST_CASE("Unpadded variants wrap and decode across lines") {
+    codec_variant v;
+    base32_alphabet unpadded = base32_hex_alphabet();
+    unpadded.pad = '\0';
+    base32_variant(unpadded, v);
+
+    for (size_t len = 0; len < 40; ++len) {
+        const string data(len, 'x');
+        const string plain = encode(v, data);
+        string expected;
+        for (size_t i = 0; i < plain.size(); i += 6)
+            expected += plain.substr(i, 6) + "\n";
+
+        string wrapped(wrapped_length(plain.size(), 6), '\0');
+        wrapped.resize(encode_wrapped_into(v.encode, v.ctx, 5, 8, &wrapped[0],
+                                           reinterpret_cast<const uint8_t*>(data.data()), len, 6));
+        CHECK(wrapped == expected);
+
+        string decoded(len + 5, '\0');
+        size_t invalid = 0;
+        decoded.resize(decode_skipping_whitespace(v.checked, v.ctx, 8, 5, true, reinterpret_cast<uint8_t*>(&decoded[0]),
+                                                  wrapped.data(), wrapped.size(), &invalid));
+        CHECK(decoded == data);
+        CHECK(invalid == wrapped.size());
+    }
+}
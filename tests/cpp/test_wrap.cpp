@@ -0,0 +1,96 @@
+#include "doctest.h"
+#include "base64.h"
+#include "base32.h"
+#include "base16.h"
+#include "wrap.h"
+#include <string>
+#include <vector>
+
+using namespace std;
+using namespace b2t;
+
+namespace {
+    struct codec {
+        encode_into_fn encode;
+        checked_decode_into_fn checked;
+        size_t (*encoded_length)(size_t);
+        size_t (*max_decoded_length)(size_t);
+        size_t groupIn, groupOut;
+        bool stopAtShortGroup;
+    };
+
+    const codec codecs[] = {
+        { encode_kernel<base64_encode_into>, checked_kernel<base64_decode_into>, base64_encoded_length, base64_max_decoded_length, 3, 4, false },
+        { encode_kernel<base32_encode_into>, checked_kernel<base32_decode_into>, base32_encoded_length, base32_max_decoded_length, 5, 8, true },
+        { encode_kernel<base16_encode_into>, checked_kernel<base16_decode_into>, base16_encoded_length, base16_max_decoded_length, 1, 2, false },
+    };
+
+    string encode(const codec& c, const vector<uint8_t>& data) {
+        string out(c.encoded_length(data.size()), '\0');
+        c.encode(NULL, &out[0], data.data(), data.size());
+        return out;
+    }
+
+    vector<uint8_t> decode(const codec& c, const string& text, size_t& invalid) {
+        vector<uint8_t> out(c.max_decoded_length(text.size()));
+        out.resize(decode_skipping_whitespace(c.checked, NULL, c.groupOut, c.groupIn, c.stopAtShortGroup,
+                                              out.data(), text.data(), text.size(), &invalid));
+        return out;
+    }
+}
+
+TEST_CASE("Wrapped encoding splits the output into lines") {
+    vector<uint8_t> input(10000);
+    for (size_t i = 0; i < input.size(); ++i)
+        input[i] = static_cast<uint8_t>(i * 131 + (i >> 7));
+
+    for (const codec& c : codecs) {
+        for (size_t len : { size_t(0), size_t(1), size_t(57), size_t(58), input.size() }) {
+            const vector<uint8_t> data(input.begin(), input.begin() + len);
+            const string plain = encode(c, data);
+
+            for (size_t wrap : { size_t(1), size_t(3), size_t(64), size_t(76), size_t(100000) }) {
+                string expected;
+                for (size_t i = 0; i < plain.size(); i += wrap)
+                    expected += plain.substr(i, wrap) + "\n";
+
+                string wrapped(wrapped_length(plain.size(), wrap), '\0');
+                size_t n = encode_wrapped_into(c.encode, NULL, c.groupIn, c.groupOut,
+                                               &wrapped[0], data.data(), len, wrap);
+                CHECK(n == expected.size());
+                CHECK(wrapped == expected);
+
+                size_t invalid = 0;
+                CHECK(decode(c, wrapped, invalid) == data);
+                CHECK(invalid == wrapped.size());
+            }
+        }
+    }
+}
+
+TEST_CASE("Whitespace-skipping decode reports offsets in the original input") {
+    size_t invalid = 0;
+
+    // Groups split across lines and runs of mixed whitespace
+    CHECK(decode(codecs[0], "SGVs\r\nbG8s IFdv\tcmxk\n IQ==\n", invalid) == vector<uint8_t>({
+        'H', 'e', 'l', 'l', 'o', ',', ' ', 'W', 'o', 'r', 'l', 'd', '!' }));
+    CHECK(invalid == 27);
+
+    decode(codecs[0], "SGVs\nbG!s\n", invalid);
+    CHECK(invalid == 7);
+    decode(codecs[0], "QQ==\n\nQUFB\n", invalid);    // data after padding
+    CHECK(invalid == 6);
+    decode(codecs[1], "MZXW6===\nMZXW6YTB", invalid);
+    CHECK(invalid == 9);
+    decode(codecs[2], "66 6f 6F 7g", invalid);
+    CHECK(invalid == 10);
+
+    // Errors past the first gathered block, with a line break every 61
+    // characters so groups straddle the lines
+    vector<uint8_t> input(20000, 0x5A);
+    string wrapped(wrapped_length(base64_encoded_length(input.size()), 61), '\0');
+    encode_wrapped_into(encode_kernel<base64_encode_into>, NULL, 3, 4, &wrapped[0], input.data(), input.size(), 61);
+    wrapped[wrapped.size() - 100] = '*';
+    CHECK(decode(codecs[0], wrapped, invalid).size() < input.size());
+    CHECK(invalid == wrapped.size() - 100);
+}
@@ -0,0 +1,94 @@
+import asyncio
+import base64 as py_base64
+
+import pytest
+from bin2text import aencode, adecode, aencode_stream, adecode_stream, Base64, Base32, Base16, Base128
+from bin2text import aio
+
+
+PAYLOAD = bytes((i * 131 + (i >> 8)) & 0xFF for i in range(300_007))
+CODECS = {"base64": Base64, "base32": Base32, "base16": Base16, "base128": Base128}
+
+
+class _Sink:
+    """Collects what a StreamWriter would send."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+def _reader(data, piece=10_000):
+    reader = asyncio.StreamReader()
+    for i in range(0, len(data), piece):
+        reader.feed_data(data[i:i + piece])
+    reader.feed_eof()
+    return reader
+
+
+@pytest.mark.parametrize("fmt", list(CODECS))
+def test_aencode_adecode(fmt):
+    """Test that the coroutines match the codecs, inline and on the worker pool."""
+    codec = CODECS[fmt]()
+    expected = codec.encode(PAYLOAD)
+
+    async def run():
+        small = await aencode(PAYLOAD[:100], format=fmt)
+        encoded, decoded = await asyncio.gather(aencode(PAYLOAD, format=fmt),
+                                                adecode(expected, format=fmt))
+        return small, encoded, decoded
+
+    small, encoded, decoded = asyncio.run(run())
+    assert small == codec.encode(PAYLOAD[:100])
+    assert encoded == expected
+    assert decoded == PAYLOAD
+
+
+def test_options_and_instances():
+    """Test codec options, codec instances as format, and errors raised from the pool."""
+    limit = aio.get_inline_limit()
+    aio.set_inline_limit(0)
+    try:
+        async def run():
+            wrapped = await aencode(PAYLOAD, wrap=76)
+            assert wrapped == py_base64.encodebytes(PAYLOAD).decode('ascii')
+            assert await adecode(wrapped, ignore_whitespace=True) == PAYLOAD
+            assert await aencode(b"\xfb\xff", format=Base64(alphabet='urlsafe', padding=False)) == "-_8"
+            with pytest.raises(ValueError, match="offset 4"):
+                await adecode("SGVs!G8=", strict=True)
+        asyncio.run(run())
+    finally:
+        aio.set_inline_limit(limit)
+
+    with pytest.raises(ValueError, match="unknown format"):
+        asyncio.run(aencode(b"abc", format="base85"))
+    with pytest.raises(ValueError):
+        aio.set_inline_limit(-1)
+
+
+@pytest.mark.parametrize("fmt", list(CODECS))
+def test_streams(fmt):
+    """Test encoding and decoding between a StreamReader and a writer."""
+    codec = CODECS[fmt]()
+    encoded = codec.encode(PAYLOAD).encode('ascii')
+    if fmt != "base128":
+        text = b"\n".join(encoded[i:i + 64] for i in range(0, len(encoded), 64))
+    else:
+        text = encoded
+
+    async def run():
+        encoded_sink, decoded_sink = _Sink(), _Sink()
+        await aencode_stream(_reader(PAYLOAD), encoded_sink, format=fmt, chunk_size=7_777)
+        await adecode_stream(_reader(text), decoded_sink, format=fmt)
+        return encoded_sink, decoded_sink
+
+    encoded_sink, decoded_sink = asyncio.run(run())
+    assert bytes(encoded_sink.data) == encoded
+    assert encoded_sink.drains > 1
+    assert bytes(decoded_sink.data) == PAYLOAD
@@ -1,5 +1,5 @@
 import pytest
-from bin2text import Base128, base128_encode, base128_decode
+from bin2text import Base128, base128_encode, base128_decode, base128_decode_to_bytes
 
 
 def test_base128_class_encode():
@@ -145,9 +145,43 @@ def test_binary_data():
     """Test with binary data."""
     binary_data = bytes(range(256))  # All possible byte values
 
-    # Encode then decode
+    # Binary data is not UTF-8, so it only decodes back as bytes
     encoded = base128_encode(binary_data)
-    decoded = base128_decode(encoded)
+    assert base128_decode_to_bytes(encoded) == binary_data
+    with pytest.raises(UnicodeDecodeError):
+        base128_decode(encoded)
 
-    # Verify roundtrip
-    assert decoded.encode('latin1') == binary_data  # Convert back to bytes for comparison
\ No newline at end of file
+
+def _reference_encode(data):
+    """Bit-by-bit Base128: 7 bits per character, least significant first."""
+    bits = int.from_bytes(data, 'little')
+    chars = (len(data) * 8 + 6) // 7
+    return ''.join(chr(((bits >> (7 * k)) + 33) & 0x7F) for k in range(chars))
+
+
+def test_simd_kernel_selected_at_import():
+    """Test that a kernel was picked and block boundaries match the bit layout."""
+    from bin2text import base128 as b2t_base128
+
+    assert b2t_base128.KERNEL in ("avx2", "ssse3", "neon", "scalar")
+
+    payload = bytes((i * 131 + 7) & 0xFF for i in range(1000))
+    for size in (0, 1, 6, 7, 8, 13, 14, 15, 16, 27, 28, 29, 30, 31, 57, 100, 1000):
+        encoded = base128_encode(payload[:size])
+        assert encoded == _reference_encode(payload[:size])
+        assert Base128().decode_to_bytes(encoded) == payload[:size]
+
+
+def test_strict_decoding():
+    """Test that strict decoding rejects bytes outside ASCII with their offset."""
+    b128 = Base128()
+    payload = bytes(range(256)) * 40
+    encoded = base128_encode(payload)
+
+    assert b128.decode_to_bytes(encoded, strict=True) == payload
+    assert base128_decode(base128_encode("Hello"), strict=True) == "Hello"
+
+    for text, offset in [(b"\x80", 0), (b"abc\xff", 3), (encoded[:5000].encode('ascii') + b"\xc3", 5000)]:
+        with pytest.raises(ValueError, match=f"at offset {offset}$"):
+            b128.decode_to_bytes(text, strict=True)
+        b128.decode_to_bytes(text)
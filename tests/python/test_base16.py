@@ -1,6 +1,6 @@
 import pytest
 import binascii
-from bin2text import Base16, base16_encode, base16_decode
+from bin2text import Base16, base16_encode, base16_decode, base16_decode_to_bytes
 
 
 def test_base16_class_encode():
@@ -200,7 +200,53 @@ def test_binary_data():
     expected_encoded = binascii.hexlify(binary_data).decode('utf-8').upper()
     assert encoded == expected_encoded
 
-    # Decode back
-    decoded = base16_decode(encoded)
-    expected_decoded = binascii.unhexlify(encoded.encode('utf-8')).decode('utf-8')
-    assert decoded == expected_decoded
\ No newline at end of file
+    # Binary data is not UTF-8, so it only decodes back as bytes
+    assert base16_decode_to_bytes(encoded) == binascii.unhexlify(encoded) == binary_data
+    with pytest.raises(UnicodeDecodeError):
+        base16_decode(encoded)
+
+
+def test_simd_kernel_selected_at_import():
+    """Test that a kernel was picked and large inputs round-trip through it."""
+    from bin2text import base16 as b2t_base16
+
+    assert b2t_base16.KERNEL in ("avx2", "ssse3", "neon", "scalar")
+
+    payload = bytes(range(256)) * 257
+    encoded = base16_encode(payload)
+    assert encoded == payload.hex().upper()
+    assert Base16().decode_to_bytes(encoded) == payload
+    assert Base16().decode_to_bytes(encoded.lower()) == payload
+
+
+def test_strict_decoding():
+    """Test that strict decoding rejects invalid input with the offset of the first bad character."""
+    b16 = Base16()
+    payload = bytes(range(256)) * 40
+    encoded = base16_encode(payload)
+
+    assert b16.decode_to_bytes(encoded, strict=True) == payload
+    assert b16.decode_to_bytes(encoded.lower(), strict=True) == payload
+    assert base16_decode("48656C6C6F", strict=True) == "Hello"
+
+    for text, offset in [("48656G6C6F", 5), ("4865 6C6F", 4), (encoded[:5000] + "x" + encoded[5001:], 5000)]:
+        with pytest.raises(ValueError, match=f"at offset {offset}$"):
+            b16.decode_to_bytes(text, strict=True)
+        b16.decode_to_bytes(text)
+
+
+def test_wrapped_encoding_and_whitespace():
+    """Test wrap=N output and decoding of wrapped input with ignore_whitespace."""
+    b16 = Base16()
+    payload = bytes(range(256)) * 40
+
+    wrapped = b16.encode(payload, wrap=60)
+    assert wrapped.split("\n")[:-1] == [binascii.hexlify(payload[i:i + 30]).decode().upper()
+                                        for i in range(0, len(payload), 30)]
+    assert base16_encode(b"Hello", wrap=3) == "486\n56C\n6C6\nF\n"
+
+    assert b16.decode_to_bytes(wrapped, ignore_whitespace=True) == payload
+    assert base16_decode("48 65 6c 6c 6f", strict=True, ignore_whitespace=True) == "Hello"
+
+    with pytest.raises(ValueError, match="at offset 10$"):
+        b16.decode_to_bytes("66 6f 6F 7g", strict=True, ignore_whitespace=True)
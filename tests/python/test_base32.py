@@ -1,7 +1,8 @@
 import pytest
 import base64 as py_base64
 import base64 as py_base32  # We'll use base64 module to compare with our implementation
-from bin2text import Base32, base32_encode, base32_decode
+from bin2text import (Base32, base32_encode, base32_decode, base32_decode_to_bytes, base32hex_encode,
+                      base32hex_decode, base32hex_decode_to_bytes)
 
 
 def test_base32_class_encode():
@@ -220,7 +221,86 @@ def test_binary_data():
     expected_encoded = py_base64.b32encode(binary_data).decode('utf-8')
     assert encoded == expected_encoded
 
-    # Decode back
-    decoded = base32_decode(encoded)
-    expected_decoded = py_base64.b32decode(encoded.encode('utf-8')).decode('utf-8')
-    assert decoded == expected_decoded
\ No newline at end of file
+    # Binary data is not UTF-8, so it only decodes back as bytes
+    assert base32_decode_to_bytes(encoded) == py_base64.b32decode(encoded) == binary_data
+    with pytest.raises(UnicodeDecodeError):
+        base32_decode(encoded)
+
+
+def test_strict_decoding():
+    """Test that strict decoding rejects invalid input with the offset of the first bad character."""
+    b32 = Base32()
+    payload = bytes(range(256)) * 40
+    encoded = base32_encode(payload)
+
+    assert b32.decode_to_bytes(encoded, strict=True) == payload
+    assert b32.decode_to_bytes(encoded.lower(), strict=True) == payload
+    assert base32_decode("MZXW6===", strict=True) == "foo"
+
+    cases = [
+        ("MZXW6YT1", 7),
+        ("MZXW6===MZXW6YTB", 8),      # data after padding
+        ("MZX=====", 3),              # padding after 3 characters
+        ("MZXW6YTB\n", 8),
+        (encoded[:5000] + "0" + encoded[5001:], 5000),
+    ]
+    for text, offset in cases:
+        with pytest.raises(ValueError, match=f"at offset {offset}$"):
+            b32.decode_to_bytes(text, strict=True)
+        b32.decode_to_bytes(text)
+
+
+def test_wrapped_encoding_and_whitespace():
+    """Test wrap=N output and decoding of wrapped input with ignore_whitespace."""
+    b32 = Base32()
+    payload = bytes(range(256)) * 40
+    expected = py_base64.b32encode(payload)
+
+    wrapped = b32.encode(payload, wrap=76)
+    lines = wrapped.split("\n")
+    assert lines[-1] == "" and all(len(line) == 76 for line in lines[:-2])
+    assert "".join(lines).encode('ascii') == expected
+    assert base32_encode(b"foo", wrap=3) == "MZX\nW6=\n==\n"
+
+    assert b32.decode_to_bytes(wrapped, ignore_whitespace=True) == payload
+    assert b32.decode_to_bytes(wrapped, strict=True, ignore_whitespace=True) == payload
+    assert base32_decode("MZX\nW6=\n==\n", ignore_whitespace=True) == "foo"
+
+    with pytest.raises(ValueError, match="at offset 9$"):
+        b32.decode_to_bytes("MZXW6===\nMZXW6YTB", strict=True, ignore_whitespace=True)
+
+
+def test_alphabet_variants():
+    """Test the base32hex, Crockford and custom alphabets."""
+    payload = bytes(range(256)) * 40
+    for n in (0, 1, 2, 3, 4, 5, 47, len(payload)):
+        data = payload[:n]
+        expected = py_base64.b32hexencode(data)
+        assert base32hex_encode(data) == expected.decode('ascii')
+        assert base32hex_decode_to_bytes(expected, strict=True) == data
+        assert base32hex_decode_to_bytes(expected.lower()) == data
+    # Like base32_decode, base32hex_decode returns str
+    assert base32hex_decode(base32hex_encode("h\u00e9llo")) == "h\u00e9llo"
+
+    hex32 = Base32(alphabet='hex', padding=False, workers=4)
+    assert hex32.encode(payload * 100) == py_base64.b32hexencode(payload * 100).rstrip(b"=").decode('ascii')
+    assert hex32.encode(b"f") == "CO"
+    with pytest.raises(ValueError, match="at offset 2$"):
+        hex32.decode_to_bytes("CO======", strict=True)
+
+    crockford = Base32(alphabet='crockford')
+    assert crockford.encode(b"foobar") == "CSQPYRK1E8"
+    assert crockford.decode_to_bytes("csqpyrk1e8", strict=True) == b"foobar"
+    assert crockford.decode_to_bytes("0OI1L") == crockford.decode_to_bytes("00111")
+    assert Base32(alphabet='crockford', padding=True).encode(b"f") == "CR======"
+
+    standard = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+    custom = "ybndrfg8ejkmcpqxot1uwisza345h769"   # z-base-32's characters
+    b32 = Base32(alphabet=custom, padding=False)
+    encoded = b32.encode(payload)
+    assert encoded == py_base64.b32encode(payload).decode('ascii').translate(str.maketrans(standard, custom))
+    assert b32.decode_to_bytes(encoded, strict=True) == payload
+
+    for alphabet in ("abc", standard[:-1] + "A", standard[:-1] + "=", 32):
+        with pytest.raises((ValueError, TypeError)):
+            Base32(alphabet=alphabet)
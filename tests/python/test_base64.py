@@ -1,6 +1,7 @@
 import pytest
 import base64 as py_base64
-from bin2text import Base64, base64_encode, base64_decode
+from bin2text import (Base64, base64_encode, base64_decode, base64_decode_to_bytes, base64url_encode,
+                      base64url_decode, base64url_decode_to_bytes)
 
 
 def test_base64_class_encode():
@@ -178,10 +179,10 @@ def test_base64_class_vs_function():
 
 def test_error_handling():
     """Test error handling for invalid base64 strings."""
-    # Test with invalid base64 string
+    # Test with invalid base64 string; only strict decoding rejects it
     invalid_b64 = "InvalidBase64!"
-    with pytest.raises(Exception):
-        base64_decode(invalid_b64)
+    with pytest.raises(ValueError, match="'!' at offset 13$"):
+        base64_decode(invalid_b64, strict=True)
 
 
 def test_large_data():
@@ -212,10 +213,10 @@ def test_binary_data():
     expected_encoded = py_base64.b64encode(binary_data).decode('utf-8')
     assert encoded == expected_encoded
 
-    # Decode back
-    decoded = base64_decode(encoded)
-    expected_decoded = py_base64.b64decode(encoded.encode('utf-8')).decode('utf-8')
-    assert decoded == expected_decoded
+    # Binary data is not UTF-8, so it only decodes back as bytes
+    assert base64_decode_to_bytes(encoded) == py_base64.b64decode(encoded) == binary_data
+    with pytest.raises(UnicodeDecodeError):
+        base64_decode(encoded)
 
 
 def test_edge_cases():
@@ -236,4 +237,124 @@ def test_edge_cases():
     for b64_str in test_cases:
         our_result = base64_decode(b64_str)
         py_result = py_base64.b64decode(b64_str.encode('utf-8')).decode('utf-8')
-        assert our_result == py_result
\ No newline at end of file
+        assert our_result == py_result
+
+
+def test_simd_kernel_selected_at_import():
+    """Test that a kernel was picked and large inputs round-trip through it."""
+    from bin2text import base64 as b2t_base64
+
+    assert b2t_base64.KERNEL in ("avx2", "ssse3", "neon", "scalar")
+
+    payload = bytes(range(256)) * 257
+    encoded = base64_encode(payload)
+    assert encoded == py_base64.b64encode(payload).decode('ascii')
+    assert Base64().decode_to_bytes(encoded) == payload
+
+
+def test_strict_decoding():
+    """Test that strict decoding rejects invalid input with the offset of the first bad character."""
+    b64 = Base64()
+    payload = bytes(range(256)) * 40
+    encoded = base64_encode(payload)
+
+    assert b64.decode_to_bytes(encoded, strict=True) == payload
+    assert base64_decode("SGVsbG8=", strict=True) == "Hello"
+    assert b64.decode_to_bytes("SGVsbG8", strict=True) == b"Hello"
+
+    cases = [
+        ("SGVs!G8=", 4),
+        ("SGVsbG8=QQ==", 8),          # data after padding
+        ("SGVsbG8==", 8),             # too much padding
+        ("S===", 1),
+        ("SGVs\nbG8=", 4),
+        ("SGVs-G8_", 4),              # URL-safe characters
+        (encoded[:5000] + "*" + encoded[5001:], 5000),
+    ]
+    for text, offset in cases:
+        with pytest.raises(ValueError, match=f"at offset {offset}$"):
+            b64.decode_to_bytes(text, strict=True)
+        # The default stays lenient
+        b64.decode_to_bytes(text)
+
+
+def test_wrapped_encoding_and_whitespace():
+    """Test wrap=N output and decoding of wrapped input with ignore_whitespace."""
+    b64 = Base64()
+    payload = bytes(range(256)) * 40
+
+    wrapped = b64.encode(payload, wrap=76)
+    assert wrapped.encode('ascii') == py_base64.encodebytes(payload)
+    assert base64_encode(b"Hello", wrap=4) == "SGVs\nbG8=\n"
+    assert b64.encode(b"") == b64.encode(b"", wrap=76) == ""
+
+    assert b64.decode_to_bytes(wrapped, ignore_whitespace=True) == payload
+    assert b64.decode_to_bytes(wrapped, strict=True, ignore_whitespace=True) == payload
+    assert base64_decode(" SGVs\r\n\tbG8=\n", ignore_whitespace=True) == "Hello"
+
+    # Offsets still count the skipped whitespace
+    with pytest.raises(ValueError, match="at offset 7$"):
+        b64.decode_to_bytes("SGVs\nbG!=\n", strict=True, ignore_whitespace=True)
+    with pytest.raises(ValueError, match="at offset 4$"):
+        b64.decode_to_bytes("SGVs\nbG8=\n", strict=True)
+    with pytest.raises(ValueError, match="non-negative"):
+        b64.encode(payload, wrap=-1)
+
+
+def test_alphabet_variants():
+    """Test the URL-safe and custom alphabets, with and without padding."""
+    payload = bytes(range(256)) * 40
+    for n in (0, 1, 2, 3, 47, len(payload)):
+        data = payload[:n]
+        expected = py_base64.urlsafe_b64encode(data)
+        assert base64url_encode(data) == expected.decode('ascii')
+        assert base64url_encode(data, padding=False) == expected.rstrip(b"=").decode('ascii')
+        assert base64url_decode_to_bytes(expected, strict=True) == data
+        assert base64url_decode_to_bytes(expected.rstrip(b"="), strict=True) == data
+    # Like base64_decode, base64url_decode returns str
+    assert base64url_decode(base64url_encode("h\u00e9llo?>", padding=False)) == "h\u00e9llo?>"
+
+    url = Base64(alphabet='urlsafe', padding=False, workers=4)
+    assert url.encode(payload * 100) == py_base64.urlsafe_b64encode(payload * 100).rstrip(b"=").decode('ascii')
+    assert url.encode_many([b"\xfb\xff", b"?"]) == ["-_8", "Pw"]
+    with pytest.raises(ValueError, match="at offset 2$"):
+        url.decode_to_bytes("Pw==", strict=True)
+    with pytest.raises(ValueError, match="at offset 1$"):
+        Base64(alphabet='urlsafe').decode_to_bytes("-+==", strict=True)
+
+    standard = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+    custom = standard[::-1]
+    b64 = Base64(alphabet=custom)
+    encoded = b64.encode(payload)
+    assert encoded == py_base64.b64encode(payload).decode('ascii').translate(str.maketrans(standard, custom))
+    assert b64.decode_to_bytes(encoded, strict=True) == payload
+    assert b64.decode_to_bytes(b64.encode(payload, wrap=64), ignore_whitespace=True) == payload
+
+    for alphabet in ("abc", standard[:-1] + "A", standard[:-1] + "=", "\xe9" * 64):
+        with pytest.raises(ValueError):
+            Base64(alphabet=alphabet)
+
+    # Every instance holds its own tables, so any number of alphabets can be
+    # in use at once
+    codecs = [Base64(alphabet=standard[k:] + standard[:k], padding=k % 2 == 0) for k in range(300)]
+    for k, codec in enumerate(codecs):
+        rotated = str.maketrans(standard, standard[k:] + standard[:k])
+        expected = py_base64.b64encode(payload[:100]).decode('ascii').translate(rotated)
+        assert codec.encode(payload[:100]) == (expected if k % 2 == 0 else expected.rstrip("="))
+        assert codec.decode_to_bytes(codec.encode(payload[:100]), strict=True) == payload[:100]
+
+
+def test_str_input_and_output():
+    """Test that str results are plain ASCII strings and str input is read as UTF-8."""
+    b64 = Base64()
+    for data in ("", "a", "plain ascii text" * 100, "h\xe9llo wörld \U0001f600" * 50):
+        encoded = b64.encode(data)
+        expected = py_base64.b64encode(data.encode('utf-8')).decode('ascii')
+        assert encoded == expected
+        assert type(encoded) is str and encoded.isascii()
+        assert hash(encoded) == hash(expected)
+        assert {encoded: 1}[expected] == 1
+        assert b64.decode(encoded) == data
+        assert b64.decode_to_bytes(encoded) == data.encode('utf-8')
+    plain = py_base64.b64encode(b"x" * 100).decode('ascii')
+    assert b64.encode("x" * 100, wrap=10) == "".join(plain[i:i + 10] + "\n" for i in range(0, len(plain), 10))
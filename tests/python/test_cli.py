@@ -0,0 +1,65 @@
+import base64 as py_base64
+import io
+
+import pytest
+from bin2text.__main__ import main, stream
+
+
+PAYLOAD = bytes((i * 131 + 7) & 0xFF for i in range(100_000))
+
+
+def test_legacy_text_arguments(capsys):
+    """Test that --encode TEXT / --decode TEXT still print a labelled result."""
+    main(["--encode", "Hello, World!"])
+    assert capsys.readouterr().out == "Encoded (base64): SGVsbG8sIFdvcmxkIQ==\n"
+
+    main(["-d", "SGVsbG8sIFdvcmxkIQ==", "-f", "base64"])
+    assert capsys.readouterr().out == "Decoded (base64): Hello, World!\n"
+
+    main(["--encode", "Hello, World!", "-w", "8"])
+    assert capsys.readouterr().out == "Encoded (base64): SGVsbG8s\nIFdvcmxk\nIQ==\n"
+
+
+@pytest.mark.parametrize("fmt", ["base64", "base32", "base16", "base128"])
+def test_file_roundtrip(tmp_path, fmt):
+    """Test streaming a binary file through -i/-o in small chunks."""
+    src = tmp_path / "data.bin"
+    encoded = tmp_path / "data.txt"
+    decoded = tmp_path / "data.out"
+    src.write_bytes(PAYLOAD)
+
+    main(["-e", "-f", fmt, "-i", str(src), "-o", str(encoded)])
+    main(["-d", "-f", fmt, "-i", str(encoded), "-o", str(decoded)])
+    assert decoded.read_bytes() == PAYLOAD
+
+
+def test_raw_and_wrapped_output():
+    """Test that output matches the coreutils base64/base32 layout."""
+    out = io.BytesIO()
+    stream(io.BytesIO(PAYLOAD), out, chunk_size=1000)
+    assert out.getvalue() == py_base64.b64encode(PAYLOAD)
+
+    out = io.BytesIO()
+    stream(io.BytesIO(PAYLOAD), out, wrap=76, chunk_size=1000)
+    assert out.getvalue() == py_base64.encodebytes(PAYLOAD)
+
+    out = io.BytesIO()
+    stream(io.BytesIO(PAYLOAD), out, format="base32", wrap=60, chunk_size=999)
+    lines = out.getvalue().split(b"\n")
+    assert lines[-1] == b"" and all(len(line) == 60 for line in lines[:-2])
+    assert b"".join(lines) == py_base64.b32encode(PAYLOAD)
+
+    # Wrapped input decodes with the line breaks ignored
+    out = io.BytesIO()
+    stream(io.BytesIO(py_base64.encodebytes(PAYLOAD)), out, decode=True, chunk_size=777)
+    assert out.getvalue() == PAYLOAD
+
+
+def test_invalid_option_combinations():
+    """Test that conflicting options are rejected."""
+    with pytest.raises(SystemExit):
+        main(["--encode", "text", "-o", "out.txt"])
+    with pytest.raises(SystemExit):
+        main(["-e", "-d"])
+    with pytest.raises(SystemExit):
+        main(["-e", "-f", "base128", "-w", "76"])
@@ -0,0 +1,237 @@
+import array
+import mmap
+import sys
+import threading
+
+import pytest
+from bin2text import Base64, Base32, Base16, Base128
+
+
+CODECS = [Base64, Base32, Base16, Base128]
+
+
+def _module_attr(codec_type, name):
+    """Return ``name`` from the module of ``codec_type``, with ``{}`` replaced by its format."""
+    module = sys.modules[codec_type.__module__]
+    return getattr(module, name.format(module.__name__.rpartition('.')[2]))
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_buffer_protocol_inputs(codec_type):
+    """Test that any buffer-protocol object encodes like the equivalent bytes."""
+    np = pytest.importorskip("numpy")
+
+    payload = bytes(range(256)) * 4
+    expected = _module_attr(codec_type, "{}_encode")(payload)
+
+    mapped = mmap.mmap(-1, len(payload))
+    mapped.write(payload)
+
+    buffers = [
+        bytearray(payload),
+        memoryview(payload),
+        mapped,
+        array.array('B', payload),
+        np.frombuffer(payload, dtype=np.uint8),
+        np.frombuffer(payload, dtype=np.uint32),
+    ]
+    for buf in buffers:
+        assert _module_attr(codec_type, "{}_encode")(buf) == expected, \
+            f"Encoding failed for: {type(buf).__name__}"
+
+    # Decoding accepts the encoded text as bytes or bytearray as well
+    codec = codec_type()
+    assert codec.decode_to_bytes(expected.encode('ascii')) == payload
+    assert codec.decode_to_bytes(bytearray(expected.encode('ascii'))) == payload
+    mapped.close()
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_encode_decode_into(codec_type):
+    """Test writing into caller-owned buffers."""
+    codec = codec_type()
+
+    for size in range(0, 40):
+        payload = bytes((i * 37 + size) & 0xFF for i in range(size))
+        expected = codec.encode(payload)
+
+        # Encoding writes exactly encoded_length() characters
+        assert codec.encoded_length(size) == len(expected)
+        out = bytearray(codec.encoded_length(size) + 3)
+        written = codec.encode_into(payload, out)
+        assert written == len(expected)
+        assert out[:written].decode('ascii') == expected
+
+        # Decoding into a slice of a larger buffer
+        ring = bytearray(codec.max_decoded_length(len(expected)) + 8)
+        written = codec.decode_into(expected, memoryview(ring)[4:])
+        assert written == size
+        assert ring[4:4 + written] == payload
+        assert codec.decode_into(expected, memoryview(ring)[4:], strict=True) == size
+
+    # Undersized and read-only outputs are rejected
+    with pytest.raises(ValueError):
+        codec.encode_into(b"some payload", bytearray(1))
+    with pytest.raises((TypeError, BufferError, ValueError)):
+        codec.encode_into(b"some payload", bytes(64))
+    with pytest.raises(ValueError):
+        codec.encoded_length(-1)
+    with pytest.raises(ValueError, match="at offset 0$"):
+        codec.decode_into(b"\xff" * 16, bytearray(16), strict=True)
+
+
+@pytest.mark.parametrize("codec_type, encoded, offset", [
+    (Base64, "Z", 0),
+    (Base64, "ZZZZZ", 4),
+    (Base64, "zL=", 2),
+    (Base64, "Zm9v!", 4),
+    (Base32, "M", 0),
+    (Base32, "MZX", 2),
+    (Base32, "MZXW6YTBM", 8),
+    (Base32, "MY=", 2),
+    (Base16, "ABC", 2),
+    (Base128, "A", 0),
+    (Base128, Base128().encode(b"12345678")[:9], 8),
+])
+def test_strict_rejects_dangling_characters(codec_type, encoded, offset):
+    """Test that strict decoding rejects lengths and padding no encoder writes."""
+    codec = codec_type()
+    out = bytearray(codec.max_decoded_length(len(encoded)) + 8)
+    with pytest.raises(ValueError, match=f"at offset {offset}$"):
+        codec.decode_into(encoded, out, strict=True)
+    codec.decode_into(encoded[:offset], out, strict=True)
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_encode_decode_many(codec_type):
+    """Test batch encoding and decoding, as lists and packed buffers."""
+    encode_many = _module_attr(codec_type, "{}_encode_many")
+    decode_many = _module_attr(codec_type, "{}_decode_many")
+    codec = codec_type()
+    items = [bytes((i * 7 + j) & 0xFF for j in range(i % 50)) for i in range(200)]
+    items += ["text", bytearray(b"\x00\xff"), memoryview(b"strided")[::2]]
+    expected = [codec.encode(item) for item in items]
+
+    assert encode_many(items) == expected
+    assert encode_many(iter(items)) == expected
+    assert decode_many(expected) == [codec.decode_to_bytes(e) for e in expected]
+    assert codec.decode_many([e.encode('ascii') for e in expected])[:200] == items[:200]
+
+    packed, offsets = codec.encode_many(items, packed=True)
+    assert len(offsets) == len(items) + 1
+    assert offsets[0] == 0 and offsets[-1] == len(packed)
+    assert [packed[offsets[i]:offsets[i + 1]].decode('ascii')
+            for i in range(len(items))] == expected
+
+    packed, offsets = codec.decode_many(expected, packed=True)
+    assert [packed[offsets[i]:offsets[i + 1]] for i in range(200)] == items[:200]
+
+    assert encode_many([]) == []
+    assert decode_many([], packed=True)[0] == b""
+    with pytest.raises(TypeError):
+        encode_many(42)
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_encode_decode_array(codec_type):
+    """Test encoding rows of a uint8 array to a fixed-width S array and back."""
+    np = pytest.importorskip("numpy")
+
+    encode_array = _module_attr(codec_type, "{}_encode_array")
+    decode_array = _module_attr(codec_type, "{}_decode_array")
+    codec = codec_type()
+    rows = np.arange(64 * 32, dtype=np.uint64).reshape(64, 32)
+    rows = (rows * 2654435761 % 251).astype(np.uint8)
+
+    for width in (1, 5, 16, 32):
+        block = rows[:, :width]
+        encoded = encode_array(block)
+        assert encoded.shape == (64,)
+        assert encoded.dtype == np.dtype(f"S{codec.encoded_length(width)}")
+        assert encoded.tolist() == [codec.encode(row.tobytes()).encode('ascii') for row in block]
+
+        decoded = decode_array(encoded)
+        assert decoded.dtype == np.uint8
+        np.testing.assert_array_equal(decoded, block)
+        np.testing.assert_array_equal(codec.decode_array(encoded.astype('U')), block)
+        np.testing.assert_array_equal(decode_array(encoded, strict=True), block)
+
+        # Empty arrays keep their width and decode to their column count
+        empty = encode_array(block[:0])
+        assert empty.dtype == encoded.dtype
+        assert decode_array(empty).shape == (0, width)
+        assert decode_array(np.zeros(0, dtype=encoded.dtype)).shape[1] <= width
+        if codec_type in (Base64, Base32):
+            unpadded = codec_type(padding=False)
+            assert unpadded.decode_array(unpadded.encode_array(block[:0])).shape == (0, width)
+
+    encoded = encode_array(rows[:4, :6])
+    encoded[2] = encoded[2][:4] + b"\xff" + encoded[2][5:]
+    with pytest.raises(ValueError, match=r"'\\xff' at offset 4 of row 2$"):
+        decode_array(encoded, strict=True)
+    with pytest.raises(ValueError, match="at offset 0 of row 0$"):
+        codec.decode_array(np.array([b"\xff"]), strict=True)
+
+    with pytest.raises(TypeError):
+        encode_array(np.zeros(8))
+    with pytest.raises(ValueError, match="zero length"):
+        encode_array(rows[:, :0])
+    with pytest.raises(TypeError):
+        decode_array(rows)
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_streaming_encoder_decoder(codec_type):
+    """Test that chunked encoding/decoding matches the one-shot functions."""
+    encoder_type = _module_attr(codec_type, codec_type.__name__ + "Encoder")
+    decoder_type = _module_attr(codec_type, codec_type.__name__ + "Decoder")
+    codec = codec_type()
+    payload = bytes((i * 31 + 7) & 0xFF for i in range(1000))
+    expected = codec.encode(payload).encode('ascii')
+
+    for chunk in (1, 2, 3, 5, 7, 8, 64, 999, 4096):
+        encoder = encoder_type()
+        pieces = [encoder.update(payload[i:i + chunk]) for i in range(0, len(payload), chunk)]
+        assert b"".join(pieces) + encoder.finalize() == expected
+
+        decoder = decoder_type()
+        pieces = [decoder.update(expected[i:i + chunk]) for i in range(0, len(expected), chunk)]
+        assert b"".join(pieces) + decoder.finalize() == payload
+
+    # finalize() resets the object for reuse
+    encoder = encoder_type()
+    assert encoder.update(b"ab") + encoder.finalize() == codec.encode(b"ab").encode('ascii')
+    assert encoder.finalize() == b""
+    assert encoder.update(bytearray(b"abcd")) + encoder.finalize() == codec.encode(b"abcd").encode('ascii')
+
+
+@pytest.mark.parametrize("codec_type", CODECS, ids=lambda codec_type: codec_type.__name__)
+def test_reused_instance_scratch(codec_type):
+    """Test that one instance gives the same results across sizes, limits and threads."""
+    encode = _module_attr(codec_type, "{}_encode")
+    decode = _module_attr(codec_type, "{}_decode")
+    payloads = [bytes(range(32, 127)) * k for k in (0, 1, 50, 3, 2000, 7)]
+    for codec in (codec_type(), codec_type(scratch_limit=0), codec_type(scratch_limit=1000)):
+        for data in payloads:
+            encoded = codec.encode(data)
+            assert encoded == encode(data)
+            assert codec.decode(encoded) == data.decode('ascii')
+    with pytest.raises(ValueError):
+        codec_type(scratch_limit=-1)
+
+    shared = codec_type()
+    errors = []
+
+    def work(data):
+        for _ in range(50):
+            if shared.decode(shared.encode(data)) != data.decode('ascii'):
+                errors.append(data)
+            if decode(encode(data)) != data.decode('ascii'):
+                errors.append(data)
+
+    threads = [threading.Thread(target=work, args=(payloads[4][:n],)) for n in (5000, 90000, 150000)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
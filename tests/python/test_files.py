@@ -0,0 +1,77 @@
+import base64 as py_base64
+
+import pytest
+from bin2text import encode_file, decode_file, Base64, Base32, Base16, Base128
+
+
+PAYLOAD = bytes((i * 131 + (i >> 8)) & 0xFF for i in range(200_003))
+CODECS = {"base64": Base64, "base32": Base32, "base16": Base16, "base128": Base128}
+
+
+@pytest.mark.parametrize("fmt", list(CODECS))
+def test_file_roundtrip(tmp_path, fmt):
+    """Test encoding and decoding between memory-mapped files."""
+    src = tmp_path / "data.bin"
+    encoded = tmp_path / "data.txt"
+    decoded = tmp_path / "data.out"
+    src.write_bytes(PAYLOAD)
+
+    codec = CODECS[fmt]()
+    written = encode_file(src, encoded, format=fmt)
+    assert written == codec.encoded_length(len(PAYLOAD))
+    assert encoded.read_bytes() == codec.encode(PAYLOAD).encode('ascii')
+
+    assert decode_file(encoded, decoded, format=fmt, workers=2) == len(PAYLOAD)
+    assert decoded.read_bytes() == PAYLOAD
+
+
+@pytest.mark.parametrize("fmt", ["base64", "base32", "base16"])
+def test_wrapped_file_roundtrip(tmp_path, fmt):
+    """Test decoding line-wrapped files with ignore_whitespace and strict."""
+    encoded = tmp_path / "data.txt"
+    decoded = tmp_path / "data.out"
+    codec = CODECS[fmt]()
+    encoded.write_bytes(codec.encode(PAYLOAD, wrap=76).replace("\n", "\r\n").encode('ascii'))
+
+    for workers in (None, 4):
+        assert decode_file(encoded, decoded, format=fmt, workers=workers, strict=True,
+                           ignore_whitespace=True) == len(PAYLOAD)
+        assert decoded.read_bytes() == PAYLOAD
+    with pytest.raises(ValueError, match="at offset 76$"):
+        decode_file(encoded, decoded, format=fmt, strict=True)
+
+    encoded.write_bytes(codec.encode(PAYLOAD[:1000], wrap=64).encode('ascii')[:-1] + b"!\n")
+    with pytest.raises(ValueError, match="'!'"):
+        decode_file(encoded, decoded, format=fmt, strict=True, ignore_whitespace=True)
+    # A failed decode leaves no partial output behind
+    assert decoded.read_bytes() == b""
+    encoded.write_bytes(b"!")
+    with pytest.raises(ValueError, match="at offset 0$"):
+        decode_file(encoded, decoded, format=fmt, strict=True)
+
+
+def test_empty_and_existing_files(tmp_path):
+    """Test empty inputs and that existing outputs are replaced."""
+    src = tmp_path / "empty.bin"
+    dst = tmp_path / "out.txt"
+    src.write_bytes(b"")
+    dst.write_bytes(b"stale contents")
+
+    assert encode_file(src, dst) == 0
+    assert dst.read_bytes() == b""
+    assert decode_file(src, dst) == 0
+
+    src.write_bytes(b"abc")
+    encode_file(str(src), str(dst))
+    assert dst.read_bytes() == py_base64.b64encode(b"abc")
+
+
+def test_invalid_arguments(tmp_path):
+    """Test unknown formats and in-place transcoding are rejected."""
+    src = tmp_path / "data.bin"
+    src.write_bytes(PAYLOAD)
+    with pytest.raises(ValueError):
+        encode_file(src, tmp_path / "out", format="base58")
+    with pytest.raises(ValueError):
+        encode_file(src, src)
+    assert src.read_bytes() == PAYLOAD
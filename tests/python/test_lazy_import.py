@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import bin2text
+
+
+def _loaded_after(code):
+    """Return the public bin2text submodules and heavy dependencies ``code`` leaves imported."""
+    script = code + "; import sys; print(' '.join(sorted(sys.modules)))"
+    modules = subprocess.run([sys.executable, '-c', script], check=True,
+                             capture_output=True, text=True).stdout.split()
+    return {m for m in modules
+            if m.startswith('bin2text.') and not m.startswith('bin2text._') or m in ('asyncio', 'numpy')}
+
+
+def test_import_loads_nothing():
+    """Test that importing the package loads no codec module, asyncio or NumPy."""
+    assert _loaded_after("import bin2text") == set()
+
+
+def test_first_use_loads_only_what_it_needs():
+    """Test that each name pulls in its own submodule only."""
+    assert _loaded_after("import bin2text; bin2text.base16_encode(b'x')") == {'bin2text.base16'}
+    assert _loaded_after("from bin2text import encode; encode(b'x', format='base32')") == {
+        'bin2text.registry', 'bin2text.base32'}
+    assert 'asyncio' in _loaded_after("from bin2text import aencode")
+
+
+def test_lazy_names():
+    """Test that lazily resolved names behave like regular attributes."""
+    assert bin2text.Base64 is bin2text.base64.Base64
+    assert 'Base128' in dir(bin2text)
+    assert set(bin2text.__all__) <= set(dir(bin2text))
+    try:
+        bin2text.base58_encode
+    except AttributeError as e:
+        assert 'base58_encode' in str(e)
+    else:
+        raise AssertionError("expected AttributeError")
+
+
+def test_codec_modules_keep_their_own_state():
+    """Test that codecs stay separate modules, also when built as one extension."""
+    modules = [bin2text.base64, bin2text.base32, bin2text.base16, bin2text.base128]
+    assert len({m.__name__ for m in modules}) == 4
+    if bin2text.base64.__file__.rpartition('/')[2].startswith('_native'):
+        assert len({m.__file__ for m in modules}) == 1
+    before = bin2text.base32.get_nogil_threshold()
+    bin2text.base64.set_nogil_threshold(before + 1)
+    try:
+        assert bin2text.base32.get_nogil_threshold() == before
+    finally:
+        bin2text.base64.set_nogil_threshold(before)
@@ -0,0 +1,111 @@
+import binascii
+
+import pytest
+import bin2text
+from bin2text import (
+    encode, decode, get_codec, register_codec, unregister_codec, available_codecs, codec_spec,
+    encode_file, decode_file, Base64, Base32, Base16, Base128,
+)
+
+
+class UpperHex:
+    """Minimal pure-Python codec, registered by the tests."""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def encode(self, data):
+        return binascii.hexlify(bytes(data)).decode('ascii').upper()
+
+    def decode_to_bytes(self, encoded):
+        return binascii.unhexlify(encoded)
+
+    def decode(self, encoded):
+        return self.decode_to_bytes(encoded).decode('utf-8')
+
+    def encoded_length(self, n):
+        return 2 * n
+
+    def max_decoded_length(self, n):
+        return n // 2
+
+    def encode_into(self, data, out):
+        encoded = self.encode(data).encode('ascii')
+        memoryview(out)[:len(encoded)] = encoded
+        return len(encoded)
+
+    def decode_into(self, encoded, out):
+        decoded = self.decode_to_bytes(bytes(encoded))
+        memoryview(out)[:len(decoded)] = decoded
+        return len(decoded)
+
+
+@pytest.fixture
+def upperhex():
+    register_codec('upperhex', UpperHex, bytes_per_group=1, chars_per_group=2)
+    yield
+    unregister_codec('upperhex')
+
+
+def test_builtin_codecs():
+    """Test that the built-in formats are registered and dispatch to their codecs."""
+    assert available_codecs() == ('base64', 'base32', 'base16', 'base128')
+    for fmt, codec_type in [("base64", Base64), ("base32", Base32), ("base16", Base16), ("base128", Base128)]:
+        codec = codec_type()
+        assert isinstance(get_codec(fmt), codec_type)
+        assert encode(b"hello world", format=fmt) == codec.encode(b"hello world")
+        assert decode(codec.encode(b"hello world"), format=fmt) == b"hello world"
+    assert encode(b"hello") == bin2text.base64_encode(b"hello")
+    assert decode("aGVsbG8=", strict=True) == b"hello"
+    assert codec_spec("base128").wrappable is False
+    assert (codec_spec("base32").bytes_per_group, codec_spec("base32").chars_per_group) == (5, 8)
+
+
+def test_shared_instances():
+    """Test that lookups without options return one cached instance per format."""
+    assert get_codec("base64") is get_codec("base64")
+    urlsafe = get_codec("base64", alphabet="urlsafe", padding=False)
+    assert urlsafe is not get_codec("base64")
+    assert urlsafe.encode(b"\xfb\xff") == "-_8"
+
+
+def test_unknown_format():
+    """Test that unknown formats raise ValueError naming the registered ones."""
+    with pytest.raises(ValueError, match="base58.*base64"):
+        encode(b"abc", format="base58")
+    with pytest.raises(ValueError):
+        get_codec(None)
+    with pytest.raises(ValueError):
+        unregister_codec("base58")
+
+
+def test_third_party_codec(upperhex, tmp_path):
+    """Test that a registered codec works through every format-based API."""
+    assert 'upperhex' in available_codecs()
+    assert encode(b"\xab\xcd", format="upperhex") == "ABCD"
+    assert decode("ABCD", format="upperhex") == b"\xab\xcd"
+    assert get_codec("upperhex", parallel=True).options == {'parallel': True}
+
+    src, dst = tmp_path / "data.bin", tmp_path / "data.hex"
+    src.write_bytes(b"\x00\x01\xfe\xff")
+    assert encode_file(src, dst, format="upperhex") == 8
+    assert dst.read_bytes() == b"0001FEFF"
+    with pytest.raises(ValueError, match="incremental"):
+        codec_spec("upperhex").new_encoder()
+
+
+def test_registration_errors(upperhex):
+    """Test duplicate names and incomplete codec types are rejected."""
+    with pytest.raises(ValueError):
+        register_codec('upperhex', UpperHex)
+    register_codec('upperhex', UpperHex, replace=True)
+
+    class EncodeOnly:
+        def encode(self, data):
+            return ""
+
+    with pytest.raises(TypeError, match="decode"):
+        register_codec('broken', EncodeOnly)
+    with pytest.raises(ValueError):
+        register_codec('broken', UpperHex, bytes_per_group=0)
+    assert 'broken' not in available_codecs()
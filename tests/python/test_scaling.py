@@ -0,0 +1,35 @@
+import time
+
+import pytest
+from bin2text import Base64, Base32, Base16, Base128
+
+
+SIZES = [1 << 18, 1 << 20, 1 << 22]  # 256 KiB, 1 MiB, 4 MiB
+
+
+def _best_time(func, arg, repeat=5):
+    """Return the fastest of ``repeat`` runs to reduce timer noise."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize("codec", [Base64(), Base32(), Base16(), Base128()],
+                         ids=lambda codec: type(codec).__name__)
+def test_decode_to_bytes_scales_linearly(codec):
+    """Regression benchmark: decoding to bytes must stay O(n).
+
+    Going from 256 KiB to 4 MiB is a 16x increase in input; a linear path
+    grows per-byte cost by ~1x while the old byte-by-byte concatenation grew
+    it by ~16x. Allow generous headroom for cache effects and noisy CI.
+    """
+    per_byte = []
+    for size in SIZES:
+        encoded = codec.encode(bytes(range(256)) * (size // 256))
+        elapsed = _best_time(codec.decode_to_bytes, encoded)
+        per_byte.append(elapsed / size)
+
+    assert per_byte[-1] < per_byte[0] * 4, per_byte
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+import bin2text
+from bin2text import Base64, Base32, Base16, Base128, Base64Encoder, base16_decode_many
+
+
+@pytest.fixture
+def counting():
+    bin2text.reset_stats()
+    bin2text.enable_stats()
+    yield
+    bin2text.enable_stats(False)
+    bin2text.reset_stats()
+
+
+def test_disabled_by_default():
+    """Test that nothing is counted until stats are enabled."""
+    bin2text.reset_stats()
+    Base64().encode(b"abc")
+    assert bin2text.stats()['base64']['encode']['calls'] == 0
+
+
+@pytest.mark.parametrize("codec_type", [Base64, Base32, Base16, Base128])
+def test_counts_per_codec_and_operation(counting, codec_type):
+    """Test call, byte and latency counters for every codec."""
+    codec = codec_type()
+    name = codec_type.__name__.lower()
+    encoded = codec.encode(b"hello world")
+    codec.decode_to_bytes(encoded)
+    out = bytearray(codec.encoded_length(11))
+    codec.encode_into(b"hello world", out)
+
+    report = bin2text.stats()
+    encode, decode = report[name]['encode'], report[name]['decode']
+    assert encode['calls'] == 2
+    assert encode['bytes_in'] == 22
+    assert encode['bytes_out'] == 2 * len(encoded)
+    assert decode['calls'] == 1
+    assert decode['bytes_in'] == len(encoded)
+    assert decode['bytes_out'] == 11
+    assert sum(encode['latency_ns']) == 2
+    assert encode['seconds'] > 0
+    others = [n for n in report if n != name]
+    assert all(report[n]['encode']['calls'] == 0 for n in others)
+
+    bin2text.reset_stats()
+    assert bin2text.stats()[name]['encode']['calls'] == 0
+
+
+def test_batches_streams_and_threads(counting):
+    """Test that batches count once, stream steps each count, and threads add up."""
+    base16_decode_many(["00ff", "abcd", ""])
+    decode = bin2text.stats()['base16']['decode']
+    assert (decode['calls'], decode['bytes_in'], decode['bytes_out']) == (1, 8, 4)
+
+    encoder = Base64Encoder()
+    encoder.update(b"abcd")
+    encoder.finalize()
+    encode = bin2text.stats()['base64']['encode']
+    assert (encode['calls'], encode['bytes_in'], encode['bytes_out']) == (2, 4, 8)
+
+    codec = Base32()
+    threads = [threading.Thread(target=lambda: [codec.encode(b"x" * 5000) for _ in range(500)])
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert bin2text.stats()['base32']['encode']['calls'] == 2000
+    assert bin2text.stats()['base32']['encode']['bytes_in'] == 2000 * 5000
+
+
+def test_failed_strict_decode_is_counted(counting):
+    """Test that calls raising for invalid input still count."""
+    with pytest.raises(ValueError):
+        Base64().decode_to_bytes("SGVs!G8=", strict=True)
+    assert bin2text.stats()['base64']['decode']['calls'] == 1
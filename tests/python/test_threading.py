@@ -0,0 +1,113 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import bin2text
+from bin2text import Base64, Base32, Base16, Base128
+
+
+CODECS = [Base64(), Base32(), Base16(), Base128()]
+
+
+@pytest.fixture
+def restore_threshold():
+    """Put the package-wide GIL threshold back after the test."""
+    original = bin2text.get_nogil_threshold()
+    yield
+    bin2text.set_nogil_threshold(original)
+
+
+def test_nogil_threshold_is_configurable(restore_threshold):
+    """Test the package-wide and per-module threshold setters."""
+    bin2text.set_nogil_threshold(0)
+    assert bin2text.get_nogil_threshold() == 0
+    for module in (bin2text.base64, bin2text.base32, bin2text.base16, bin2text.base128):
+        assert module.get_nogil_threshold() == 0
+
+    bin2text.set_nogil_threshold(sys.maxsize)
+    assert bin2text.get_nogil_threshold() == sys.maxsize
+
+    with pytest.raises(ValueError):
+        bin2text.set_nogil_threshold(-1)
+
+
+@pytest.mark.parametrize("threshold", [0, sys.maxsize])
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+def test_concurrent_roundtrip(codec, threshold, restore_threshold):
+    """Test that encode/decode give the same results from many threads."""
+    bin2text.set_nogil_threshold(threshold)
+    payloads = [bytes((i + k) & 0xFF for i in range(50000 + k)) for k in range(16)]
+
+    def roundtrip(payload):
+        encoded = codec.encode(payload)
+        out = bytearray(codec.max_decoded_length(len(encoded)))
+        written = codec.decode_into(encoded, out)
+        return codec.decode_to_bytes(encoded), bytes(out[:written])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(roundtrip, payloads))
+
+    for payload, (decoded, decoded_into) in zip(payloads, results):
+        assert decoded == payload
+        assert decoded_into == payload
+
+
+@pytest.mark.parametrize("codec_type", [Base64, Base32, Base16, Base128])
+def test_parallel_matches_single_threaded(codec_type):
+    """Test that workers=N splits large inputs without changing the result."""
+    serial = codec_type()
+    payload = bytes((i * 131 + (i >> 9)) & 0xFF for i in range(3 * 256 * 1024 + 11))
+    expected = serial.encode(payload)
+
+    for workers in (2, 3, 8):
+        codec = codec_type(workers=workers)
+        assert codec.workers == workers
+        assert codec.encode(payload) == expected
+        assert codec.decode_to_bytes(expected) == payload
+
+        out = bytearray(len(expected))
+        assert codec.encode_into(payload, out) == len(expected)
+        assert out.decode('ascii') == expected
+
+        # Padding and invalid characters inside a piece decode exactly as
+        # they do on one thread
+        broken = expected[:100] + "=" + expected[101:len(expected) // 2] + "!" + expected[len(expected) // 2 + 1:]
+        assert codec.decode_to_bytes(broken) == serial.decode_to_bytes(broken)
+
+        # Strict decoding reports the same first invalid character
+        bad = expected[:len(expected) // 2] + "\xe9" + expected[len(expected) // 2 + 1:]
+        assert codec.decode_to_bytes(expected, strict=True) == payload
+        with pytest.raises(ValueError, match=f"at offset {len(expected) // 2}$"):
+            codec.decode_to_bytes(bad, strict=True)
+
+    assert codec_type().workers == 1
+    assert codec_type(parallel=True).workers >= 1
+    with pytest.raises(ValueError):
+        codec_type(workers=0)
+
+
+def test_batch_survives_concurrent_list_mutation(restore_threshold):
+    """Test that a batch keeps its items alive while another thread empties the list."""
+    bin2text.set_nogil_threshold(0)
+    codec = Base64()
+    items = [bytes([k]) * 200_000 for k in range(32)]
+    expected = [codec.encode(item) for item in items]
+    stop = False
+
+    def churn():
+        while not stop:
+            items[:] = [bytes([k]) * 200_000 for k in range(32)]
+            items.clear()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(churn)
+        try:
+            for _ in range(50):
+                batch = [bytes([k]) * 200_000 for k in range(32)]
+                items[:] = batch
+                assert codec.encode_many(batch) == expected
+                encoded = codec.encode_many(items)
+                assert all(e in expected for e in encoded)
+        finally:
+            stop = True
+            future.result()